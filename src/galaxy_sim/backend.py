@@ -0,0 +1,65 @@
+# backend.py
+
+import os
+import numpy as np
+
+BACKEND_ENV_VAR = "GALAXY_SIM_BACKEND"
+BACKEND_NAMES = ("auto", "numpy", "cupy")
+
+
+def _import_cupy():
+    """Imports cupy only if a usable CUDA device is present."""
+    try:
+        import cupy as cp
+        if cp.cuda.runtime.getDeviceCount() == 0:
+            return None
+        return cp
+    except Exception:
+        return None
+
+
+def get_backend(name: str = None):
+    """Returns the array module (numpy or cupy) for a backend name or $GALAXY_SIM_BACKEND."""
+    name = (name or os.environ.get(BACKEND_ENV_VAR) or "auto").lower()
+    if name not in BACKEND_NAMES:
+        raise ValueError(f"Unknown backend '{name}', expected one of {BACKEND_NAMES}")
+    if name == "numpy":
+        return np
+    cp = _import_cupy()
+    if cp is None:
+        if name == "cupy":
+            raise RuntimeError("The cupy backend was requested but no CUDA device is available.")
+        return np
+    return cp
+
+
+def backend_name(xp) -> str:
+    return "numpy" if xp is np else "cupy"
+
+
+def get_array_module(arr):
+    """Returns numpy or cupy depending on where `arr` lives, without importing cupy for numpy inputs."""
+    if isinstance(arr, np.ndarray) or type(arr).__module__.split('.')[0] != 'cupy':
+        return np
+    import cupy as cp
+    return cp
+
+
+def asnumpy(arr) -> np.ndarray:
+    """Copies a device array to the host; numpy arrays are returned as-is."""
+    if isinstance(arr, np.ndarray):
+        return arr
+    return get_array_module(arr).asnumpy(arr)
+
+
+def to_host(arr) -> np.ndarray:
+    """Returns a host copy that never aliases backend state."""
+    if isinstance(arr, np.ndarray):
+        return arr.copy()
+    return get_array_module(arr).asnumpy(arr)
+
+
+def synchronize(xp):
+    """Blocks until queued device work is finished so that wall-clock timings are honest."""
+    if xp is not np:
+        xp.cuda.Stream.null.synchronize()
@@ -0,0 +1,61 @@
+# batch.py
+
+import time
+import numpy as np
+from .backend import synchronize
+from .engine import SimulationEngine, format_throughput, throughput_report
+from .state_cache import atomic_write
+
+
+class SnapshotFile:
+    """Collects decimated engine snapshots and writes them to one .npz file on close()."""
+    def __init__(self, path: str, names: list):
+        self.path = path
+        self.names = list(names)
+        self._et, self._positions, self._velocities = [], [], []
+
+    @property
+    def count(self) -> int:
+        return len(self._et)
+
+    def write(self, et: float, positions, velocities):
+        self._et.append(et)
+        self._positions.append(positions)
+        self._velocities.append(velocities)
+
+    def close(self):
+        arrays = {'names': np.array(self.names), 'et': np.array(self._et, dtype=np.float64),
+                  'positions': np.array(self._positions, dtype=np.float64).reshape(self.count, -1, 3),
+                  'velocities': np.array(self._velocities, dtype=np.float64).reshape(self.count, -1, 3)}
+        atomic_write(self.path, lambda f: np.savez(f, **arrays))
+
+
+def run_batch(engine: SimulationEngine, duration: float, dt: float, every: int = 1, writer=None,
+              max_steps: int = None, time_limit: float = None, checkpoint=None) -> dict:
+    """Steps `engine` headless through `duration` seconds, writing every `every`-th state to `writer`.
+    Returns a throughput_report extended with sim_days, snapshots and why the run stopped."""
+    num_steps = int(round(duration / dt))
+    write = (lambda: writer.write(engine.et, engine.get_positions(), engine.get_velocities())) if writer else None
+    synchronize(engine.xp)
+    start = time.perf_counter()
+    if write: write()
+    steps, stopped = 0, 'duration'
+    while steps < num_steps:
+        if max_steps is not None and steps >= max_steps:
+            stopped = 'max_steps'; break
+        if time_limit is not None and time.perf_counter() - start >= time_limit:
+            stopped = 'time_limit'; break
+        engine.step(dt)
+        steps += 1
+        if checkpoint: checkpoint.update(engine)
+        if write and steps % every == 0: write()
+    if write and steps % every: write()
+    synchronize(engine.xp)
+    report = throughput_report(engine, steps, time.perf_counter() - start)
+    report.update(integrator=engine.integrator_name, sim_days=steps * dt / 86400,
+                  snapshots=writer.count if writer else 0, stopped=stopped)
+    return report
+
+
+def format_report(report: dict) -> str:
+    return f"{format_throughput(report)} | {report['sim_days']:.1f} days simulated (stopped: {report['stopped']})"
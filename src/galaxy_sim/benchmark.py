@@ -0,0 +1,312 @@
+# benchmark.py
+
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+import subprocess
+import numpy as np
+from .backend import get_backend, synchronize
+from .gravity import G, Body, Probe, total_energy, angular_momentum
+from .engine import SimulationEngine
+from .integrators import INTEGRATORS
+from .solvers import SOLVERS, make_solver
+from .prediction import run_prediction, evaluate_trajectory
+from .ephemeris import Ephemeris
+
+BENCHMARK_VERSION = 1
+SIZES = (16, 256, 4096, 100_000)
+QUICK_SIZES = (16, 256)
+DIRECT_MAX_BODIES = 4096  # the dense kernels hold N x N x 3 doubles; larger scenes use LARGE_N_SOLVER
+LARGE_N_SOLVER = 'barnes_hut'
+CONSERVATION_MAX_BODIES = 4096  # the O(N^2) energy sum is skipped above this
+PAIR_BUDGET = 2e8  # direct-equivalent pair interactions per case, which sets its step count
+MAX_STEPS = 2000
+DT = 86400.0
+REGRESSION_THRESHOLD = 0.1
+THROUGHPUT_METRICS = ('steps_per_sec',)
+GROWTH_METRICS = ('peak_memory_bytes', 'energy_drift', 'angular_momentum_drift')
+DRIFT_FLOOR = 1e-13  # drifts below round-off never count as regressions
+SUN_MASS = 1.989e30
+AU = 1.496e11
+
+
+def benchmark_scene(n: int, seed: int = 0) -> list:
+    """A star and n - 1 bodies on slightly perturbed, near-circular orbits between 0.4 and 40 AU."""
+    rng = np.random.default_rng(seed)
+    bodies = [Body(mass=SUN_MASS, position=[0, 0, 0], name="Sun", body_type="star")]
+    radius = AU * np.exp(rng.uniform(np.log(0.4), np.log(40.0), n - 1))
+    phase = rng.uniform(0, 2 * np.pi, n - 1)
+    inclination = rng.normal(0, 0.02, n - 1)
+    speed = np.sqrt(G * SUN_MASS / radius) * rng.uniform(0.98, 1.02, n - 1)
+    mass = 10 ** rng.uniform(18, 26, n - 1) / max(1.0, (n - 1) / 16)
+    for k in range(n - 1):
+        c, s = np.cos(phase[k]), np.sin(phase[k])
+        bodies.append(Body(mass=mass[k], position=[radius[k] * c, radius[k] * s, radius[k] * inclination[k]],
+                           velocity=[-speed[k] * s, speed[k] * c, 0], name=f"Body-{k}", body_type="planet"))
+    return bodies
+
+
+def case_steps(n: int, budget: float = PAIR_BUDGET) -> int:
+    """Fixed step count for a scene of n bodies, so drifts are comparable between runs."""
+    return int(min(MAX_STEPS, max(1, budget // (n * n))))
+
+
+def case_solver(n: int) -> str:
+    return 'direct' if n <= DIRECT_MAX_BODIES else LARGE_N_SOLVER
+
+
+def unique_integrators(probes_only: bool = False) -> list:
+    """
+    Registered integrator names, one per scheme (aliases such as 'verlet' are dropped): the
+    engine schemes, or with `probes_only` the schemes that only propagate probes on rails.
+    """
+    names, seen = [], set()
+    for name, cls in INTEGRATORS.items():
+        if cls not in seen and cls.probes_only == probes_only:
+            seen.add(cls)
+            names.append(name)
+    return names
+
+
+def available_backends() -> list:
+    backends = ['numpy']
+    if get_backend('auto') is not np:
+        backends.append('cupy')
+    return backends
+
+
+def peak_memory(fn, xp=np) -> int:
+    """Peak bytes allocated while fn() runs: host allocations, or the device memory pool on cupy."""
+    if xp is not np:
+        pool = xp.get_default_memory_pool()
+        pool.free_all_blocks()
+        fn()
+        synchronize(xp)
+        return int(pool.total_bytes())
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _timed(fn, xp=np) -> float:
+    synchronize(xp)
+    start = time.perf_counter()
+    fn()
+    synchronize(xp)
+    return time.perf_counter() - start
+
+
+def _case(kernel: str, backend: str, scheme: str, n: int, steps: int, wall_time: float, pairs,
+          memory: int, energy_drift=None, angular_momentum_drift=None) -> dict:
+    return {
+        'case': f"{kernel}/{backend}/{scheme}/N={n}",
+        'kernel': kernel, 'backend': backend, 'scheme': scheme, 'bodies': n, 'steps': steps,
+        'wall_time_s': wall_time,
+        'steps_per_sec': steps / wall_time if wall_time > 0 else float('inf'),
+        'pair_interactions_per_sec': None if pairs is None else (pairs / wall_time if wall_time > 0 else float('inf')),
+        'peak_memory_bytes': memory,
+        'energy_drift': energy_drift,
+        'angular_momentum_drift': angular_momentum_drift,
+    }
+
+
+def bench_accelerations(n: int, backend: str, solver: str, budget: float = PAIR_BUDGET) -> dict:
+    """Repeated force evaluations of one solver; 'direct' is update_accelerations_gpu itself."""
+    xp = get_backend(backend)
+    bodies = benchmark_scene(n)
+    positions = xp.array([b.position for b in bodies]); masses = xp.array([b.mass for b in bodies])
+    kernel = make_solver(solver)
+    calls = case_steps(n, budget)
+    kernel(positions, masses)  # warm-up (JIT compilation, memory pools)
+    memory = peak_memory(lambda: kernel(positions, masses), xp)
+
+    def run():
+        for _ in range(calls):
+            kernel(positions, masses)
+    return _case('accelerations', backend, solver, n, calls, _timed(run, xp), calls * n * (n - 1), memory)
+
+
+def bench_engine(n: int, backend: str, integrator: str, budget: float = PAIR_BUDGET) -> dict:
+    """SimulationEngine.step over a fixed number of steps, with the energy and angular-momentum drift."""
+    solver = case_solver(n)
+    engine = SimulationEngine(benchmark_scene(n), 0.0, backend=backend, integrator=integrator, solver=solver)
+    xp, steps = engine.xp, case_steps(n, budget)
+    conserved = n <= CONSERVATION_MAX_BODIES
+    if conserved:
+        e0 = total_energy(engine.positions, engine.velocities, engine.masses)
+        l0 = angular_momentum(engine.positions, engine.velocities, engine.masses)
+    memory = peak_memory(lambda: engine.step(DT), xp)  # also the warm-up step
+
+    def run():
+        for _ in range(steps):
+            engine.step(DT)
+    evaluations = engine.integrator.force_evaluations
+    wall_time = _timed(run, xp)
+    pairs = (engine.integrator.force_evaluations - evaluations) * n * (n - 1)
+    energy_drift = angular_momentum_drift = None
+    if conserved:
+        energy_drift = abs(total_energy(engine.positions, engine.velocities, engine.masses) / e0 - 1)
+        l1 = angular_momentum(engine.positions, engine.velocities, engine.masses)
+        angular_momentum_drift = float(np.linalg.norm(l1 - l0) / np.linalg.norm(l0))
+    return _case('engine.step', backend, f"{integrator}+{solver}", n, steps, wall_time, pairs, memory,
+                 energy_drift, angular_momentum_drift)
+
+
+def _benchmark_probe(bodies: list) -> Probe:
+    earth_like = bodies[min(1, len(bodies) - 1)]
+    return Probe(name="Benchmark-Probe", position=earth_like.position * 1.01, velocity=earth_like.velocity * 1.1)
+
+
+def bench_prediction(n: int, backend: str, integrator: str, budget: float = PAIR_BUDGET) -> dict:
+    """
+    run_prediction of one probe through an integrated scene of n bodies. Probe-only schemes
+    run with the scene on rails, from an ephemeris sampled before timing starts.
+    """
+    bodies, solver = benchmark_scene(n), case_solver(n)
+    probe, steps = _benchmark_probe(bodies), case_steps(n, budget)
+    xp = get_backend(backend)
+    rails = {}
+    if INTEGRATORS[integrator].probes_only:
+        rails = {'ephemeris': Ephemeris.from_bodies(bodies, DT, max(steps, int(86400 / DT)), xp=xp), 'epoch': 0.0}
+    memory = peak_memory(lambda: run_prediction(bodies, probe, 1, DT, backend, integrator, solver=solver, **rails),
+                         xp)
+    wall_time = _timed(lambda: run_prediction(bodies, probe, steps * DT / 86400, DT, backend, integrator,
+                                              solver=solver, **rails), xp)
+    return _case('run_prediction', backend, f"{integrator}+{solver}", n, steps, wall_time, None, memory)
+
+
+def bench_evaluation(n: int, budget: float = PAIR_BUDGET) -> dict:
+    """evaluate_trajectory of a path against a body whose track is integrated from the scene."""
+    bodies, steps = benchmark_scene(n), case_steps(n, budget)
+    path = np.repeat(_benchmark_probe(bodies).position[np.newaxis, :], steps, axis=0)
+    target = bodies[-1]
+    memory = peak_memory(lambda: evaluate_trajectory(path[:1], target, bodies, DT))
+    wall_time = _timed(lambda: evaluate_trajectory(path, target, bodies, DT))
+    return _case('evaluate_trajectory', 'numpy', 'leapfrog+direct', n, steps, wall_time, (steps + 1) * n * (n - 1),
+                 memory)
+
+
+def run_benchmarks(sizes=SIZES, backends=None, integrators=None, solvers=None, budget: float = PAIR_BUDGET,
+                   log=None) -> dict:
+    """
+    Runs every benchmark case and returns a JSON-ready report. Step counts depend only on N,
+    so two reports of the same cases can be compared with compare_reports().
+    """
+    backends = backends or available_backends()
+    integrators = integrators or unique_integrators() + unique_integrators(probes_only=True)
+    solvers = solvers or list(SOLVERS)
+    jobs = []
+    for n in sizes:
+        for backend in backends:
+            for solver in solvers:
+                if solver == 'direct' and n > DIRECT_MAX_BODIES: continue
+                jobs.append((bench_accelerations, n, backend, solver))
+            for integrator in integrators:
+                if not INTEGRATORS[integrator].probes_only:
+                    jobs.append((bench_engine, n, backend, integrator))
+                elif n > DIRECT_MAX_BODIES: continue  # the rails are a direct-sum integration of the scene
+                jobs.append((bench_prediction, n, backend, integrator))
+        if n <= DIRECT_MAX_BODIES:  # the target track is a direct-sum leapfrog integration
+            jobs.append((bench_evaluation, n))
+    cases = []
+    for fn, *args in jobs:
+        case = fn(*args, budget=budget)
+        cases.append(case)
+        if log: log(format_case(case))
+    return {'version': BENCHMARK_VERSION, 'machine': machine_info(), 'cases': cases}
+
+
+def machine_info() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {'commit': commit, 'python': platform.python_version(), 'numpy': np.__version__,
+            'platform': platform.platform(), 'processor': platform.processor(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def compare_reports(baseline: dict, current: dict, threshold: float = REGRESSION_THRESHOLD) -> list:
+    """
+    Regressions of `current` against `baseline`, matched by case name: throughput that fell by
+    more than `threshold` (a fraction), or memory or drift that grew by more than it. Drifts
+    are only compared between cases that ran the same number of steps.
+    """
+    base = {case['case']: case for case in baseline['cases']}
+    regressions = []
+    for case in current['cases']:
+        old = base.get(case['case'])
+        if old is None: continue
+        for metric in THROUGHPUT_METRICS:
+            if old[metric] and case[metric] < old[metric] * (1 - threshold):
+                regressions.append(_regression(case, metric, old[metric]))
+        for metric in GROWTH_METRICS:
+            if old[metric] is None or case[metric] is None: continue
+            if metric.endswith('drift') and (old['steps'] != case['steps'] or case[metric] < DRIFT_FLOOR):
+                continue
+            if case[metric] > old[metric] * (1 + threshold):
+                regressions.append(_regression(case, metric, old[metric]))
+    return regressions
+
+
+def _regression(case: dict, metric: str, baseline) -> dict:
+    change = case[metric] / baseline - 1 if baseline else float('inf')
+    return {'case': case['case'], 'metric': metric, 'baseline': baseline, 'current': case[metric], 'change': change}
+
+
+def format_case(case: dict) -> str:
+    pairs = case['pair_interactions_per_sec']
+    line = (f"{case['case']:<48} | {case['steps']:>5} steps in {case['wall_time_s']:.3f} s | "
+            f"{case['steps_per_sec']:.1f} steps/s | "
+            f"{'-' if pairs is None else f'{pairs:.3e}'} pairs/s | {case['peak_memory_bytes'] / 2**20:.1f} MiB")
+    if case['energy_drift'] is not None:
+        line += f" | dE/E {case['energy_drift']:.1e} | dL/L {case['angular_momentum_drift']:.1e}"
+    return line
+
+
+def format_regression(regression: dict) -> str:
+    return (f"✘ {regression['case']}: {regression['metric']} {regression['baseline']:.4g} -> "
+            f"{regression['current']:.4g} ({regression['change']:+.1%})")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m galaxy_sim.benchmark",
+                                     description="Performance and conservation benchmarks of the N-body kernels.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None, help=f"body counts (default {SIZES})")
+    parser.add_argument("--quick", action="store_true", help=f"small scenes and budgets only, N in {QUICK_SIZES}")
+    parser.add_argument("--backends", nargs="+", default=None, help="backends to run (default: all available)")
+    parser.add_argument("--integrators", nargs="+", default=None, help="integrators to run (default: all)")
+    parser.add_argument("--solvers", nargs="+", default=None, help="force solvers to time (default: all)")
+    parser.add_argument("--output", type=str, default=None, help="write the JSON report to this file")
+    parser.add_argument("--compare", type=str, default=None, help="baseline JSON report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="allowed relative slowdown or growth before a case counts as a regression")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else SIZES)
+    budget = PAIR_BUDGET / 100 if args.quick else PAIR_BUDGET
+    report = run_benchmarks(sizes, args.backends, args.integrators, args.solvers, budget, log=print)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✔ Report written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare_reports(json.load(f), report, args.threshold)
+        for regression in regressions:
+            print(format_regression(regression))
+        if regressions:
+            return 1
+        print(f"✔ No regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+# body_render.py
+
+import numpy as np
+from vispy import scene
+from vispy.scene import visuals
+
+LOD_LEVELS = ((8, 30), (24, 12))  # (spheres, mesh rows/cols) per detail level, finest first
+LOD_MIN_ANGLE = 0.01  # radius / distance below which a body is only ever a marker
+RING_POINT_SIZE = 1.5  # px
+
+
+def camera_eye(camera) -> np.ndarray:
+    """Scene position of the camera's eye (the origin of its own coordinate frame)."""
+    eye = np.asarray(camera.transform.map([0, 0, 0]), dtype=np.float64)
+    return eye[:3] / eye[3]
+
+
+def select_lod(positions, radii, eye, levels=LOD_LEVELS, min_angle: float = LOD_MIN_ANGLE) -> np.ndarray:
+    """
+    Detail level of every body: bodies with the largest apparent size (radius over distance
+    from the eye) fill the sphere budgets of `levels` in order, the rest get -1 (marker).
+    Selection is a partial sort, so it stays O(N) however many bodies there are.
+    """
+    levels_of = np.full(len(positions), -1)
+    budget = sum(count for count, _ in levels)
+    if budget == 0 or len(positions) == 0:
+        return levels_of
+    apparent = radii / np.maximum(np.linalg.norm(positions - eye, axis=1), 1e-12)
+    k = min(budget, len(positions))
+    nearest = np.argpartition(-apparent, k - 1)[:k]
+    nearest = nearest[np.argsort(-apparent[nearest], kind='stable')]
+    nearest = nearest[apparent[nearest] >= min_angle]
+    start = 0
+    for level, (count, _) in enumerate(levels):
+        levels_of[nearest[start:start + count]] = level
+        start += count
+    return levels_of
+
+
+class BodyRenderer:
+    """Draws any number of bodies as instanced markers, with sphere meshes for the few that look largest."""
+    def __init__(self, parent, levels=LOD_LEVELS, min_angle: float = LOD_MIN_ANGLE):
+        self.levels = levels
+        self.min_angle = min_angle
+        self.names, self.columns = [], {}
+        self._colors = np.zeros((64, 4), dtype=np.float32)
+        self._radii = np.zeros(64)
+        self.markers = scene.Markers(parent=parent, method='instanced', spherical=True, scaling='scene')
+        self.pool = []
+        for count, detail in levels:
+            spheres = []
+            for _ in range(count):
+                sphere = visuals.Sphere(radius=1.0, rows=detail, cols=detail, method='latitude', parent=parent,
+                                        shading=None)
+                sphere.transform = scene.transforms.STTransform()
+                sphere.visible = False
+                spheres.append([sphere, None])  # [visual, column it currently shows]
+            self.pool.append(spheres)
+
+    @property
+    def colors(self) -> np.ndarray:
+        return self._colors[:len(self.names)]
+
+    @property
+    def radii(self) -> np.ndarray:
+        return self._radii[:len(self.names)]
+
+    def add(self, name: str, color, radius: float) -> int:
+        col = len(self.names)
+        if col == len(self._radii):
+            self._colors = np.concatenate([self._colors, np.zeros_like(self._colors)])
+            self._radii = np.concatenate([self._radii, np.zeros_like(self._radii)])
+        self._colors[col] = tuple(color[:3]) + (1.0,)
+        self._radii[col] = radius
+        self.names.append(name)
+        self.columns[name] = col
+        return col
+
+    def update(self, positions, eye):
+        """Draws the bodies at (n, 3) scene `positions`, in the order they were added."""
+        if len(positions) == 0: return
+        radii = self.radii
+        lod = select_lod(positions, radii, eye, self.levels, self.min_angle)
+        for level, spheres in enumerate(self.pool):
+            cols = np.flatnonzero(lod == level)
+            for (slot, col) in zip(spheres, list(cols) + [None] * (len(spheres) - len(cols))):
+                sphere = slot[0]
+                if col is None:
+                    sphere.visible, slot[1] = False, None
+                    continue
+                if slot[1] != col:
+                    sphere.mesh.color = tuple(self._colors[col])
+                    sphere.transform.scale = (radii[col],) * 3
+                    slot[1] = col
+                sphere.transform.translate = positions[col]
+                sphere.visible = True
+        sizes = np.where(lod < 0, 2 * radii, 0.0)
+        self.markers.set_data(pos=positions, size=sizes, face_color=self.colors, edge_width=0)
+
+
+def ring_points(offsets, counts, centers, scales, out=None) -> np.ndarray:
+    """
+    Scene positions of ring particles: `offsets` are every ring's particles relative to their
+    parent, rings back to back with `counts` particles each, placed around the parents'
+    scene `centers` and multiplied by per-ring `scales`.
+    """
+    out = np.empty((len(offsets), 3), dtype=np.float32) if out is None else out
+    start = 0
+    for count, center, scale in zip(counts, centers, scales):
+        np.multiply(offsets[start:start + count], scale, out=out[start:start + count], casting='unsafe')
+        out[start:start + count] += np.asarray(center, dtype=np.float32)
+        start += count
+    return out
+
+
+class RingRenderer:
+    """Draws the particles of every ring as points from a single buffer, in one draw call."""
+    def __init__(self, parent, size: float = RING_POINT_SIZE):
+        self.size = size
+        self.layout = ()  # (parent name, particle count) per ring, in buffer order
+        self.positions = np.zeros((0, 3), dtype=np.float32)
+        self.colors = np.zeros((0, 4), dtype=np.float32)
+        self.markers = scene.Markers(parent=parent, scaling='fixed')
+        self.markers.visible = False
+
+    def set_rings(self, rings):
+        """Lays out the buffer for (parent name, particle count, color) per ring."""
+        self.layout = tuple((parent, count) for parent, count, _ in rings)
+        total = sum(count for _, count in self.layout)
+        self.positions = np.zeros((total, 3), dtype=np.float32)
+        self.colors = np.zeros((total, 4), dtype=np.float32)
+        start = 0
+        for _, count, color in rings:
+            self.colors[start:start + count] = tuple(color[:3]) + (1.0,)
+            start += count
+
+    def update(self, offsets, centers, scales):
+        """Draws the rings from particle `offsets` relative to the parents at scene `centers`."""
+        self.markers.visible = len(self.positions) > 0
+        if not self.markers.visible: return
+        ring_points(offsets, [count for _, count in self.layout], centers, scales, out=self.positions)
+        self.markers.set_data(pos=self.positions, size=self.size, face_color=self.colors, edge_width=0)
@@ -0,0 +1,136 @@
+# checkpoint.py
+
+import json
+import numpy as np
+from .backend import asnumpy
+from .engine import SimulationEngine
+from .gravity import Body, Probe
+from .state_cache import atomic_write
+
+CHECKPOINT_MAGIC = b"GSIMCKPT"
+CHECKPOINT_VERSION = 1
+ALIGN = 64  # byte alignment of every array block
+
+
+def _pad(offset: int) -> int:
+    return -offset % ALIGN
+
+
+def _engine_arrays(engine: SimulationEngine):
+    """(arrays, scalars) to save; on NumPy the row arrays are slices of the state buffers, not copies."""
+    n = engine.n_bodies
+    arrays = {
+        'positions': asnumpy(engine._x[:n]), 'velocities': asnumpy(engine._v[:n]),
+        'masses': asnumpy(engine.masses), 'kinds': engine._kinds[:n],
+        'names': np.array(engine.body_names(), dtype=str),
+    }
+    scalars = {}
+    for key, value in engine.integrator.state().items():
+        if value is None or np.isscalar(value):
+            scalars[key] = value
+        else:
+            arrays[f'integrator.{key}'] = asnumpy(value)
+    return arrays, scalars
+
+
+def save_checkpoint(engine: SimulationEngine, path: str):
+    """
+    Writes the complete engine state to `path` atomically. The file is a JSON header followed
+    by the raw arrays at 64-byte aligned offsets, so they are written straight from the state
+    buffers and can be mapped back without parsing.
+    """
+    arrays, scalars = _engine_arrays(engine)
+    meta = {
+        'version': CHECKPOINT_VERSION, 'et': engine.et, 'n_active': engine.n_active,
+        'probe_count': engine.probe_count, 'kinds': engine.kinds,
+        'integrator': engine.integrator_name, 'tolerance': getattr(engine.integrator, 'tolerance', None),
+        'solver': engine.solver_name, 'solver_options': engine.solver_options,
+        'integrator_state': scalars, 'arrays': {},
+    }
+    # Block offsets are relative to the end of the header, which is padded to ALIGN.
+    offset = 0
+    for key, arr in arrays.items():
+        arr = arrays[key] = np.ascontiguousarray(arr)
+        meta['arrays'][key] = {'dtype': arr.dtype.str, 'shape': arr.shape, 'offset': offset}
+        offset += arr.nbytes + _pad(arr.nbytes)
+    header = json.dumps(meta).encode()
+    prefix = len(CHECKPOINT_MAGIC) + 8
+    header += b" " * _pad(prefix + len(header))
+
+    def write(f):
+        f.write(CHECKPOINT_MAGIC)
+        f.write(len(header).to_bytes(8, 'little'))
+        f.write(header)
+        for arr in arrays.values():
+            arr.tofile(f)
+            f.write(b"\0" * _pad(arr.nbytes))
+    atomic_write(path, write)
+
+
+def read_checkpoint(path: str):
+    """(meta, arrays) of a checkpoint; arrays are read-only views of the memory-mapped file."""
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    if bytes(data[:len(CHECKPOINT_MAGIC)]) != CHECKPOINT_MAGIC:
+        raise ValueError(f"{path} is not a checkpoint")
+    start = len(CHECKPOINT_MAGIC) + 8
+    length = int.from_bytes(bytes(data[len(CHECKPOINT_MAGIC):start]), 'little')
+    meta = json.loads(bytes(data[start:start + length]))
+    if meta['version'] != CHECKPOINT_VERSION:
+        raise ValueError(f"Checkpoint version {meta['version']} is not supported (expected {CHECKPOINT_VERSION})")
+    base, arrays = start + length, {}
+    for key, spec in meta['arrays'].items():
+        dtype, shape = np.dtype(spec['dtype']), tuple(spec['shape'])
+        first = base + spec['offset']
+        arrays[key] = data[first:first + dtype.itemsize * int(np.prod(shape))].view(dtype).reshape(shape)
+    return meta, arrays
+
+
+def load_checkpoint(path: str, backend: str = None) -> SimulationEngine:
+    """Rebuilds an engine from a checkpoint; stepping it continues exactly where the saved one stopped."""
+    meta, arrays = read_checkpoint(path)
+    engine = SimulationEngine([], meta['et'], backend=backend, integrator=meta['integrator'],
+                              tolerance=meta['tolerance'], solver=meta['solver'],
+                              solver_options=meta['solver_options'])
+    # Copies, so that the engine keeps no view of the read-only mapping and the file can be replaced.
+    names, n_active = np.array(arrays['names']), meta['n_active']
+    masses = engine.xp.array(arrays['masses'], copy=True)
+    engine._set_rows(arrays['positions'], arrays['velocities'], masses, names[:n_active],
+                     names[n_active:], meta['kinds'], arrays['kinds'])
+    state = dict(meta['integrator_state'])
+    for key, arr in arrays.items():
+        if key.startswith('integrator.'):
+            state[key.split('.', 1)[1]] = engine.xp.array(arr)
+    engine.integrator.load_state(state)
+    engine.probe_count = meta['probe_count']
+    return engine
+
+
+def engine_bodies(engine: SimulationEngine) -> list:
+    """Body objects for the engine's rows (passive rows become probes), e.g. for the viewer."""
+    positions, velocities = engine.get_positions(), engine.get_velocities()
+    masses = asnumpy(engine.masses)
+    bodies = []
+    for row, (name, (body_type, parent)) in enumerate(zip(engine.body_names(), engine.body_kinds())):
+        if row < engine.n_active:
+            bodies.append(Body(mass=float(masses[row]), position=positions[row], velocity=velocities[row],
+                               name=name, body_type=body_type, parent=parent))
+        else:
+            bodies.append(Probe(position=positions[row], velocity=velocities[row], name=name, parent=parent))
+    return bodies
+
+
+class AutoCheckpoint:
+    """Saves the engine to `path` every `every` steps; call update(engine, steps) after stepping."""
+    def __init__(self, path: str, every: int):
+        self.path = path
+        self.every = every
+        self.steps = 0
+        self.saved = 0
+        self._next = every
+
+    def update(self, engine: SimulationEngine, steps: int = 1):
+        self.steps += steps
+        if self.steps >= self._next:
+            save_checkpoint(engine, self.path)
+            self.saved += 1
+            self._next = self.steps + self.every
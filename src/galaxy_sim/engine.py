@@ -1,44 +1,317 @@
 # engine.py
 
-import cupy as cp
-from .gravity import update_accelerations_gpu, Body
+import time
+import numpy as np
+from .backend import get_backend, backend_name, to_host, asnumpy, synchronize
+from .gravity import GravityField, Body
+from .integrators import make_integrator
+from .solvers import make_solver, make_field_solver
+from .rings import RingSystem
+from .instrument import PROFILER
 
 class SimulationEngine:
-    def __init__(self, bodies: list, initial_et: float):
+    """
+    Integrates active bodies, which produce and feel gravity, and passive probes, which only
+    feel it, in one growable state buffer with the active rows first.
+    """
+    PASSIVE_INITIAL_CAPACITY = 64
+
+    def __init__(self, bodies: list, initial_et: float, backend: str = None, integrator: str = 'leapfrog',
+                 tolerance: float = None, solver: str = 'direct', solver_options: dict = None):
         self.et = initial_et
+        self.xp = get_backend(backend)
+        self.backend_name = backend_name(self.xp)
+        self.integrator_name = integrator
+        self.integrator = make_integrator(integrator, tolerance)
+        self.solver_name = solver
+        self.solver_options = dict(solver_options or {})
+        self.solver = make_solver(solver, **self.solver_options)
+        self.field_solver = make_field_solver(solver)
+        self.last_dts = []
+        self.probe_count = 0
+        self.rings = []
         self._set_state_from_bodies(bodies)
 
     def _set_state_from_bodies(self, bodies: list):
-        if not bodies:
-            self.positions = cp.array([]); self.velocities = cp.array([]); self.masses = cp.array([])
-            return
-        self.positions = cp.array([b.position for b in bodies], dtype=cp.float64)
-        self.velocities = cp.array([b.velocity for b in bodies], dtype=cp.float64)
-        self.masses = cp.array([b.mass for b in bodies], dtype=cp.float64)
+        self._passive_names = []
+        self._passive_index = {}
+        self.kinds, self._kind_codes = [], {}
+        self._x = self.xp.zeros((0, 3)); self._v = self.xp.zeros((0, 3))
+        self._kinds = np.zeros(0, dtype=np.int32)
+        self.n_active = 0
+        self._set_active_state([b for b in bodies if not b.passive])
+        for b in bodies:
+            if b.passive: self._add_passive(b)
+
+    def _set_active_state(self, active_bodies: list):
+        """Rebuilds the active rows, carrying the passive rows over unchanged."""
+        xp = self.xp
+        passive_pos, passive_vel = self.passive_positions, self.passive_velocities
+        passive_kinds = self._kinds[self.n_active:self.n_bodies]
+        n_active = len(active_bodies)
+        capacity = max(self.PASSIVE_INITIAL_CAPACITY, self.n_passive)
+        x = xp.zeros((n_active + capacity, 3)); v = xp.zeros((n_active + capacity, 3))
+        kinds = np.zeros(n_active + capacity, dtype=np.int32)
+        if active_bodies:
+            x[:n_active] = xp.array([b.position for b in active_bodies], dtype=xp.float64)
+            v[:n_active] = xp.array([b.velocity for b in active_bodies], dtype=xp.float64)
+            kinds[:n_active] = [self._kind(b) for b in active_bodies]
+        x[n_active:n_active + self.n_passive] = passive_pos
+        v[n_active:n_active + self.n_passive] = passive_vel
+        kinds[n_active:n_active + self.n_passive] = passive_kinds
+        self._x, self._v, self._kinds = x, v, kinds
+        self.n_active = n_active
+        self._active_names = [b.name for b in active_bodies]
+        self._active_index = None
+        self.masses = xp.array([b.mass for b in active_bodies], dtype=xp.float64)
+        self.field = GravityField(self.masses, n_active, self.solver, self.field_solver)
+        self._state_changed()
+
+    def _set_rows(self, x, v, masses, active_names, passive_names, kinds: list, kind_rows):
+        """
+        Replaces every row from arrays in row order (active first), as when restoring a
+        checkpoint. Names may be string arrays; they become lists only when first needed.
+        """
+        xp = self.xp
+        n_active, n_bodies = len(active_names), len(active_names) + len(passive_names)
+        capacity = n_active + max(self.PASSIVE_INITIAL_CAPACITY, n_bodies - n_active)
+        self._x = xp.zeros((capacity, 3)); self._v = xp.zeros((capacity, 3))
+        self._x[:n_bodies] = xp.asarray(x); self._v[:n_bodies] = xp.asarray(v)
+        self._kinds = np.zeros(capacity, dtype=np.int32)
+        self._kinds[:n_bodies] = kind_rows
+        self.kinds = [tuple(k) for k in kinds]
+        self._kind_codes = {k: i for i, k in enumerate(self.kinds)}
+        self.n_active = n_active
+        self._active_names, self._passive_names = active_names, passive_names
+        self._active_index = self._passive_index = None
+        self.masses = xp.asarray(masses, dtype=xp.float64)
+        self.field = GravityField(self.masses, n_active, self.solver, self.field_solver)
+        self._state_changed()
+
+    def _kind(self, body: Body) -> int:
+        key = (body.body_type, body.parent)
+        if key not in self._kind_codes:
+            self._kind_codes[key] = len(self.kinds)
+            self.kinds.append(key)
+        return self._kind_codes[key]
+
+    @property
+    def active_names(self) -> list:
+        if not isinstance(self._active_names, list):
+            self._active_names = self._active_names.tolist()
+        return self._active_names
+
+    @property
+    def passive_names(self) -> list:
+        if not isinstance(self._passive_names, list):
+            self._passive_names = self._passive_names.tolist()
+        return self._passive_names
+
+    @property
+    def _active_slots(self) -> dict:
+        """Name -> active row; built on first use, since a restored engine only has the names."""
+        if self._active_index is None:
+            self._active_index = {name: i for i, name in enumerate(self.active_names)}
+        return self._active_index
+
+    @property
+    def _passive_slots(self) -> dict:
+        if self._passive_index is None:
+            self._passive_index = {name: i for i, name in enumerate(self.passive_names)}
+        return self._passive_index
+
+    def _state_changed(self):
+        self.integrator.reset()
+        if getattr(self.integrator, 'subsystems', False):
+            self.field.groups = self.subsystem_rows()
+
+    def subsystem_rows(self) -> np.ndarray:
+        """Root row of every active row's subsystem: a moon's parent body, otherwise the row itself."""
+        slots = self._active_slots
+        parents = [self.kinds[k][1] for k in self._kinds[:self.n_active].tolist()]
+        return np.array([slots.get(parent, row) for row, parent in enumerate(parents)], dtype=int)
+
+    @property
+    def n_passive(self) -> int:
+        return len(self._passive_names)
+
+    @property
+    def n_bodies(self) -> int:
+        return self.n_active + self.n_passive
+
+    @property
+    def positions(self):
+        return self._x[:self.n_active]
+
+    @property
+    def velocities(self):
+        return self._v[:self.n_active]
+
+    @property
+    def passive_positions(self):
+        return self._x[self.n_active:self.n_bodies]
+
+    @property
+    def passive_velocities(self):
+        return self._v[self.n_active:self.n_bodies]
+
+    def _add_passive(self, body: Body):
+        row = self.n_bodies
+        if row == self._x.shape[0]:
+            for attr in ('_x', '_v'):
+                grown = self.xp.zeros((2 * row, 3))
+                grown[:row] = getattr(self, attr)
+                setattr(self, attr, grown)
+            self._kinds = np.concatenate([self._kinds, np.zeros(row, dtype=np.int32)])
+        self._x[row] = self.xp.asarray(body.position)
+        self._v[row] = self.xp.asarray(body.velocity)
+        self._kinds[row] = self._kind(body)
+        self._passive_slots[body.name] = self.n_passive
+        self.passive_names.append(body.name)
+        self._state_changed()
 
     def add_body(self, body: Body, all_bodies: list):
         print(f"Adding {body.name} to the simulation engine.")
-        self._set_state_from_bodies(all_bodies)
+        if body.passive:
+            self._add_passive(body)
+        else:
+            self._set_active_state([b for b in all_bodies if not b.passive])
+
+    def remove_body(self, name: str, all_bodies: list = None):
+        """
+        Removes a body; passive bodies are swapped with the last slot in O(1). Removing an
+        active body rebuilds the active state, so it needs the caller's `all_bodies`.
+        """
+        if name in self._passive_slots:
+            slot = self._passive_slots.pop(name)
+            last = self.n_passive - 1
+            if slot != last:
+                moved = self.passive_names[last]
+                self._x[self.n_active + slot] = self._x[self.n_active + last]
+                self._v[self.n_active + slot] = self._v[self.n_active + last]
+                self._kinds[self.n_active + slot] = self._kinds[self.n_active + last]
+                self.passive_names[slot] = moved
+                self._passive_slots[moved] = slot
+            self.passive_names.pop()
+            self._state_changed()
+        elif name in self._active_slots:
+            if all_bodies is None:
+                raise ValueError(f"Removing the active body {name!r} needs all_bodies")
+            self._set_active_state([b for b in all_bodies if not b.passive and b.name != name])
+        else:
+            raise KeyError(f"No body named {name!r} in the simulation")
+
+    def add_ring(self, ring, count: int = None, **options) -> RingSystem:
+        """
+        Fills a gravity.Ring about an active body with `count` massless particles (RingSystem
+        options pass through). Rings advance with the engine but are not part of its state
+        buffer, checkpoints or body_names().
+        """
+        row = self._active_slots.get(ring.body_name)
+        if row is None:
+            raise ValueError(f"Ring parent {ring.body_name!r} is not an active body")
+        if count is not None: options['count'] = count
+        system = RingSystem(ring, float(self.masses[row]), xp=self.xp, **options)
+        self.rings.append(system)
+        return system
+
+    def _advance_rings(self, duration: float):
+        """Advances every ring from the bodies' current state; called before they are stepped."""
+        if not self.rings: return
+        with PROFILER.timer('rings'):
+            for system in self.rings:
+                row = self._active_slots.get(system.parent)
+                if row is None: continue
+                system.advance(duration, self.positions, self.velocities, self.masses, row)
+            PROFILER.count('ring_particles', sum(system.count for system in self.rings))
+
+    def get_ring_positions(self, out=None):
+        """Host copy of every ring particle's position relative to its parent, rings in the order added."""
+        rows = self.xp.concatenate([system.positions for system in self.rings]) if self.rings else self.xp.zeros((0, 3))
+        return self._transfer(rows, out)
 
     def step(self, dt: float):
-        if self.positions.shape[0] == 0: return
+        if self.n_bodies == 0: return
+        self._advance_rings(dt)
+        x, v = self._x[:self.n_bodies], self._v[:self.n_bodies]
+        with PROFILER.timer('step'):
+            self.integrator.step(x, v, self.et, dt, self.field)
+        PROFILER.count('steps')
+        self.last_dts = self.integrator.last_dts
         self.et += dt
-        a_old = update_accelerations_gpu(self.positions, self.masses)
-        self.positions += self.velocities * dt + 0.5 * a_old * dt**2
-        a_new = update_accelerations_gpu(self.positions, self.masses)
-        self.velocities += 0.5 * (a_old + a_new) * dt
 
-    def get_positions(self):
-        return cp.asnumpy(self.positions)
+    def advance(self, dt: float, steps: int):
+        """`steps` steps of dt in one fused integrator call; the same motion as calling step() repeatedly."""
+        if self.n_bodies == 0 or steps <= 0: return
+        self._advance_rings(steps * dt)
+        x, v = self._x[:self.n_bodies], self._v[:self.n_bodies]
+        with PROFILER.timer('step'):
+            self.integrator.advance(x, v, self.et, dt, steps, self.field)
+        PROFILER.count('steps', steps)
+        self.last_dts = self.integrator.last_dts
+        self.et += steps * dt
+
+    def body_names(self) -> list:
+        """Names in the row order of get_positions()/get_velocities(): active bodies, then passive."""
+        return self.active_names + self.passive_names
+
+    def body_kinds(self) -> list:
+        """(body_type, parent) of every row, in body_names() order."""
+        return [self.kinds[k] for k in self._kinds[:self.n_bodies].tolist()]
+
+    def get_positions(self, out=None):
+        """Host copy of every row's position; written into `out` when given."""
+        return self._transfer(self._x[:self.n_bodies], out)
 
-    def get_velocities(self):
-        return cp.asnumpy(self.velocities)
+    def get_velocities(self, out=None):
+        return self._transfer(self._v[:self.n_bodies], out)
+
+    @staticmethod
+    def _transfer(rows, out):
+        with PROFILER.timer('transfer'):
+            PROFILER.count('transfer_bytes', rows.nbytes)
+            if out is None: return to_host(rows)
+            np.copyto(out, asnumpy(rows))
+            return out
 
     def update_body_objects(self, bodies: list):
-        if len(bodies) != self.positions.shape[0]: return
-        latest_positions = self.get_positions()
-        latest_velocities = self.get_velocities()
-        for i, body in enumerate(bodies):
-            if i < len(latest_positions):
-                body.position = latest_positions[i]
-                body.velocity = latest_velocities[i]
\ No newline at end of file
+        with PROFILER.timer('update_body_objects'):
+            positions, velocities = self.get_positions(), self.get_velocities()
+            for body in bodies:
+                if body.passive:
+                    slot = self._passive_slots.get(body.name)
+                    row = None if slot is None else self.n_active + slot
+                else:
+                    row = self._active_slots.get(body.name)
+                if row is None: continue
+                body.position = positions[row]
+                body.velocity = velocities[row]
+
+
+def measure_throughput(engine: SimulationEngine, dt: float, steps: int = 100) -> dict:
+    """Times `steps` engine steps and reports throughput in a backend-independent form."""
+    synchronize(engine.xp)
+    start = time.perf_counter()
+    for _ in range(steps):
+        engine.step(dt)
+    synchronize(engine.xp)
+    return throughput_report(engine, steps, time.perf_counter() - start)
+
+
+def throughput_report(engine: SimulationEngine, steps: int, wall_time: float) -> dict:
+    """The throughput report for `steps` engine steps that took `wall_time` seconds."""
+    n_bodies = engine.n_bodies
+    return {
+        'backend': engine.backend_name,
+        'bodies': n_bodies,
+        'steps': steps,
+        'wall_time_s': wall_time,
+        'steps_per_sec': steps / wall_time if wall_time > 0 else float('inf'),
+        'body_steps_per_sec': steps * n_bodies / wall_time if wall_time > 0 else float('inf'),
+    }
+
+
+def format_throughput(report: dict) -> str:
+    return (f"[{report['backend']}] {report['bodies']} bodies x {report['steps']} steps in "
+            f"{report['wall_time_s']:.3f} s | {report['steps_per_sec']:.1f} steps/s | "
+            f"{report['body_steps_per_sec']:.3e} body-steps/s")
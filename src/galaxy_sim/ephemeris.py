@@ -0,0 +1,182 @@
+# ephemeris.py
+
+import numpy as np
+from .backend import get_array_module, asnumpy
+from .gravity import EPSILON, GravityField, field_accelerations
+from .integrators import make_integrator
+
+EPHEMERIS_TOLERANCE = 1e3  # metres of interpolation error accepted when choosing sample steps
+EPHEMERIS_MAX_STEP = 86400.0
+EPHEMERIS_MIN_STEP = 60.0
+STEP_CHECKS = 16  # intervals spread over the window on which a trial sample step is verified
+WINDOW_SLACK = 1e-3  # seconds; absorbs round-off in epoch + i * dt at the window edges
+
+
+def _hermite_coefficients(x0, v0, x1, v1, h):
+    """(4, ..., 3) power-basis coefficients of the cubic Hermite interpolant on each interval."""
+    dx = x1 - x0
+    return np.stack([x0, h * v0, 3 * dx - h * (2 * v0 + v1), h * (v0 + v1) - 2 * dx])
+
+
+def _cubic(c, u, h):
+    """Position and velocity of power-basis cubics `c` at interval fraction u."""
+    pos = c[0] + u * (c[1] + u * (c[2] + u * c[3]))
+    vel = (c[1] + u * (2 * c[2] + 3 * u * c[3])) / h
+    return pos, vel
+
+
+class Ephemeris:
+    """Piecewise cubic Hermite interpolants of massive-body states, on a uniform grid per body."""
+    def __init__(self, names: list, masses, starts, steps, positions: list, velocities: list, xp=np):
+        if any(len(p) < 2 for p in positions):
+            raise ValueError("Every body needs at least two ephemeris samples")
+        counts = np.array([len(p) for p in positions])
+        self.xp = xp
+        self.names = list(names)
+        self._index = {name: i for i, name in enumerate(self.names)}
+        self.masses = xp.asarray(masses, dtype=xp.float64)
+        self._start = xp.asarray(starts, dtype=xp.float64)
+        self._step = xp.asarray(steps, dtype=xp.float64)
+        self._last = xp.asarray(counts - 2)
+        self._offset = xp.asarray(np.cumsum(counts) - counts)
+        x, v = np.concatenate(positions), np.concatenate(velocities)
+        # Row j holds the interval from sample j to j + 1; each body's last row is never used.
+        h = np.repeat(steps, counts)[:, np.newaxis]
+        self._coeffs = xp.asarray(_hermite_coefficients(x, v, np.roll(x, -1, axis=0), np.roll(v, -1, axis=0), h))
+        self._rows = xp.arange(len(self.names))
+        self.start = float(np.max(starts))
+        self.end = float(np.min(np.asarray(starts) + np.asarray(steps) * (counts - 1)))
+        self._cached_t, self._cached_x = None, None
+
+    def index(self, name: str) -> int:
+        return self._index[name]
+
+    def covers(self, t_start: float, t_end: float) -> bool:
+        return self.start <= t_start and t_end <= self.end
+
+    def _locate(self, rows, t_min, t_max, t):
+        """Sample rows and interval fractions for bodies `rows` at times `t`."""
+        xp = self.xp
+        if t_min < self.start - WINDOW_SLACK or t_max > self.end + WINDOW_SLACK:
+            raise ValueError(f"Time outside the ephemeris window [{self.start}, {self.end}]")
+        h = self._step[rows]
+        s = (t - self._start[rows]) / h
+        k = xp.clip(xp.floor(s).astype(xp.int64), 0, self._last[rows])
+        r = self._offset[rows] + k
+        return r, (s - k)[:, xp.newaxis], h[:, xp.newaxis]
+
+    def _evaluate(self, rows, t_min, t_max, t):
+        r, u, h = self._locate(rows, t_min, t_max, t)
+        return _cubic(self._coeffs[:, r], u, h)
+
+    def state(self, t: float):
+        """(N, 3) positions and velocities of every body at time t."""
+        return self._evaluate(self._rows, t, t, t)
+
+    def positions(self, t: float):
+        """(N, 3) positions of every body at time t; the last result is reused for repeated t."""
+        if t != self._cached_t:
+            r, u, _ = self._locate(self._rows, t, t, t)
+            c = self._coeffs[:, r]
+            self._cached_x = c[0] + u * (c[1] + u * (c[2] + u * c[3]))
+            self._cached_t = t
+        return self._cached_x
+
+    def track(self, name: str, times):
+        """(T, 3) positions and velocities of one body at each of `times`."""
+        times = self.xp.asarray(times, dtype=self.xp.float64)
+        rows = self.xp.full(times.shape[0], self.index(name))
+        return self._evaluate(rows, float(times.min()), float(times.max()), times)
+
+    @classmethod
+    def sample(cls, names: list, masses, state_fn, t_start: float, t_end: float,
+               tolerance: float = EPHEMERIS_TOLERANCE, max_step: float = EPHEMERIS_MAX_STEP,
+               min_step: float = EPHEMERIS_MIN_STEP, xp=np, progress=None):
+        """
+        Builds an ephemeris from `state_fn(name, times) -> (T, 6)` states (e.g. SPICE). Each
+        body's step is halved from `max_step` until the interpolant's midpoint error on a
+        spread of trial intervals is within `tolerance` metres, then the window is sampled once.
+        `progress(fraction)`, if given, is called after each body.
+        """
+        span = t_end - t_start
+        starts, steps, positions, velocities = [], [], [], []
+        for done, name in enumerate(names):
+            intervals = max(1, int(np.ceil(span / max_step)))
+            while True:
+                h = span / intervals
+                if h <= min_step or cls._step_error(state_fn, name, t_start, h, intervals) <= tolerance:
+                    break
+                intervals *= 2
+            states = np.asarray(state_fn(name, t_start + h * np.arange(intervals + 1)), dtype=np.float64)
+            starts.append(t_start); steps.append(h)
+            positions.append(states[:, :3]); velocities.append(states[:, 3:])
+            if progress is not None: progress((done + 1) / len(names))
+        return cls(names, masses, starts, steps, positions, velocities, xp)
+
+    @staticmethod
+    def _step_error(state_fn, name, t_start, h, intervals):
+        k = np.unique(np.linspace(0, intervals - 1, min(STEP_CHECKS, intervals)).astype(int))
+        t0 = t_start + h * k
+        s0, s1, mid = (np.asarray(state_fn(name, t), dtype=np.float64) for t in (t0, t0 + h, t0 + h / 2))
+        pos, _ = _cubic(_hermite_coefficients(s0[:, :3], s0[:, 3:], s1[:, :3], s1[:, 3:], h), 0.5, h)
+        return float(np.linalg.norm(pos - mid[:, :3], axis=1).max())
+
+    @classmethod
+    def from_bodies(cls, bodies: list, dt: float, num_steps: int, t_start: float = 0.0,
+                    integrator: str = 'leapfrog', xp=np):
+        """
+        Samples the N-body motion of `bodies` every `dt` for `num_steps` steps. The samples are
+        exactly the states an integrated prediction with the same integrator and dt visits.
+        """
+        x = xp.array([b.position for b in bodies], dtype=xp.float64)
+        v = xp.array([b.velocity for b in bodies], dtype=xp.float64)
+        masses = xp.array([b.mass for b in bodies], dtype=xp.float64)
+        field, scheme = GravityField(masses), make_integrator(integrator)
+        positions, velocities = np.empty((num_steps + 1, len(bodies), 3)), np.empty((num_steps + 1, len(bodies), 3))
+        positions[0], velocities[0] = asnumpy(x), asnumpy(v)
+        for i in range(num_steps):
+            scheme.step(x, v, i * dt, dt, field)
+            positions[i + 1], velocities[i + 1] = asnumpy(x), asnumpy(v)
+        n = len(bodies)
+        return cls([b.name for b in bodies], masses, [t_start] * n, [dt] * n,
+                   list(positions.transpose(1, 0, 2)), list(velocities.transpose(1, 0, 2)), xp)
+
+
+class EphemerisField:
+    """
+    Acceleration model for massless rows moving through massive bodies on rails: the bodies'
+    positions come from an ephemeris instead of being integrated. Field time t is measured
+    in seconds from `epoch`, matching the time integrators pass to a GravityField.
+    """
+    n_active = 0
+
+    def __init__(self, ephemeris: Ephemeris, epoch: float = None, field_solver=field_accelerations):
+        self.ephemeris = ephemeris
+        self.epoch = ephemeris.start if epoch is None else epoch
+        self.masses = ephemeris.masses
+        self.field_solver = field_solver
+
+    def body_positions(self, positions, t: float = 0.0):
+        return self.ephemeris.positions(self.epoch + t)
+
+    def body_states(self, positions, velocities, t: float = 0.0):
+        return self.ephemeris.state(self.epoch + t)
+
+    def __call__(self, positions, t: float = 0.0, out=None):
+        accels = self.field_solver(positions, self.body_positions(positions, t), self.masses)
+        if out is None:
+            return accels
+        out[:] = accels
+        return out
+
+    def encounter_time(self, positions, velocities, t: float = 0.0) -> float:
+        """Shortest distance / closing speed between any row and a body on rails."""
+        xp = get_array_module(positions)
+        if positions.shape[0] == 0:
+            return float('inf')
+        body_x, body_v = self.ephemeris.state(self.epoch + t)
+        r = positions[:, xp.newaxis, :] - body_x[xp.newaxis]
+        v = velocities[:, xp.newaxis, :] - body_v[xp.newaxis]
+        dist = xp.sqrt(xp.einsum('ijk,ijk->ij', r, r))
+        speed = xp.sqrt(xp.einsum('ijk,ijk->ij', v, v)) + EPSILON
+        return float((dist / speed).min())
@@ -0,0 +1,196 @@
+# events.py
+
+import abc
+import numpy as np
+from .backend import get_array_module, asnumpy
+from .ephemeris import _cubic
+
+EVENT_ITERATIONS = 40  # bisection steps; events are located to ~1e-12 of a step
+
+
+def soi_radius(semi_major_axis: float, mass: float, primary_mass: float) -> float:
+    """Laplace sphere-of-influence radius a (m / M)^(2/5) of a body orbiting a primary."""
+    return semi_major_axis * (mass / primary_mass) ** 0.4
+
+
+class StepInterval:
+    """
+    One propagation step from t0 to t1. `start` and `end` are (probe_x, probe_v, body_x, body_v)
+    snapshots; motion relative to a body is the cubic Hermite through both end states, so
+    events are located to the accuracy of the integration rather than to the step size.
+    """
+    def __init__(self, t0: float, t1: float, start: tuple, end: tuple):
+        self.t0, self.t1, self.h = t0, t1, t1 - t0
+        self.start, self.end = start, end
+        self.xp = get_array_module(start[0])
+
+    def relative(self, body_idx):
+        """(4, K, 3) power-basis cubics of the probes' offsets from body `body_idx` (None: the origin)."""
+        (x0, v0, bx0, bv0), (x1, v1, bx1, bv1) = self.start, self.end
+        if body_idx is not None:
+            x0, v0, x1, v1 = x0 - bx0[body_idx], v0 - bv0[body_idx], x1 - bx1[body_idx], v1 - bv1[body_idx]
+        dx, h = x1 - x0, self.h
+        return self.xp.stack([x0, h * v0, 3 * dx - h * (2 * v0 + v1), h * (v0 + v1) - 2 * dx])
+
+    def distance_sq(self, c, u):
+        pos, _ = _cubic(c, u[:, self.xp.newaxis], self.h)
+        return (pos * pos).sum(axis=-1)
+
+    def radial_rate(self, c, u):
+        """r · dr/dt, negative while approaching and positive while receding."""
+        pos, vel = _cubic(c, u[:, self.xp.newaxis], self.h)
+        return (pos * vel).sum(axis=-1)
+
+    def bisect(self, f, lo, hi):
+        """Per-row crossing of f between fractions lo and hi, where f changes sign; returns the far side."""
+        xp = self.xp
+        side = f(lo) > 0
+        for _ in range(EVENT_ITERATIONS):
+            mid = 0.5 * (lo + hi)
+            same = (f(mid) > 0) == side
+            lo, hi = xp.where(same, mid, lo), xp.where(same, hi, mid)
+        return hi
+
+    def closest(self, c):
+        """Fraction of the step and squared distance at each row's closest point within the step."""
+        xp = self.xp
+        zeros, ones = xp.zeros(c.shape[1]), xp.ones(c.shape[1])
+        turning = (self.radial_rate(c, zeros) < 0) & (self.radial_rate(c, ones) > 0)
+        ends = xp.where(self.distance_sq(c, zeros) <= self.distance_sq(c, ones), zeros, ones)
+        u = xp.where(turning, self.bisect(lambda u: self.radial_rate(c, u), zeros, ones), ends)
+        return u, turning, self.distance_sq(c, u)
+
+    def inward(self, c, radius: float):
+        """Rows that cross inside `radius` during the step (even between samples), and when."""
+        xp = self.xp
+        zeros, ones = xp.zeros(c.shape[1]), xp.ones(c.shape[1])
+        f = lambda u: self.distance_sq(c, u) - radius ** 2
+        u_min, _, d2 = self.closest(c)
+        outside_end = f(ones) > 0
+        crossed = (f(zeros) > 0) & (~outside_end | (d2 <= radius ** 2))
+        return crossed, self.bisect(f, zeros, xp.where(outside_end, u_min, ones))
+
+    def outward(self, c, radius: float):
+        """Rows that leave `radius` during the step, and when."""
+        xp = self.xp
+        zeros, ones = xp.zeros(c.shape[1]), xp.ones(c.shape[1])
+        f = lambda u: self.distance_sq(c, u) - radius ** 2
+        return (f(zeros) <= 0) & (f(ones) > 0), self.bisect(f, zeros, ones)
+
+
+class Event(abc.ABC):
+    """
+    Base class for conditions located inside propagation steps. check(step, active) returns a
+    (K,) mask of the active probes the event fired for; terminal events stop those probes.
+    `times` holds each probe's first firing time (nan if never) and `log` every firing as
+    (probe, time, kind), with times in field seconds like the propagator's t.
+    """
+    kind = None
+
+    def __init__(self, num_probes: int, body_idx: int = None, terminal: bool = False, xp=np):
+        self.body_idx = body_idx
+        self.terminal = terminal
+        self.times = xp.full(num_probes, xp.nan)
+        self.log = []
+
+    def _fire(self, step, fired, u, kind=None):
+        t = step.t0 + u * step.h
+        first = fired & step.xp.isnan(self.times)
+        self.times[first] = t[first]
+        rows = np.flatnonzero(asnumpy(fired))
+        self.log.extend((int(k), float(s), kind or self.kind) for k, s in zip(rows, asnumpy(t)[rows]))
+        return fired
+
+    @abc.abstractmethod
+    def check(self, step: StepInterval, active):
+        ...
+
+    def result(self):
+        return asnumpy(self.times)
+
+
+class Approach(Event):
+    """
+    Root-found closest approach to a body: tracks each probe's minimum distance and its time,
+    and fires at every local minimum. With `stop_distance` it only fires (and stops the probe)
+    at a closest approach within that distance, i.e. once the probe has met the body.
+    """
+    kind = 'approach'
+
+    def __init__(self, num_probes: int, body_idx: int, stop_distance: float = None, xp=np):
+        super().__init__(num_probes, body_idx, terminal=stop_distance is not None, xp=xp)
+        self.stop_distance = stop_distance
+        self.min_dist = xp.full(num_probes, xp.inf)
+        self.min_time = xp.full(num_probes, xp.nan)
+
+    def check(self, step, active):
+        xp = step.xp
+        u, turning, d2 = step.closest(step.relative(self.body_idx))
+        dist = xp.sqrt(d2)
+        closer = active & (dist < self.min_dist)
+        self.min_dist[closer] = dist[closer]
+        self.min_time[closer] = step.t0 + u[closer] * step.h
+        fired = active & turning
+        if self.stop_distance is not None:
+            fired &= dist <= self.stop_distance
+        return self._fire(step, fired, u)
+
+    def result(self):
+        return asnumpy(self.min_dist), asnumpy(self.min_time)
+
+
+class SphereOfInfluence(Event):
+    """Entries into and exits from a sphere of `radius` about a body, logged as 'entry' and 'exit'."""
+    def __init__(self, num_probes: int, body_idx: int, radius: float, terminal: bool = False, xp=np):
+        super().__init__(num_probes, body_idx, terminal, xp)
+        self.radius = radius
+
+    def check(self, step, active):
+        c = step.relative(self.body_idx)
+        entered, u_in = step.inward(c, self.radius)
+        exited, u_out = step.outward(c, self.radius)
+        self._fire(step, active & entered, u_in, 'entry')
+        self._fire(step, active & exited, u_out, 'exit')
+        return active & (entered | exited)
+
+
+class Impact(Event):
+    """Surface impact: the probe passes within `radius` of the body's centre. Terminal by default."""
+    kind = 'impact'
+
+    def __init__(self, num_probes: int, body_idx: int, radius: float, terminal: bool = True, xp=np):
+        super().__init__(num_probes, body_idx, terminal, xp)
+        self.radius = radius
+
+    def check(self, step, active):
+        crossed, u = step.inward(step.relative(self.body_idx), self.radius)
+        return self._fire(step, active & crossed, u)
+
+
+class Escape(Event):
+    """
+    Probe beyond `radius` of a centre body (None: the origin). With the centre's `mu` it must
+    also be unbound and receding from it, so that it can never come back. Fires once per
+    probe, at the radius crossing when that falls in the step. Terminal by default.
+    """
+    kind = 'escape'
+
+    def __init__(self, num_probes: int, radius: float, center_idx: int = None, mu: float = None,
+                 terminal: bool = True, xp=np):
+        super().__init__(num_probes, center_idx, terminal, xp)
+        self.radius = radius
+        self.mu = mu
+
+    def check(self, step, active):
+        xp = step.xp
+        c = step.relative(self.body_idx)
+        crossed, u = step.outward(c, self.radius)
+        ones = xp.ones(c.shape[1])
+        r_sq = step.distance_sq(c, ones)
+        gone = r_sq > self.radius ** 2
+        if self.mu is not None:
+            pos, vel = _cubic(c, 1.0, step.h)
+            energy = 0.5 * (vel * vel).sum(axis=-1) - self.mu / xp.sqrt(r_sq)
+            gone &= (energy >= 0) & ((pos * vel).sum(axis=-1) > 0)
+        fired = active & gone & xp.isnan(self.times)
+        return self._fire(step, fired, xp.where(crossed, u, ones))
@@ -1,13 +1,15 @@
 # gravity.py
 
 import numpy as np
-import cupy as cp
 from typing import List
+from .backend import get_array_module, asnumpy
 
 G = 6.67430e-11
 EPSILON = 1e-8
 
 class Body:
+    passive = False
+
     def __init__(self, mass: float, position: List[float], velocity: List[float] = None,
                  name: str = None, body_type: str = None, parent: str = None):
         assert mass > 0, f"Mass must be positive, got {mass}"
@@ -35,6 +37,8 @@ class Body:
 
 class Probe(Body):
     """A specialized Body with very low mass to act as a spacecraft."""
+    passive = True  # feels gravity but is treated as massless by the engine
+
     def __init__(self, **kwargs):
         super().__init__(mass=1.0, body_type='probe', **kwargs)
 
@@ -46,23 +50,152 @@ class Probe(Body):
                 f"Speed: {speed_kms:.2f} km/s{parent_str}")
 
 class Ring:
-    """A visual representation of a planetary ring system."""
-    def __init__(self, body_name, inner_radius, outer_radius, color):
+    """A planetary ring system: the annulus, in metres from the parent body, that rings.RingSystem fills with particles."""
+    def __init__(self, body_name, inner_radius, outer_radius, color, normal=(0.0, 0.0, 1.0)):
         self.body_name = body_name
         self.inner_radius = inner_radius
         self.outer_radius = outer_radius
         self.color = color
+        self.normal = np.array(normal, dtype=np.float64)  # pole of the ring plane
 
 def update_accelerations_gpu(positions, masses):
-    N = positions.shape[0]
-    positions_cp = cp.array(positions, dtype=cp.float64)
-    masses_cp = cp.array(masses, dtype=cp.float64)
-    r_i = positions_cp[:, cp.newaxis, :]
-    r_j = positions_cp[cp.newaxis, :, :]
-    r_ij = r_j - r_i
-    distances = cp.linalg.norm(r_ij, axis=2) + EPSILON
-    mask = ~cp.eye(N, dtype=bool)
-    inv_dist3 = cp.where(mask, 1.0 / distances**3, 0.0)
-    masses_j = masses_cp[np.newaxis, :, np.newaxis]
-    accels = G * cp.sum(r_ij * inv_dist3[:, :, np.newaxis] * masses_j, axis=1)
-    return accels
\ No newline at end of file
+    """Direct-sum accelerations, computed on the backend that `positions` already lives on."""
+    xp = get_array_module(positions)
+    positions_xp = xp.asarray(positions, dtype=xp.float64)
+    masses_xp = xp.asarray(masses, dtype=xp.float64)
+    r_ij = positions_xp[xp.newaxis, :, :] - positions_xp[:, xp.newaxis, :]
+    distances = xp.sqrt(xp.einsum('ijk,ijk->ij', r_ij, r_ij)) + EPSILON
+    xp.fill_diagonal(distances, xp.inf)
+    weights = (G * masses_xp) / (distances * distances * distances)
+    accels = (weights[:, xp.newaxis, :] @ r_ij)[:, 0, :]
+    return accels
+
+
+def field_accelerations(points, positions, masses):
+    """Accelerations at massless points (K, 3) due to massive bodies (N, 3); the points exert no force."""
+    xp = get_array_module(points)
+    r_kj = positions[xp.newaxis, :, :] - points[:, xp.newaxis, :]
+    distances = xp.sqrt(xp.einsum('kjd,kjd->kj', r_kj, r_kj)) + EPSILON
+    weights = (G * masses) / (distances * distances * distances)
+    return (weights[:, xp.newaxis, :] @ r_kj)[:, 0, :]
+
+
+ENERGY_CHUNK_PAIRS = 1 << 22  # pair distances held at once by total_energy
+
+
+def total_energy(positions, velocities, masses) -> float:
+    """
+    Kinetic plus pairwise potential energy of the massive bodies (the first len(masses) rows).
+    The potential is summed over row chunks, so memory stays bounded at any N.
+    """
+    xp = get_array_module(positions)
+    n = masses.shape[0]
+    x, v = positions[:n], velocities[:n]
+    kinetic = 0.5 * xp.sum(masses * xp.einsum('ij,ij->i', v, v))
+    potential = 0.0
+    chunk = max(1, ENERGY_CHUNK_PAIRS // max(n, 1))
+    for start in range(0, n, chunk):
+        rows = slice(start, min(start + chunk, n))
+        r = x[xp.newaxis, :, :] - x[rows, xp.newaxis, :]
+        distances = xp.sqrt(xp.einsum('ijk,ijk->ij', r, r))
+        distances[xp.arange(distances.shape[0]), xp.arange(rows.start, rows.stop)] = xp.inf
+        potential -= 0.5 * G * float(xp.sum(masses[rows, xp.newaxis] * masses[xp.newaxis, :] / distances))
+    return float(kinetic) + potential
+
+
+def angular_momentum(positions, velocities, masses) -> np.ndarray:
+    """Total angular momentum vector of the massive bodies (the first len(masses) rows)."""
+    xp = get_array_module(positions)
+    n = masses.shape[0]
+    momentum = xp.sum(masses[:, xp.newaxis] * xp.cross(positions[:n], velocities[:n]), axis=0)
+    return asnumpy(momentum)
+
+
+def dynamical_times(positions, masses) -> np.ndarray:
+    """
+    Local dynamical time of every row, min over massive bodies j of sqrt(r^3 / G(m_i + m_j)):
+    an orbit about the body that dominates its motion takes 2 pi times this. The massive
+    bodies are the first len(masses) rows; the rest count as massless. Summed over row chunks.
+    """
+    xp = get_array_module(positions)
+    n_active = masses.shape[0]
+    row_masses = xp.zeros(positions.shape[0])
+    row_masses[:n_active] = masses
+    times = xp.full(positions.shape[0], xp.inf)
+    if n_active == 0:
+        return asnumpy(times)
+    sources = positions[:n_active]
+    chunk = max(1, ENERGY_CHUNK_PAIRS // n_active)
+    for start in range(0, positions.shape[0], chunk):
+        rows = slice(start, min(start + chunk, positions.shape[0]))
+        r = sources[xp.newaxis, :, :] - positions[rows, xp.newaxis, :]
+        r_cubed = xp.einsum('ijk,ijk->ij', r, r) ** 1.5
+        r_cubed[r_cubed == 0] = xp.inf  # a body and itself
+        mu = G * (row_masses[rows, xp.newaxis] + masses[xp.newaxis, :])
+        times[rows] = xp.sqrt(r_cubed / mu).min(axis=1)
+    return asnumpy(times)
+
+
+def update_accelerations_tiered(positions, masses, n_active: int, out=None, solver=update_accelerations_gpu,
+                                field_solver=field_accelerations):
+    """
+    Accelerations for a state whose first `n_active` rows are massive bodies with `masses`
+    and whose remaining rows are massless particles that feel gravity but do not produce it.
+    `solver` computes the massive-body part with the (positions, masses) -> accels signature,
+    `field_solver` the massless part with the signature of field_accelerations.
+    """
+    xp = get_array_module(positions)
+    if out is None:
+        out = xp.empty_like(positions)
+    if n_active == 0:
+        out[:] = 0.0
+        return out
+    active = positions[:n_active]
+    out[:n_active] = solver(active, masses)
+    if positions.shape[0] > n_active:
+        out[n_active:] = field_solver(positions[n_active:], active, masses)
+    return out
+
+
+class GravityField:
+    """
+    Acceleration model for a tiered state: rows [:n_active] are massive bodies with `masses`,
+    the remaining rows are massless particles. Integrators evaluate it as field(positions, t).
+    """
+    def __init__(self, masses, n_active: int = None, solver=update_accelerations_gpu,
+                 field_solver=field_accelerations):
+        self.masses = masses
+        self.n_active = masses.shape[0] if n_active is None else n_active
+        self.solver = solver
+        self.field_solver = field_solver
+        self.groups = None  # massive row -> row of its subsystem's root (a moon's parent), when known
+
+    def __call__(self, positions, t: float = 0.0, out=None):
+        return update_accelerations_tiered(positions, self.masses, self.n_active, out, self.solver,
+                                           self.field_solver)
+
+    def row_accelerations(self, positions, rows, t: float = 0.0):
+        """Accelerations of only the given rows, due to every massive body (a row's own term vanishes)."""
+        return self.field_solver(positions[rows], positions[:self.n_active], self.masses)
+
+    def body_positions(self, positions, t: float = 0.0):
+        """Positions of the massive bodies in a state evaluated at time t."""
+        return positions[:self.n_active]
+
+    def body_states(self, positions, velocities, t: float = 0.0):
+        """Positions and velocities of the massive bodies in a state evaluated at time t."""
+        return positions[:self.n_active], velocities[:self.n_active]
+
+    def encounter_time(self, positions, velocities, t: float = 0.0) -> float:
+        """Shortest distance / closing speed between any row and a massive body."""
+        xp = get_array_module(positions)
+        n_active = self.n_active
+        if n_active == 0 or positions.shape[0] < 2:
+            return float('inf')
+        r = positions[:, xp.newaxis, :] - positions[xp.newaxis, :n_active, :]
+        v = velocities[:, xp.newaxis, :] - velocities[xp.newaxis, :n_active, :]
+        dist = xp.sqrt(xp.einsum('ijk,ijk->ij', r, r))
+        speed = xp.sqrt(xp.einsum('ijk,ijk->ij', v, v)) + EPSILON
+        times = dist / speed
+        xp.fill_diagonal(times[:n_active], xp.inf)
+        return float(times.min())
\ No newline at end of file
@@ -0,0 +1,204 @@
+# gravity_assist.py
+
+import os
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .gravity import G
+from .lambert import lambert
+
+PLANET_RADII = {'Mercury': 2.4397e6, 'Venus': 6.0518e6, 'Earth': 6.371e6, 'Mars': 3.3895e6, 'Jupiter': 6.9911e7,
+                'Saturn': 5.8232e7, 'Uranus': 2.5362e7, 'Neptune': 2.4622e7, 'Pluto': 1.1883e6}
+MIN_FLYBY_RADIUS = 1.1   # lowest allowed flyby periapsis, in planet radii
+FLYBY_ITERATIONS = 50
+LEG_BLOCK_BINS = 16      # departure bins solved together when a leg misses the memo
+LAUNCH_CHUNK_BINS = 8    # launch bins per pool task
+TOF_RANGE = (0.3, 2.0)   # leg flight times, as multiples of the Hohmann time between the two orbits
+
+
+def flyby_dv(v_in, v_out, mu: float, rp_min: float):
+    """
+    Δv of a powered flyby joining (..., 3) arrival and departure excess velocities with one burn
+    at periapsis. The periapsis that bends v_in onto v_out is bisected in log radius; turns that
+    would need a periapsis below `rp_min` are infeasible and cost inf.
+    """
+    vi2, vo2 = (v_in * v_in).sum(axis=-1), (v_out * v_out).sum(axis=-1)
+    turn = np.arccos(np.clip((v_in * v_out).sum(axis=-1) / np.sqrt(vi2 * vo2), -1.0, 1.0))
+    bend = lambda rp: np.arcsin(1 / (1 + rp * vi2 / mu)) + np.arcsin(1 / (1 + rp * vo2 / mu))
+    lo = np.full(turn.shape, np.log(max(rp_min, 1.0)))
+    hi = lo + np.log(1e6)
+    for _ in range(FLYBY_ITERATIONS):
+        mid = 0.5 * (lo + hi)
+        wide = bend(np.exp(mid)) > turn  # still bending too much: pass further out
+        lo, hi = np.where(wide, mid, lo), np.where(wide, hi, mid)
+    rp = np.exp(0.5 * (lo + hi))
+    dv = np.abs(np.sqrt(vo2 + 2 * mu / rp) - np.sqrt(vi2 + 2 * mu / rp))
+    return np.where(bend(rp_min) >= turn, dv, np.inf)
+
+
+def tabulate(ephemeris, names: list, start: float, end: float, bin_days: float = 10.0, center: str = 'Sun',
+             tof_samples: int = 16) -> dict:
+    """
+    Heliocentric states of `names` every `bin_days` over [start, end], with the planets' flyby
+    parameters and the flight times tried on each leg. The table is all a leg search needs,
+    so it is what gets shipped to worker processes instead of the ephemeris.
+    """
+    step = bin_days * 86400
+    times = start + step * np.arange(int((end - start) / step) + 1)
+    cx, cv = ephemeris.track(center, times)
+    tracks = [ephemeris.track(name, times) for name in names]
+    x = np.stack([np.asarray(p - cx) for p, _ in tracks])
+    v = np.stack([np.asarray(u - cv) for _, u in tracks])
+    mu = G * float(ephemeris.masses[ephemeris.index(center)])
+    radii = np.linalg.norm(x, axis=-1).mean(axis=1)
+    tof_bins = {}
+    for a in range(len(names)):
+        for b in range(len(names)):
+            hohmann = np.pi * np.sqrt(((radii[a] + radii[b]) / 2) ** 3 / mu)
+            k = np.round(np.linspace(*TOF_RANGE, tof_samples) * hohmann / step).astype(int)
+            tof_bins[a, b] = np.unique(np.maximum(k, 1))
+    return {'names': list(names), 'start': float(start), 'step': step, 'x': x, 'v': v, 'mu': mu,
+            'normal': np.cross(x[0, 0], v[0, 0]), 'tof_bins': tof_bins,
+            'planet_mu': np.array([G * float(ephemeris.masses[ephemeris.index(n)]) for n in names]),
+            'rp_min': np.array([MIN_FLYBY_RADIUS * PLANET_RADII.get(n, 0.0) for n in names])}
+
+
+class LegCache:
+    """
+    Memoized Lambert legs between tabulated planets, keyed by (departure planet, arrival planet,
+    block of departure bins). A miss solves the whole block for every flight time of the pair
+    in one vectorized call, so branches departing near the same date share the solution.
+    """
+    def __init__(self, table: dict):
+        self.table = table
+        self._legs = {}
+        self.hits = self.misses = 0
+
+    def __call__(self, a: int, b: int, d: int):
+        """Flight times in bins, and (K, 3) departure and arrival excess velocities leaving `a` at bin d."""
+        key = (a, b, d // LEG_BLOCK_BINS)
+        if key in self._legs:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._legs[key] = self._solve(*key)
+        tofs, v_out, v_in = self._legs[key]
+        return tofs, v_out[d % LEG_BLOCK_BINS], v_in[d % LEG_BLOCK_BINS]
+
+    def _solve(self, a, b, block):
+        t = self.table
+        last = t['x'].shape[1] - 1
+        tofs = t['tof_bins'][a, b]
+        depart = block * LEG_BLOCK_BINS + np.arange(LEG_BLOCK_BINS)
+        arrive = depart[:, np.newaxis] + tofs
+        d, r = np.minimum(depart, last), np.minimum(arrive, last)
+        v1, v2 = lambert(t['x'][a, d][:, np.newaxis], t['x'][b, r], tofs * t['step'], t['mu'], t['normal'])
+        v_out, v_in = v1 - t['v'][a, d][:, np.newaxis], v2 - t['v'][b, r]
+        outside = (arrive > last)[..., np.newaxis]
+        return tofs, np.where(outside, np.nan, v_out), np.where(outside, np.nan, v_in)
+
+
+def _search_launches(legs: LegCache, first: int, launches, origin: int, target: int, flybys: list,
+                     max_flybys: int, branch: int, max_dv: float, max_launch_vinf: float, max_bins: int,
+                     arrival: str, top: int) -> dict:
+    """
+    Branch-and-bound depth-first search of the sequences whose first leg goes to `first`;
+    returns the best record per distinct sequence.
+    """
+    t = legs.table
+    best = {}
+
+    def bound():
+        costs = sorted(r['dv'] for r in best.values())
+        return costs[top - 1] if len(costs) >= top else max_dv
+
+    def record(path, bins, costs, launch_vinf, arrival_vinf, dv):
+        names = tuple(t['names'][p] for p in path)
+        if dv < best.get(names, {'dv': np.inf})['dv']:
+            best[names] = {'sequence': list(names), 'dv': dv,
+                           'departure': t['start'] + bins[0] * t['step'],
+                           'times': [t['start'] + k * t['step'] for k in bins],
+                           'vinf_departure': launch_vinf, 'c3': float(launch_vinf @ launch_vinf),
+                           'flyby_dv': [float(c) for c in costs[1:]], 'arrival_vinf': arrival_vinf}
+
+    def extend(path, bins, costs, launch_vinf, v_in, c):
+        here, d = path[-1], bins[-1]
+        tofs, v_out, v_next = legs(here, c, d)
+        if v_in is None:
+            step = np.linalg.norm(v_out, axis=-1)
+            step = np.where(step <= max_launch_vinf, step, np.inf)
+        else:
+            step = flyby_dv(v_in, v_out, t['planet_mu'][here], t['rp_min'][here])
+        arrival_vinf = np.linalg.norm(v_next, axis=-1)
+        total = sum(costs) + step + (arrival_vinf if c == target and arrival == 'rendezvous' else 0.0)
+        total = np.where(np.isfinite(total) & (d + tofs - bins[0] <= max_bins), total, np.inf)
+        for k in np.argsort(total)[:1 if c == target else branch]:
+            if not total[k] < bound():
+                break
+            state = (path + (c,), bins + (int(d + tofs[k]),), costs + (float(step[k]),),
+                     v_out[k] if v_in is None else launch_vinf)
+            if c == target:
+                record(*state, float(arrival_vinf[k]), float(total[k]))
+                continue
+            for n in [target] + [p for p in flybys if p != c] if len(path) < max_flybys else [target]:
+                extend(*state, v_next[k], n)
+
+    for d in launches:
+        extend((origin,), (int(d),), (), None, None, first)
+    return best
+
+
+_worker_legs = None
+
+
+def _init_worker(table):
+    global _worker_legs
+    _worker_legs = LegCache(table)
+
+
+def _search_task(args):
+    return _search_launches(_worker_legs, *args)
+
+
+def search_sequences(ephemeris, origin: str, target: str, flybys: list, launch_start: float, launch_end: float,
+                     center: str = 'Sun', max_flybys: int = 2, max_days: float = 3650, bin_days: float = 10.0,
+                     tof_samples: int = 16, branch: int = 2, max_dv: float = 20e3, max_launch_vinf: float = np.inf,
+                     arrival: str = 'rendezvous', top: int = 10, workers: int = None, progress=None) -> list:
+    """
+    Ranks gravity-assist sequences from `origin` to `target` through up to `max_flybys` of the
+    `flybys` planets; returns up to `top` records by Δv, the best per distinct sequence.
+    """
+    names = [origin, target] + [n for n in flybys if n not in (origin, target)]
+    flyby_rows = [names.index(n) for n in flybys if n != target]
+    table = tabulate(ephemeris, names, launch_start, launch_end + max_days * 86400, bin_days, center, tof_samples)
+    step_days = table['step'] / 86400
+    launches = np.arange(int((launch_end - launch_start) / table['step']) + 1)
+    chunks = [launches[i:i + LAUNCH_CHUNK_BINS] for i in range(0, len(launches), LAUNCH_CHUNK_BINS)]
+    hops = [1] + [p for p in flyby_rows if p != 0] if max_flybys > 0 else [1]
+    options = (0, 1, flyby_rows, max_flybys, branch, max_dv, max_launch_vinf,
+               int(max_days / step_days), arrival, top)
+    tasks = [(first, chunk) + options for first in hops for chunk in chunks]
+
+    best = {}
+    def merge(found, done):
+        for names_key, r in found.items():
+            if r['dv'] < best.get(names_key, {'dv': np.inf})['dv']:
+                best[names_key] = r
+        return progress is None or progress(done / len(tasks)) is not False
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        legs = LegCache(table)
+        for i, task in enumerate(tasks):
+            if not merge(_search_launches(legs, *task), i + 1):
+                break
+    else:
+        # Spawned workers: the search may run on a background thread of a GUI process.
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(table,)) as pool:
+            futures = [pool.submit(_search_task, task) for task in tasks]
+            for i, future in enumerate(as_completed(futures)):
+                if not merge(future.result(), i + 1):
+                    for f in futures: f.cancel()
+                    break
+    return sorted(best.values(), key=lambda r: r['dv'])[:top]
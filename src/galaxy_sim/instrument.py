@@ -0,0 +1,170 @@
+# instrument.py
+
+import os
+import json
+import time
+import threading
+import functools
+import numpy as np
+from collections import deque
+
+ROLLING_WINDOW = 512  # most recent samples per timer that percentiles are taken over
+PERCENTILES = (50, 90, 99)
+MAX_TRACE_EVENTS = 1_000_000  # the oldest events are dropped beyond this
+
+
+class _NullTimer:
+    """The timer handed out while profiling is off: entering and leaving it does nothing."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name: str):
+        self.profiler, self.name = profiler, name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._record(self.name, self.start, time.perf_counter_ns())
+        return False
+
+
+def _window(ring: np.ndarray, n: int) -> np.ndarray:
+    """Copy of a ring buffer's samples, oldest first, after n writes."""
+    if n <= len(ring):
+        return ring[:n].copy()
+    return np.roll(ring, -(n % len(ring)))
+
+
+class Profiler:
+    """Named timers and counters for the hot paths, with rolling percentiles and an optional Chrome trace."""
+    def __init__(self, window: int = ROLLING_WINDOW, max_events: int = MAX_TRACE_EVENTS):
+        self.enabled = False
+        self.tracing = False
+        self.window = window
+        self._lock = threading.Lock()
+        self._events = deque(maxlen=max_events)
+        self._threads = {}
+        self.reset()
+
+    def enable(self, tracing: bool = False):
+        self.tracing = self.tracing or tracing
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = self.tracing = False
+
+    def reset(self):
+        """Clears all samples, counters and trace events."""
+        with self._lock:
+            self._samples = {}  # name -> [ring of durations in ms, number of samples ever recorded]
+            self._counters = {}
+            self._events.clear()
+            self._origin = time.perf_counter_ns()
+
+    def timer(self, name: str):
+        """Context manager timing its block under `name`."""
+        if not self.enabled: return NULL_TIMER
+        return _Timer(self, name)
+
+    def timed(self, name: str):
+        """Decorator timing every call of a function under `name`; for coarse, long-running calls."""
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def count(self, name: str, n: int = 1):
+        """Adds n to the counter `name`."""
+        if not self.enabled: return
+        with self._lock:
+            value = self._counters[name] = self._counters.get(name, 0) + n
+            if self.tracing:
+                self._events.append(('C', name, time.perf_counter_ns(), value, self._thread()))
+
+    def counters(self) -> dict:
+        """Copy of every counter's current value."""
+        with self._lock:
+            return dict(self._counters)
+
+    def _thread(self) -> int:
+        ident = threading.get_ident()
+        if ident not in self._threads:
+            self._threads[ident] = threading.current_thread().name
+        return ident
+
+    def _record(self, name: str, start: int, end: int):
+        with self._lock:
+            entry = self._samples.get(name)
+            if entry is None:
+                entry = self._samples[name] = [np.zeros(self.window), 0]
+            entry[0][entry[1] % self.window] = (end - start) * 1e-6
+            entry[1] += 1
+            if self.tracing:
+                self._events.append(('X', name, start, end - start, self._thread()))
+
+    def samples(self, name: str) -> np.ndarray:
+        """The rolling window of durations (ms) of one timer, oldest first."""
+        with self._lock:
+            ring, n = self._samples.get(name, (np.zeros(0), 0))
+            return _window(ring, n)
+
+    def summary(self, percentiles=PERCENTILES) -> dict:
+        """Per timer: calls so far, mean and percentiles (ms) over the rolling window."""
+        with self._lock:
+            windows = {name: (_window(ring, n), n) for name, (ring, n) in sorted(self._samples.items())}
+        report = {}
+        for name, (window, n) in windows.items():
+            row = {'count': n, 'mean_ms': float(window.mean())}
+            for q, value in zip(percentiles, np.percentile(window, percentiles)):
+                row[f'p{q}_ms'] = float(value)
+            report[name] = row
+        return report
+
+    def write_trace(self, path: str) -> int:
+        """Saves the trace events as Chrome trace JSON; returns the number of events written."""
+        pid = os.getpid()
+        with self._lock:
+            events, threads, origin = list(self._events), dict(self._threads), self._origin
+        trace = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                 for tid, name in threads.items()]
+        for kind, name, start, value, tid in events:
+            event = {'name': name, 'ph': kind, 'pid': pid, 'tid': tid, 'ts': (start - origin) / 1000}
+            if kind == 'X':
+                event['dur'] = value / 1000
+            else:
+                event['args'] = {name: value}
+            trace.append(event)
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+        return len(events)
+
+
+def format_summary(summary: dict, counters: dict = None, rates: dict = None) -> str:
+    """Text of the stats panel: one line per timer, then counters with their rate per second."""
+    lines = [f"{'timer':<20}{'calls':>8}{'p50':>9}{'p90':>9}{'p99':>9} ms"]
+    for name, row in summary.items():
+        lines.append(f"{name:<20}{row['count']:>8}{row['p50_ms']:>9.3f}{row['p90_ms']:>9.3f}{row['p99_ms']:>9.3f}")
+    for name, value in sorted((counters or {}).items()):
+        rate = (rates or {}).get(name)
+        lines.append(f"{name:<20}{value:>12}" + (f"  ({rate:,.0f}/s)" if rate is not None else ""))
+    return "\n".join(lines)
+
+
+PROFILER = Profiler()
@@ -0,0 +1,496 @@
+# integrators.py
+
+import numpy as np
+from .backend import get_array_module, asnumpy
+from .gravity import G, EPSILON, GravityField, dynamical_times
+from .kepler import kepler_drift
+from .instrument import PROFILER
+
+INTEGRATORS = {}
+
+
+def register_integrator(*names):
+    """Class decorator adding an integrator to the registry under one or more names."""
+    def register(cls):
+        for name in names:
+            INTEGRATORS[name] = cls
+        return cls
+    return register
+
+
+def engine_integrators() -> list:
+    """Sorted names of the schemes that can step massive bodies, i.e. all but the probe-only ones."""
+    return sorted(name for name, cls in INTEGRATORS.items() if not cls.probes_only)
+
+
+def make_integrator(name: str, tolerance: float = None):
+    """Builds a registered integrator; `tolerance` only applies to error-controlled schemes."""
+    if name not in INTEGRATORS:
+        raise ValueError(f"Unknown integrator '{name}', expected one of {sorted(INTEGRATORS)}")
+    cls = INTEGRATORS[name]
+    return cls(tolerance) if cls.adaptive and tolerance is not None else cls()
+
+
+class Integrator:
+    """
+    Base class: step(x, v, t, dt, field) advances positions and velocities in place by dt,
+    where field(x, t) returns accelerations. Subclasses that cache forces between steps rely
+    on reset() being called whenever the state is modified from outside.
+    """
+    name = None
+    adaptive = False
+    probes_only = False  # True for schemes that only move massless rows through bodies on rails
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._a = None
+        self.last_dts = []
+        self.force_evaluations = 0
+        self.stopped = None  # optional boolean mask of rows the caller holds in place; schemes may skip them
+
+    def advance(self, x, v, t: float, dt: float, steps: int, field):
+        """`steps` consecutive steps of dt in one call; schemes with a cheaper fused form override this."""
+        dts = []
+        for i in range(steps):
+            self.step(x, v, t + i * dt, dt, field)
+            dts.extend(self.last_dts)
+        self.last_dts = dts
+        return x, v
+
+    def state(self) -> dict:
+        """Cached values that the next step depends on; load_state(state()) resumes bit-for-bit."""
+        return {'a': self._a, 'force_evaluations': self.force_evaluations}
+
+    def load_state(self, state: dict):
+        self._a = state.get('a')
+        self.force_evaluations = state.get('force_evaluations', 0)
+
+    def _accelerations(self, x, t, field, rows=None):
+        """field(x, t), or only the given rows of it."""
+        self.force_evaluations += 1
+        PROFILER.count('force_evals')
+        with PROFILER.timer('force_eval'):
+            return field(x, t) if rows is None else field.row_accelerations(x, rows, t)
+
+
+@register_integrator('leapfrog', 'verlet')
+class Leapfrog(Integrator):
+    """Kick-drift-kick leapfrog; the closing kick's force is cached as the next opening kick's."""
+    name = 'leapfrog'
+
+    def _kdk(self, x, v, t, dt, field):
+        if self._a is None:
+            self._a = self._accelerations(x, t, field)
+        v += self._a * (0.5 * dt)
+        x += v * dt
+        self._a = self._accelerations(x, t + dt, field)
+        v += self._a * (0.5 * dt)
+
+    def step(self, x, v, t: float, dt: float, field):
+        self._kdk(x, v, t, dt, field)
+        self.last_dts = [dt]
+        return x, v
+
+    def advance(self, x, v, t: float, dt: float, steps: int, field):
+        """Fused steps: each closing half kick merges with the next opening one into a single kick."""
+        if self._a is None:
+            self._a = self._accelerations(x, t, field)
+        v += self._a * (0.5 * dt)
+        for i in range(steps):
+            x += v * dt
+            self._a = self._accelerations(x, t + (i + 1) * dt, field)
+            v += self._a * (dt if i < steps - 1 else 0.5 * dt)
+        self.last_dts = [dt] * steps
+        return x, v
+
+
+@register_integrator('yoshida4')
+class Yoshida4(Leapfrog):
+    """Yoshida's 4th-order symplectic composition of three cached leapfrog substeps."""
+    name = 'yoshida4'
+    W1 = 1.0 / (2.0 - 2.0 ** (1.0 / 3.0))
+    W0 = 1.0 - 2.0 * W1
+    advance = Integrator.advance
+
+    def step(self, x, v, t: float, dt: float, field):
+        elapsed = 0.0
+        for w in (self.W1, self.W0, self.W1):
+            self._kdk(x, v, t + elapsed, w * dt, field)
+            elapsed += w * dt
+        self.last_dts = [dt]
+        return x, v
+
+
+@register_integrator('wisdom_holman')
+class WisdomHolman(Integrator):
+    """Wisdom-Holman map in democratic heliocentric coordinates; requires a GravityField."""
+    name = 'wisdom_holman'
+
+    def reset(self):
+        super().reset()
+        self._layout = None
+
+    def _bind(self, field: GravityField, n_rows: int, xp):
+        n_active = field.n_active
+        central = int(xp.argmax(field.masses))
+        others = [i for i in range(n_rows) if i != central]
+        masses = xp.zeros(n_rows)
+        masses[:n_active] = field.masses
+        m_others = masses[others]
+        self._layout = {
+            'central': central, 'others': xp.asarray(others), 'm_central': float(field.masses[central]),
+            'm_others': m_others, 'm_total': float(masses.sum()),
+            'interactions': GravityField(m_others[:n_active - 1], n_active - 1, field.solver, field.field_solver),
+        }
+
+    def step(self, x, v, t: float, dt: float, field):
+        xp = get_array_module(x)
+        if not isinstance(field, GravityField):
+            raise TypeError("wisdom_holman needs a GravityField with the dominant mass among its rows")
+        if self._layout is None:
+            self._bind(field, x.shape[0], xp)
+        lay = self._layout
+        c, idx, m0, m = lay['central'], lay['others'], lay['m_central'], lay['m_others']
+
+        # Barycentric -> democratic heliocentric: heliocentric positions, barycentric velocities.
+        v_cm = (m0 * v[c] + m @ v[idx]) / lay['m_total']
+        x_cm = (m0 * x[c] + m @ x[idx]) / lay['m_total']
+        q = x[idx] - x[c]
+        u = v[idx] - v_cm
+
+        if self._a is None:
+            self._a = self._accelerations(q, t, lay['interactions'])
+        u += self._a * (0.5 * dt)
+        q += (m @ u / m0) * (0.5 * dt)
+        q, u = kepler_drift(q, u, G * m0, dt)
+        q += (m @ u / m0) * (0.5 * dt)
+        self._a = self._accelerations(q, t + dt, lay['interactions'])
+        u += self._a * (0.5 * dt)
+
+        # Democratic heliocentric -> barycentric, with the centre of mass drifting uniformly.
+        x_cm = x_cm + v_cm * dt
+        x[c] = x_cm - m @ q / lay['m_total']
+        x[idx] = q + x[c]
+        v[c] = v_cm - m @ u / m0
+        v[idx] = u + v_cm
+        self.last_dts = [dt]
+        return x, v
+
+def _trailing_zeros(s: int, top: int) -> int:
+    """Trailing zero bits of s, with 0 (the start of a step) counting as `top`."""
+    return top if s == 0 else min((s & -s).bit_length() - 1, top)
+
+
+@register_integrator('block')
+class BlockLeapfrog(Integrator):
+    """
+    Leapfrog with power-of-two block timesteps: each row advances in substeps of dt / 2**k,
+    kicked only at the ends of its own substeps. Requires a GravityField.
+    """
+    name = 'block'
+    adaptive = True  # `tolerance` is the substep as a fraction of the dynamical time
+    subsystems = False
+    MAX_LEVEL = 12
+
+    def __init__(self, tolerance: float = 0.05):
+        self.tolerance = tolerance
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        self.levels = None
+        self.row_evaluations = 0
+
+    def assign_levels(self, x, dt: float, field: GravityField) -> np.ndarray:
+        """Substep level of every row for a step of dt."""
+        times = dynamical_times(x, field.masses)
+        with np.errstate(divide='ignore'):
+            levels = np.ceil(np.log2(dt / (self.tolerance * times)))
+        levels = np.clip(levels, 0, self.MAX_LEVEL).astype(int)
+        if self.subsystems and field.groups is not None:
+            # A parent and its moons share the finest level among them.
+            n_active, groups = field.n_active, np.asarray(field.groups)
+            shared = np.zeros(n_active, dtype=int)
+            np.maximum.at(shared, groups, levels[:n_active])
+            levels[:n_active] = shared[groups]
+        return levels
+
+    def _kick(self, v, a, rows, dts):
+        if rows is None:
+            v += a * (0.5 * dts)[:, None]
+        else:
+            v[rows] += a[rows] * (0.5 * dts[rows])[:, None]
+
+    def step(self, x, v, t: float, dt: float, field):
+        xp = get_array_module(x)
+        if not isinstance(field, GravityField):
+            raise TypeError("block timesteps need a GravityField")
+        self.levels = levels = self.assign_levels(x, dt, field)
+        top = int(levels.max())
+        h = dt / (1 << top)
+        dts = xp.asarray(h * (1 << (top - levels)))
+        # Substep s is a boundary for exactly the rows with level >= top - (trailing zeros of s).
+        at_least = [None] + [xp.asarray(np.flatnonzero(levels >= k)) for k in range(1, top + 1)]
+        if self._a is None:
+            self._a = self._accelerations(x, t, field)
+        a = self._a
+        for s in range(1 << top):
+            self._kick(v, a, at_least[top - _trailing_zeros(s, top)], dts)
+            x += v * h
+            rows = at_least[top - _trailing_zeros(s + 1, top)]
+            if rows is None:
+                a = self._accelerations(x, t + (s + 1) * h, field)
+            else:
+                a[rows] = self._accelerations(x, t + (s + 1) * h, field, rows)
+            self._kick(v, a, rows, dts)
+            self.row_evaluations += x.shape[0] if rows is None else len(rows)
+        self._a = a
+        self.last_dts = [h] * (1 << top)
+        return x, v
+
+
+@register_integrator('block_subsystem')
+class SubsystemBlockLeapfrog(BlockLeapfrog):
+    """Block timesteps per subsystem: a planet and its moons (by `parent`) share one level."""
+    name = 'block_subsystem'
+    subsystems = True
+
+
+# Dormand-Prince 5(4) tableau. The last row of A doubles as the 5th-order weights (FSAL).
+DP_C = (0.0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1.0, 1.0)
+DP_A = (
+    (),
+    (1 / 5,),
+    (3 / 40, 9 / 40),
+    (44 / 45, -56 / 15, 32 / 9),
+    (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+    (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+    (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+)
+DP_E = (71 / 57600, 0.0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40)
+
+
+@register_integrator('adaptive')
+class DormandPrince45(Integrator):
+    """Error-controlled Dormand-Prince 5(4); step() covers exactly `dt` in as many substeps as needed."""
+    name = 'adaptive'
+    adaptive = True
+    SAFETY = 0.9
+    MIN_FACTOR = 0.2
+    MAX_FACTOR = 5.0
+    ENCOUNTER_FRACTION = 0.05
+
+    def __init__(self, tolerance: float = 1e-10, min_dt: float = 1.0):
+        self.tolerance = tolerance
+        self.min_dt = min_dt
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        self._h = None
+        self.rejected_steps = 0
+
+    def state(self) -> dict:
+        return dict(super().state(), h=self._h, rejected_steps=self.rejected_steps)
+
+    def load_state(self, state: dict):
+        super().load_state(state)
+        self._h = state.get('h')
+        self.rejected_steps = state.get('rejected_steps', 0)
+
+    def _error_norm(self, x, v, a, err_x, err_v, h):
+        xp = get_array_module(x)
+        norm = lambda arr: xp.sqrt((arr * arr).sum(axis=1))
+        scale_x = self.tolerance * (norm(x) + h * norm(v)) + 1e-300
+        scale_v = self.tolerance * (norm(v) + h * norm(a)) + 1e-300
+        return max(float((norm(err_x) / scale_x).max()), float((norm(err_v) / scale_v).max()))
+
+    def step(self, x, v, t: float, dt: float, field):
+        """Advances positions `x` and velocities `v` in place from time t to t + dt."""
+        self.last_dts = []
+        if self._a is None:
+            self._a = self._accelerations(x, t, field)
+        h_next = self._h or dt
+        elapsed = 0.0
+
+        while elapsed < dt:
+            remaining = dt - elapsed
+            h = min(h_next, remaining, self.ENCOUNTER_FRACTION * field.encounter_time(x, v, t + elapsed))
+            h = max(h, min(self.min_dt, remaining))
+            truncated = h < h_next
+
+            kx, kv = [v], [self._a]
+            for stage in range(1, 7):
+                coeffs = DP_A[stage]
+                xs = x + h * sum(c * k for c, k in zip(coeffs, kx) if c)
+                vs = v + h * sum(c * k for c, k in zip(coeffs, kv) if c)
+                kx.append(vs)
+                kv.append(self._accelerations(xs, t + elapsed + DP_C[stage] * h, field))
+            err_x = h * sum(e * k for e, k in zip(DP_E, kx) if e)
+            err_v = h * sum(e * k for e, k in zip(DP_E, kv) if e)
+            err = self._error_norm(x, v, self._a, err_x, err_v, h)
+            factor = self.MAX_FACTOR if err == 0 else self.SAFETY * err ** -0.2
+            factor = min(self.MAX_FACTOR, max(self.MIN_FACTOR, factor))
+
+            if err <= 1.0 or h <= self.min_dt:
+                x[...] = xs
+                v[...] = vs
+                self._a = kv[-1]
+                elapsed = dt if h >= remaining else elapsed + h
+                self.last_dts.append(h)
+                h_next = max(h_next, h * factor) if truncated else h * factor
+            else:
+                self.rejected_steps += 1
+                h_next = h * factor
+        self._h = h_next
+        return x, v
+
+
+def _encke_f(q):
+    """Battin's f(q) = (1 + q)^(3/2) - 1, free of the cancellation at small q."""
+    return q * (3 + 3 * q + q * q) / (1 + (1 + q) ** 1.5)
+
+
+@register_integrator('encke')
+class Encke(Integrator):
+    """
+    Encke propagator for massless probes among bodies on rails (an EphemerisField): RK4 on the
+    deviation from a Kepler reference orbit, direct adaptive steps inside spheres of influence.
+    """
+    name = 'encke'
+    probes_only = True
+    adaptive = True  # `tolerance` applies to the direct integration inside spheres of influence
+    RECTIFY_RATIO = 1e-2
+    ENCOUNTER_FRACTION = 0.05  # of the time to reach the nearest sphere of influence
+    MAX_SUBSTEPS = 64
+
+    def __init__(self, tolerance: float = 1e-10):
+        self.tolerance = tolerance
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        self._ref = None  # heliocentric reference positions and velocities of every row at the current time
+        self._inside = None
+        self._direct, self._direct_rows = DormandPrince45(self.tolerance), None
+        self.rectifications = 0
+
+    def _bind(self, field):
+        masses = field.masses
+        xp = get_array_module(masses)
+        central = int(xp.argmax(masses))
+        self._central = central
+        self._mu = G * float(masses[central])
+        self._others = xp.ones(masses.shape[0], dtype=bool)
+        self._others[central] = False
+        self._perturbing = xp.where(self._others, masses, 0.0)
+        self._soi_ratio = (masses / masses[central]) ** 0.4
+
+    def _perturbation(self, field):
+        """Acceleration of heliocentric positions r at time t, minus the central two-body term."""
+        def perturbation(r, t):
+            xp = get_array_module(r)
+            body_x = field.body_positions(r, t)
+            sun = body_x[self._central:self._central + 1]
+            direct = field.field_solver(r + sun, body_x, self._perturbing)
+            indirect = field.field_solver(sun, body_x, self._perturbing)
+            return direct - indirect
+        return perturbation
+
+    def _spheres(self, x, v, t, field, moving):
+        """Rows inside any sphere of influence, and the shortest time for any moving row to reach one."""
+        xp = get_array_module(x)
+        body_x, body_v = field.body_states(x, v, t)
+        sun = body_x[self._central]
+        radii = xp.where(self._others, xp.sqrt(((body_x - sun) ** 2).sum(axis=1)) * self._soi_ratio, 0.0)
+        r = x[:, xp.newaxis, :] - body_x[xp.newaxis]
+        dist = xp.sqrt(xp.einsum('ijk,ijk->ij', r, r))
+        inside = (dist < radii).any(axis=1)
+        w = v[:, xp.newaxis, :] - body_v[xp.newaxis]
+        closing = xp.sqrt(xp.einsum('ijk,ijk->ij', w, w)) + EPSILON
+        outside = (~inside & moving)[:, xp.newaxis] & self._others[xp.newaxis, :]
+        reach = xp.where(outside, (dist - radii) / closing, xp.inf)
+        return asnumpy(inside), float(reach.min()) if reach.size else float('inf')
+
+    def step(self, x, v, t: float, dt: float, field):
+        xp = get_array_module(x)
+        if field.n_active:
+            raise TypeError("encke propagates massless probes; the massive bodies must be on rails (an ephemeris)")
+        body_x, body_v = field.body_states(x, v, t)
+        if self._ref is None or self._ref[0].shape[0] != x.shape[0]:
+            self._bind(field)
+            self._ref = [xp.zeros_like(x), xp.zeros_like(v)]
+            self._inside = np.ones(x.shape[0], dtype=bool)  # every row starts on its osculating orbit
+        c = self._central
+        r, u = x - body_x[c], v - body_v[c]
+        moving = xp.ones(x.shape[0], dtype=bool) if self.stopped is None else ~self.stopped
+        inside, reach = self._spheres(x, v, t, field, moving)
+        moving = asnumpy(moving)
+
+        cruise = np.flatnonzero(~inside & moving)
+        if len(cruise):
+            rows = xp.asarray(cruise)
+            rho = self._ref[0][rows]
+            drift = xp.sqrt(((r[rows] - rho) ** 2).sum(axis=1)) > self.RECTIFY_RATIO * xp.sqrt((rho * rho).sum(axis=1))
+            rectify = asnumpy(drift) | self._inside[cruise]
+            if rectify.any():
+                fresh = xp.asarray(cruise[rectify])
+                self._ref[0][fresh], self._ref[1][fresh] = r[fresh], u[fresh]
+                self.rectifications += int(rectify.sum())
+            substeps = int(min(self.MAX_SUBSTEPS, max(1, np.ceil(dt / max(self.ENCOUNTER_FRACTION * reach, 1e-9)))))
+            r[rows], u[rows] = self._cruise(rows, r[rows], u[rows], t, dt, substeps, field)
+            end_x, end_v = field.body_states(x, v, t + dt)
+            x[rows], v[rows] = r[rows] + end_x[c], u[rows] + end_v[c]
+            self.last_dts = [dt / substeps] * substeps
+        else:
+            self.last_dts = [dt]
+
+        close = np.flatnonzero(inside & moving)
+        if len(close):
+            rows = xp.asarray(close)
+            if self._direct_rows is None or not np.array_equal(self._direct_rows, close):
+                self._direct.reset()
+                self._direct_rows = close
+            xs, vs = x[rows], v[rows]
+            self._direct.step(xs, vs, t, dt, field)
+            x[rows], v[rows] = xs, vs
+            self.force_evaluations += self._direct.force_evaluations
+            self._direct.force_evaluations = 0
+        else:
+            self._direct_rows = None
+        self._inside = inside
+        return x, v
+
+    def _cruise(self, rows, r, u, t: float, dt: float, substeps: int, field):
+        """
+        RK4 on the deviation (delta, delta_v) from the reference orbit, whose states at the
+        stage times come from half-substep Kepler drifts; returns heliocentric (r, u) at t + dt.
+        """
+        mu, perturbation = self._mu, self._perturbation(field)
+        rho, rho_v = self._ref[0][rows], self._ref[1][rows]
+        delta, delta_v = r - rho, u - rho_v
+
+        def derivative(tau, ref, d, dv):
+            true = ref + d
+            q = (d * (d - 2 * true)).sum(axis=1) / (true * true).sum(axis=1)
+            ref_cubed = ((ref * ref).sum(axis=1) ** 1.5)[:, None]
+            a = -mu / ref_cubed * (d + _encke_f(q)[:, None] * true) + self._accelerations(true, tau, perturbation)
+            return dv, a
+
+        h = dt / substeps
+        k1 = derivative(t, rho, delta, delta_v)
+        for s in range(substeps):
+            tau = t + s * h
+            mid, mid_v = kepler_drift(rho, rho_v, mu, h / 2)
+            rho, rho_v = kepler_drift(mid, mid_v, mu, h / 2)
+            k2 = derivative(tau + h / 2, mid, delta + h / 2 * k1[0], delta_v + h / 2 * k1[1])
+            k3 = derivative(tau + h / 2, mid, delta + h / 2 * k2[0], delta_v + h / 2 * k2[1])
+            k4 = derivative(tau + h, rho, delta + h * k3[0], delta_v + h * k3[1])
+            delta = delta + h / 6 * (k1[0] + 2 * k2[0] + 2 * k3[0] + k4[0])
+            delta_v = delta_v + h / 6 * (k1[1] + 2 * k2[1] + 2 * k3[1] + k4[1])
+            if s < substeps - 1:
+                k1 = derivative(tau + h, rho, delta, delta_v)
+        self._ref[0][rows], self._ref[1][rows] = rho, rho_v
+        return rho + delta, rho_v + delta_v
@@ -0,0 +1,113 @@
+# kepler.py
+
+from .backend import get_array_module
+
+KEPLER_MAX_ITERATIONS = 50
+KEPLER_TOLERANCE = 1e-13
+
+
+def stumpff(z):
+    """Stumpff functions C(z), S(z) for elliptic (z > 0), parabolic and hyperbolic (z < 0) orbits."""
+    xp = get_array_module(z)
+    pos, neg = z > 1e-8, z < -1e-8
+    sz = xp.sqrt(xp.where(pos, z, 1.0))
+    sn = xp.minimum(xp.sqrt(xp.where(neg, -z, 1.0)), 700.0)  # keep cosh/sinh finite
+    c = xp.where(pos, (1 - xp.cos(sz)) / xp.where(pos, z, 1.0),
+                 xp.where(neg, (xp.cosh(sn) - 1) / xp.where(neg, -z, 1.0), 0.5 - z / 24 + z * z / 720))
+    s = xp.where(pos, (sz - xp.sin(sz)) / sz ** 3,
+                 xp.where(neg, (xp.sinh(sn) - sn) / sn ** 3, 1 / 6 - z / 120 + z * z / 5040))
+    return c, s
+
+
+def _initial_chi(r0n, rv, alpha, mu, dt):
+    """Starting universal anomaly: the short-step guess, tightened by Vallado's guess on hyperbolas."""
+    xp = get_array_module(r0n)
+    chi = mu ** 0.5 * dt / r0n
+    hyperbolic = alpha < 0
+    if bool(hyperbolic.any()):
+        a = 1.0 / xp.where(hyperbolic, alpha, -1.0)
+        sign = 1.0 if dt >= 0 else -1.0
+        arg = -2 * mu * xp.where(hyperbolic, alpha, -1.0) * dt / (rv + sign * xp.sqrt(-mu * a) * (1 - r0n * alpha))
+        log_chi = sign * xp.sqrt(-a) * xp.log(xp.where(arg > 1, arg, 1.0))
+        chi = xp.where(hyperbolic & (arg > 1) & (xp.abs(log_chi) < xp.abs(chi)), log_chi, chi)
+    return chi
+
+
+def kepler_drift(r0, v0, mu, dt):
+    """
+    Propagates (K, 3) positions and velocities along two-body orbits about a central mass with
+    gravitational parameter `mu` for time `dt`, using universal variables so elliptic,
+    parabolic and hyperbolic orbits share one vectorized solver. Returns new (r, v).
+    """
+    xp = get_array_module(r0)
+    sqrt_mu = mu ** 0.5
+    r0n = xp.sqrt((r0 * r0).sum(axis=1))
+    rv = (r0 * v0).sum(axis=1)
+    alpha = 2.0 / r0n - (v0 * v0).sum(axis=1) / mu
+    sigma0 = rv / sqrt_mu
+    chi = _initial_chi(r0n, rv, alpha, mu, dt)
+
+    for _ in range(KEPLER_MAX_ITERATIONS):
+        z = alpha * chi * chi
+        c, s = stumpff(z)
+        chi2 = chi * chi
+        f = sigma0 * chi2 * c + (1 - alpha * r0n) * chi2 * chi * s + r0n * chi - sqrt_mu * dt
+        df = sigma0 * chi * (1 - z * s) + (1 - alpha * r0n) * chi2 * c + r0n
+        ddf = sigma0 * (1 - z * c) + (1 - alpha * r0n) * chi * (1 - z * s)
+        # Laguerre-Conway update: converges from poor initial guesses where Newton can cycle.
+        root = xp.sqrt(xp.abs(16 * df * df - 20 * f * ddf))
+        delta = 5 * f / (df + xp.where(df >= 0, root, -root))
+        chi = chi - delta
+        if float(xp.abs(delta).max()) <= KEPLER_TOLERANCE * max(float(xp.abs(chi).max()), 1.0):
+            break
+
+    z = alpha * chi * chi
+    c, s = stumpff(z)
+    chi2 = chi * chi
+    f = 1 - chi2 / r0n * c
+    g = dt - chi2 * chi / sqrt_mu * s
+    r = f[:, xp.newaxis] * r0 + g[:, xp.newaxis] * v0
+    rn = xp.sqrt((r * r).sum(axis=1))
+    fdot = sqrt_mu / (rn * r0n) * (alpha * chi2 * chi * s - chi)
+    gdot = 1 - chi2 / rn * c
+    v = fdot[:, xp.newaxis] * r0 + gdot[:, xp.newaxis] * v0
+    return r, v
+
+
+ELLIPTIC_ITERATIONS = 4
+ELLIPTIC_MAX_ECCENTRICITY = 0.1  # beyond this, rows go through kepler_drift
+
+
+def elliptic_drift(r0, v0, mu, dt):
+    """
+    kepler_drift for bound orbits of low eccentricity, such as ring particles: a fixed number
+    of Newton steps on the change in eccentric anomaly over dt taken modulo one period, with
+    no Stumpff functions or convergence checks. Rows that are unbound or more eccentric than
+    ELLIPTIC_MAX_ECCENTRICITY are passed to kepler_drift instead. Returns new (r, v).
+    """
+    xp = get_array_module(r0)
+    r0n = xp.sqrt((r0 * r0).sum(axis=1))
+    rv = (r0 * v0).sum(axis=1)
+    alpha = 2.0 / r0n - (v0 * v0).sum(axis=1) / mu
+    bound = alpha > 0
+    alpha = xp.where(bound, alpha, 1.0 / r0n)
+    a = 1.0 / alpha
+    n = xp.sqrt(mu * alpha ** 3)
+    e_cos, e_sin = 1 - r0n * alpha, rv / xp.sqrt(mu * a)
+    mean = xp.remainder(n * dt, 2 * xp.pi)
+    x = mean
+    for _ in range(ELLIPTIC_ITERATIONS):
+        s, c = xp.sin(x), xp.cos(x)
+        x = x - (x - e_cos * s + e_sin * (1 - c) - mean) / (1 - e_cos * c + e_sin * s)
+    s, c = xp.sin(x), xp.cos(x)
+    f = 1 - a / r0n * (1 - c)
+    g = (mean + s - x) / n
+    rn = a * (1 - e_cos * c + e_sin * s)
+    fdot = -xp.sqrt(mu * a) / (rn * r0n) * s
+    gdot = 1 - a / rn * (1 - c)
+    r = f[:, xp.newaxis] * r0 + g[:, xp.newaxis] * v0
+    v = fdot[:, xp.newaxis] * r0 + gdot[:, xp.newaxis] * v0
+    other = ~bound | (e_cos * e_cos + e_sin * e_sin > ELLIPTIC_MAX_ECCENTRICITY ** 2)
+    if bool(other.any()):
+        r[other], v[other] = kepler_drift(r0[other], v0[other], mu, dt)
+    return r, v
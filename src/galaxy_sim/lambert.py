@@ -0,0 +1,51 @@
+# lambert.py
+
+import numpy as np
+from .kepler import stumpff
+
+LAMBERT_ITERATIONS = 100
+Z_MIN = -400.0                    # deep hyperbolic bound; covers transfers far faster than any planet pair needs
+Z_MAX = 4 * np.pi ** 2 - 1e-9     # upper bound of zero-revolution (less than one full turn) transfers
+
+
+def lambert(r1, r2, tof, mu: float, normal=None):
+    """
+    Zero-revolution Lambert solver, vectorized over (..., 3) position pairs, going the way round
+    whose angular momentum is along `normal` (default +z). Returns (v1, v2), NaN where unsolvable.
+    """
+    r1, r2 = np.asarray(r1, dtype=np.float64), np.asarray(r2, dtype=np.float64)
+    tof = np.asarray(tof, dtype=np.float64)
+    r1n, r2n = np.linalg.norm(r1, axis=-1), np.linalg.norm(r2, axis=-1)
+    normal = np.array([0.0, 0.0, 1.0]) if normal is None else np.asarray(normal, dtype=np.float64)
+    cos_dtheta = np.clip((r1 * r2).sum(axis=-1) / (r1n * r2n), -1.0, 1.0)
+    prograde = (np.cross(r1, r2) * normal).sum(axis=-1) >= 0
+    sin_dtheta = np.where(prograde, 1.0, -1.0) * np.sqrt(1 - cos_dtheta ** 2)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        a = sin_dtheta * np.sqrt(r1n * r2n / (1 - cos_dtheta))
+        target = np.sqrt(mu) * tof
+
+        def y_of(z):
+            c, s = stumpff(z)
+            return r1n + r2n + a * (z * s - 1) / np.sqrt(c), c, s
+
+        lo = np.full(np.broadcast(a, target).shape, Z_MIN)
+        hi = np.full_like(lo, Z_MAX)
+        for _ in range(LAMBERT_ITERATIONS):
+            z = 0.5 * (lo + hi)
+            y, c, s = y_of(z)
+            # Time of flight grows with z; y < 0 only happens below the feasible range.
+            flight = np.where(y > 0, (np.abs(y) / c) ** 1.5 * s + a * np.sqrt(np.abs(y)), -np.inf)
+            short = flight < target
+            lo = np.where(short, z, lo)
+            hi = np.where(short, hi, z)
+
+        y, _, _ = y_of(0.5 * (lo + hi))
+        valid = (y > 0) & (np.abs(sin_dtheta) > 1e-12) & (hi - lo < 1e-6 * (Z_MAX - Z_MIN))
+        f = 1 - y / r1n
+        g = a * np.sqrt(y / mu)
+        gdot = 1 - y / r2n
+        g = np.where(valid, g, np.nan)[..., np.newaxis]
+        v1 = (r2 - f[..., np.newaxis] * r1) / g
+        v2 = (gdot[..., np.newaxis] * r2 - r1) / g
+    return v1, v2
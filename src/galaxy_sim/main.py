@@ -1,47 +1,196 @@
 # main.py
 
+import time
+_PROCESS_START = time.perf_counter()
+
 import os
-import spiceypy as spice
+import json
+import argparse
+from contextlib import contextmanager
+from galaxy_sim.backend import BACKEND_NAMES
 from galaxy_sim.engine import SimulationEngine
-from galaxy_sim.viewer import OrbitViewer3D
-from galaxy_sim.solar_system import load_bodies_from_spice
-
-
-def main():
+from galaxy_sim.integrators import engine_integrators
+from galaxy_sim.solvers import SOLVERS
+from galaxy_sim.solar_system import RINGS, load_initial_state, furnish_kernels, clear_kernels
+from galaxy_sim.batch import SnapshotFile, run_batch, format_report
+from galaxy_sim.trajectory_store import TrajectoryWriter
+from galaxy_sim.checkpoint import AutoCheckpoint, save_checkpoint, load_checkpoint, engine_bodies
+from galaxy_sim.sim_thread import SimulationThread
+from galaxy_sim.instrument import PROFILER
+from galaxy_sim.rings import RING_PARTICLES
+
+EPOCH = "2025-06-01"
+DEFAULT_DT = 3600 * 6
+CHECKPOINT_EVERY = 1000
+STARTUP_TARGET_S = 0.3
+
+
+class StartupProfile:
+    """Wall-clock time per startup stage, reported by --profile-startup."""
+    def __init__(self):
+        self.stages = [("imports", time.perf_counter() - _PROCESS_START)]
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        yield
+        self.stages.append((name, time.perf_counter() - start))
+
+    def report(self):
+        total = sum(seconds for _, seconds in self.stages)
+        print("--- Startup profile ---")
+        for name, seconds in self.stages:
+            print(f"  {name:<18} {seconds * 1000:8.1f} ms")
+        mark = "✔" if total < STARTUP_TARGET_S else "✘"
+        print(f"{mark} Engine ready in {total * 1000:.1f} ms (target {STARTUP_TARGET_S * 1000:.0f} ms)")
+
+
+def parse_decimation(text: str) -> tuple:
+    """argparse type for --decimate: 'NAME=N' with a positive step count N."""
+    name, _, every = text.rpartition("=")
+    if not name or not every.isdigit() or int(every) < 1:
+        raise argparse.ArgumentTypeError(f"expected NAME=N with N a positive integer, got {text!r}")
+    return name, int(every)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="N-body gravity simulator & mission planner")
+    parser.add_argument("--backend", choices=BACKEND_NAMES, default=None,
+                        help="array backend (default: $GALAXY_SIM_BACKEND or auto)")
+    parser.add_argument("--integrator", choices=engine_integrators(), default="leapfrog",
+                        help="integration scheme for the live simulation")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="relative error tolerance for the adaptive integrator")
+    parser.add_argument("--solver", choices=sorted(SOLVERS), default="direct",
+                        help="gravity solver for the massive bodies")
+    parser.add_argument("--theta", type=float, default=None, help="Barnes-Hut opening angle")
+    parser.add_argument("--no-cache", action="store_true", help="always read the initial state from SPICE")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="report where startup time goes until the engine is ready to step")
+    parser.add_argument("--epoch", default=EPOCH, help="start epoch (UTC/TDB date)")
+    parser.add_argument("--trace", default=None,
+                        help="record hot-path timings and write them to this Chrome trace (JSON) file on exit")
+    parser.add_argument("--ring-particles", type=int, default=RING_PARTICLES,
+                        help="particles per planetary ring in the viewer (0 disables the rings)")
+
+    restart = parser.add_argument_group("checkpoint/restart")
+    restart.add_argument("--resume", default=None, help="start from this checkpoint instead of the epoch")
+    restart.add_argument("--checkpoint", default=None, help="save the engine state to this file periodically")
+    restart.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY,
+                         help="steps between checkpoints")
+
+    batch = parser.add_argument_group("headless batch runs")
+    batch.add_argument("--headless", action="store_true", help="integrate without opening the viewer")
+    batch.add_argument("--days", type=float, default=365.0, help="simulated duration in days")
+    batch.add_argument("--dt", type=float, default=DEFAULT_DT, help="time step in seconds")
+    batch.add_argument("--every", type=int, default=1, help="keep one snapshot every N steps")
+    batch.add_argument("--output", default=None,
+                       help="write snapshots to this .npz file, or to a trajectory store directory")
+    batch.add_argument("--decimate", action="append", type=parse_decimation, default=[], metavar="NAME=N",
+                       help="trajectory store only: keep one snapshot every N steps for this body")
+    batch.add_argument("--report", default=None, help="write the throughput report to this JSON file")
+    batch.add_argument("--max-steps", type=int, default=None, help="stop after this many steps")
+    batch.add_argument("--time-limit", type=float, default=None, help="stop after this many wall-clock seconds")
+    return parser.parse_args(argv)
+
+
+def run_headless(engine: SimulationEngine, args):
+    names, every, writer = engine.body_names(), args.every, None
+    unknown = [name for name, _ in args.decimate if name not in names]
+    if unknown:
+        print(f"✘ --decimate names unknown bodies: {', '.join(unknown)}")
+        return None
+    checkpoint = AutoCheckpoint(args.checkpoint, args.checkpoint_every) if args.checkpoint else None
+    if args.output and args.output.endswith(".npz"):
+        writer = SnapshotFile(args.output, names)
+    elif args.output:
+        decimation = {name: args.every for name in names}
+        decimation.update(args.decimate)
+        writer, every = TrajectoryWriter(args.output, names, decimation), 1
+    report = run_batch(engine, args.days * 86400, args.dt, every, writer, args.max_steps, args.time_limit,
+                       checkpoint)
+    if checkpoint:
+        save_checkpoint(engine, args.checkpoint)
+        print(f"✔ Saved checkpoint to {args.checkpoint}")
+    if writer:
+        writer.close()
+        print(f"✔ Wrote {writer.count} snapshots to {args.output}")
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=1)
+    print(f"✔ {format_report(report)}")
+    return report
+
+
+def write_trace(path: str):
+    count = PROFILER.write_trace(path)
+    print(f"✔ Wrote {count} trace events to {path}")
+
+
+def main(argv=None):
+    profile = StartupProfile()
+    args = parse_args(argv)
+    if args.trace:
+        PROFILER.enable(tracing=True)
     script_dir = os.path.dirname(__file__) if "__file__" in locals() else "."
     spk_path = os.path.join(script_dir, "de442.bsp")
     tls_path = os.path.join(script_dir, "latest_leapseconds.tls")
 
+    if args.resume:
+        with profile.stage("checkpoint"):
+            try:
+                engine = load_checkpoint(args.resume, backend=args.backend)
+            except (OSError, ValueError) as e:
+                print(f"✘ ERROR loading checkpoint: {e}")
+                return
+        print(f"✔ Resumed {engine.n_bodies} bodies from {args.resume}")
+    else:
+        with profile.stage("initial state"):
+            try:
+                bodies, initial_et = load_initial_state(spk_path, tls_path, args.epoch, use_cache=not args.no_cache)
+            except Exception as e:
+                print(f"✘ ERROR loading SPICE kernels: {e}")
+                clear_kernels()
+                return
+        if not bodies:
+            print("✘ No bodies were loaded.")
+            clear_kernels()
+            return
+
+        with profile.stage("engine"):
+            solver_options = {'theta': args.theta} if args.theta is not None else None
+            engine = SimulationEngine(bodies, initial_et, backend=args.backend, integrator=args.integrator,
+                                      tolerance=args.tolerance, solver=args.solver, solver_options=solver_options)
+    print(f"✔ Physics backend: {engine.backend_name} | Integrator: {engine.integrator_name}")
+    if args.profile_startup:
+        profile.report()
+    if args.headless:
+        run_headless(engine, args)
+        if args.trace: write_trace(args.trace)
+        clear_kernels()
+        return
+
+    # The viewer needs the kernels for dates and planning ephemerides; a cached start skipped them.
     try:
-        spice.furnsh(tls_path)
-        spice.furnsh(spk_path)
-        print("✔ SPICE kernels loaded.")
+        furnish_kernels(tls_path, spk_path)
     except Exception as e:
         print(f"✘ ERROR loading SPICE kernels: {e}")
         return
-
-    epoch = "2025-06-01"
-    initial_et = spice.str2et(f"{epoch} TDB")
-    bodies = load_bodies_from_spice(spk_path, initial_et)
-    if not bodies:
-        print("✘ No bodies were loaded.")
-        spice.kclear()
-        return
-
-    engine = SimulationEngine(bodies, initial_et)
-    viewer = OrbitViewer3D(bodies, initial_et)
-
+    from galaxy_sim.viewer import OrbitViewer3D
+    if args.resume:
+        bodies = engine_bodies(engine)
+    viewer = OrbitViewer3D(bodies, engine.et)
+    if args.ring_particles > 0:
+        for ring in RINGS:
+            if ring.body_name in engine.active_names:
+                engine.add_ring(ring, args.ring_particles)
+                print(f"✔ Seeded {args.ring_particles} ring particles around {ring.body_name}")
+
+    # Physics runs on its own thread; the viewer renders its latest snapshot every frame.
+    checkpoint = AutoCheckpoint(args.checkpoint, args.checkpoint_every) if args.checkpoint else None
+    sim = SimulationThread(engine, viewer.base_dt, on_steps=checkpoint.update if checkpoint else None)
     viewer.canvas.app.engine = engine
-
-    def simulate(event):
-        if not viewer.is_paused:
-            steps_to_run = int(viewer.time_multiplier)
-            if steps_to_run > 0:
-                for _ in range(steps_to_run):
-                    engine.step(dt=viewer.base_dt)
-                engine.update_body_objects(viewer.bodies)
-
-    viewer.timer.connect(simulate)
+    viewer.canvas.app.sim = sim.start()
 
     print("\n" + "=" * 60)
     print("🚀 N-BODY GRAVITY SIMULATOR & MISSION PLANNER 🚀")
@@ -49,6 +198,7 @@ def main():
     print("\n--- Camera & Time Controls ---")
     print("  - Drag Mouse / Scroll Wheel: Rotate & Zoom")
     print("  - Up/Down Arrows / Spacebar: Control Time Speed & Pause")
+    print("  - 'I': Toggle the performance stats panel")
 
     print("\n--- Planet Selection ---")
     print("  - Left/Right Arrows: Cycle through planets to select a launch point")
@@ -61,8 +211,10 @@ def main():
     print("=" * 60 + "\n")
 
     viewer.run()
+    sim.stop()
+    if args.trace: write_trace(args.trace)
 
-    spice.kclear()
+    clear_kernels()
     print("✔ SPICE kernels cleared.")
 
 
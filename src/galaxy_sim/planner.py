@@ -0,0 +1,165 @@
+# planner.py
+
+import time
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from .backend import get_backend, to_host
+from .prediction import PathRecorder, FinalPositions, run_ensemble_prediction
+from .events import Approach, Escape
+from .porkchop import porkchop, best_cell
+from .gravity_assist import search_sequences
+from .instrument import PROFILER
+
+
+class Job:
+    """
+    Handle to a background planning job. The worker publishes progress and partial results
+    through report(); the UI thread polls snapshot() and may cancel() at any time.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self.progress = 0.0
+        self.stage = None  # preparatory work under way, e.g. sampling an ephemeris
+        self.partial = None
+        self.result = None
+        self.error = None
+        self.done = False
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def begin(self, stage: str = None):
+        """Starts a stage (None for the main work), restarting the progress and the ETA clock."""
+        with self._lock:
+            self.stage, self.progress, self.started = stage, 0.0, time.perf_counter()
+
+    def report(self, progress: float, partial=None) -> bool:
+        """Publishes progress in [0, 1] and optionally a partial result; False once cancelled."""
+        with self._lock:
+            self.progress = progress
+            if partial is not None:
+                self.partial = partial
+        return not self.cancelled
+
+    def eta(self):
+        """Seconds left, extrapolated from the progress so far; None before any progress."""
+        if self.progress <= 0:
+            return None
+        elapsed = time.perf_counter() - self.started
+        return elapsed * (1 - self.progress) / self.progress
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {'progress': self.progress, 'stage': self.stage, 'eta': self.eta(), 'partial': self.partial,
+                    'done': self.done, 'result': self.result, 'error': self.error}
+
+    def _finish(self, result=None, error=None):
+        with self._lock:
+            self.result, self.error, self.done = result, error, True
+
+
+class PlanningWorker:
+    """
+    Runs planning jobs on a background thread so the render timer never blocks. Submitting a
+    job cancels the one in flight; cancelled jobs stop at their next progress report.
+    """
+    def __init__(self, max_workers: int = 1):
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="planner")
+        self.current = None
+
+    def submit(self, name: str, fn, *args, **kwargs) -> Job:
+        """Starts fn(job, *args, **kwargs) in the background and returns its Job."""
+        self.cancel()
+        job = Job(name)
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        self.current = job
+        return job
+
+    @staticmethod
+    def _run(job, fn, args, kwargs):
+        if job.cancelled:
+            return job._finish()
+        try:
+            job._finish(None if job.cancelled else fn(job, *args, **kwargs))
+        except Exception as e:
+            job._finish(error=e)
+
+    def cancel(self):
+        if self.current is not None:
+            self.current.cancel()
+            self.current = None
+
+    def shutdown(self):
+        self.cancel()
+        self._pool.shutdown(wait=True)
+
+
+@PROFILER.timed('prediction')
+def stream_prediction(job: Job, bodies: list, position, velocity, duration_days: int, dt: float, **options):
+    """Job body predicting one probe path; the path so far is published as the partial result."""
+    num_steps = int(duration_days * 86400 / dt)
+    recorder = PathRecorder(1, num_steps, get_backend(options.get('backend')))
+    progress = lambda steps: job.report(steps / num_steps, to_host(recorder.paths[0, :steps]))
+    run_ensemble_prediction(bodies, position, velocity, duration_days, dt, reducer=recorder, progress=progress,
+                            **options)
+    return None if job.cancelled else recorder.result()[0]
+
+
+@PROFILER.timed('optimization')
+def search_launch(job: Job, launch_states, target_idx: int, bodies: list, duration_days: int, dt: float,
+                  angle: float, speed: float, best_dist: float = float('inf'), candidates: int = 1000,
+                  rounds: int = 4, angle_spread: float = 20.0, speed_spread: float = 1500.0, seed: int = None,
+                  encounter_radius: float = None, escape: dict = None, **options):
+    """
+    Job body searching launch angle and speed for the closest approach to a target, one ensemble
+    of `candidates` per round; improvements are published as dicts of angle, speed, dist and path.
+    """
+    rng = np.random.default_rng(seed)
+    xp = get_backend(options.get('backend'))
+    num_steps = int(duration_days * 86400 / dt)
+    best = None
+    for r in range(rounds):
+        angles = angle + rng.uniform(-angle_spread, angle_spread, candidates)
+        speeds = speed + rng.uniform(-speed_spread, speed_spread, candidates)
+        positions, velocities = launch_states(angles, speeds)
+        progress = lambda steps: job.report((r + steps / num_steps) / rounds)
+        approach = Approach(candidates, target_idx, stop_distance=encounter_radius, xp=xp)
+        events = [approach] + ([Escape(candidates, **escape, xp=xp)] if escape else [])
+        run_ensemble_prediction(bodies, positions, velocities, duration_days, dt, reducer=FinalPositions(candidates, xp),
+                                progress=progress, events=events, **options)
+        if job.cancelled:
+            return None
+        dists, _ = approach.result()
+        k = int(np.argmin(dists))
+        if dists[k] < best_dist:
+            best_dist, angle, speed = float(dists[k]), float(angles[k]), float(speeds[k])
+            path = run_ensemble_prediction(bodies, positions[k], velocities[k], duration_days, dt, **options)[0]
+            best = {'angle': angle, 'speed': speed, 'dist': best_dist, 'path': path}
+        job.report((r + 1) / rounds, best)
+        angle_spread, speed_spread = angle_spread / 2, speed_spread / 2
+    return best
+
+
+@PROFILER.timed('launch_window')
+def launch_window(job: Job, ephemeris, origin: str, target: str, departures, tofs, **options):
+    """Job body computing a porkchop grid for a planet pair; returns its cheapest cell."""
+    grid = porkchop(ephemeris, origin, target, departures, tofs, **options)
+    job.report(1.0)
+    return None if job.cancelled else best_cell(grid)
+
+
+@PROFILER.timed('tour_search')
+def search_tours(job: Job, ephemeris, origin: str, target: str, flybys: list, launch_start: float,
+                 launch_end: float, **options):
+    """Job body ranking gravity-assist sequences; returns the ranked list, or None once cancelled."""
+    ranked = search_sequences(ephemeris, origin, target, flybys, launch_start, launch_end, progress=job.report,
+                              **options)
+    return None if job.cancelled else ranked
@@ -0,0 +1,87 @@
+# porkchop.py
+
+import os
+import hashlib
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from .gravity import G
+from .lambert import lambert
+from .state_cache import cache_dir, atomic_write
+
+PORKCHOP_BATCH_ROWS = 16  # departure rows per vectorized batch
+
+
+def _heliocentric(ephemeris, name, times, center):
+    x, v = ephemeris.track(name, times)
+    if center is not None:
+        cx, cv = ephemeris.track(center, times)
+        x, v = x - cx, v - cv
+    return np.asarray(x), np.asarray(v)
+
+
+def _solve_rows(r_dep, v_dep, r_arr, v_arr, tofs, mu, normal):
+    v1, v2 = lambert(r_dep[:, np.newaxis], r_arr, tofs[np.newaxis, :], mu, normal)
+    return v1 - v_dep[:, np.newaxis], v2 - v_arr
+
+
+def porkchop(ephemeris, origin: str, target: str, departures, tofs, center: str = 'Sun', workers: int = None,
+             use_cache: bool = True, directory: str = None) -> dict:
+    """
+    Lambert transfers from `origin` to `target` for every departure x time of flight, cached on
+    disk: (D, T) v∞, C3 and total Δv arrays plus the (D, T, 3) departure v∞ vectors.
+    """
+    departures = np.asarray(departures, dtype=np.float64)
+    tofs = np.asarray(tofs, dtype=np.float64)
+    arrivals = (departures[:, np.newaxis] + tofs[np.newaxis, :]).ravel()
+    r_dep, v_dep = _heliocentric(ephemeris, origin, departures, center)
+    r_arr, v_arr = _heliocentric(ephemeris, target, arrivals, center)
+    r_arr, v_arr = r_arr.reshape(len(departures), len(tofs), 3), v_arr.reshape(len(departures), len(tofs), 3)
+    mu = G * float(ephemeris.masses[ephemeris.index(center)])
+    normal = np.cross(r_dep[0], v_dep[0])
+
+    digest = hashlib.sha256(f"{origin}|{target}|{center}|{mu!r}".encode())
+    for arr in (departures, tofs, r_dep, v_dep, r_arr, v_arr):
+        digest.update(np.ascontiguousarray(arr).tobytes())
+    path = os.path.join(directory or cache_dir(), f"porkchop-{digest.hexdigest()[:32]}.npz")
+    if use_cache and os.path.exists(path):
+        with np.load(path) as data:
+            return {key: data[key] for key in data.files}
+
+    batches = [slice(i, i + PORKCHOP_BATCH_ROWS) for i in range(0, len(departures), PORKCHOP_BATCH_ROWS)]
+    with ThreadPoolExecutor(workers or os.cpu_count()) as pool:
+        solved = list(pool.map(lambda b: _solve_rows(r_dep[b], v_dep[b], r_arr[b], v_arr[b], tofs, mu, normal),
+                               batches))
+    vinf_dep = np.concatenate([s[0] for s in solved])
+    vinf_arr = np.concatenate([s[1] for s in solved])
+    grid = {'departures': departures, 'tofs': tofs, 'vinf_departure': vinf_dep,
+            'departure_speed': np.linalg.norm(vinf_dep, axis=-1), 'arrival_speed': np.linalg.norm(vinf_arr, axis=-1)}
+    grid['c3'] = grid['departure_speed'] ** 2
+    grid['total_dv'] = grid['departure_speed'] + grid['arrival_speed']
+    if use_cache:
+        atomic_write(path, lambda f: np.savez(f, **grid))
+    return grid
+
+
+def best_cell(grid: dict, objective: str = 'total_dv', max_c3: float = None) -> dict:
+    """Cheapest cell of a porkchop grid by `objective`, optionally limited to a launch C3 in m²/s²."""
+    cost = np.where(np.isfinite(grid[objective]), grid[objective], np.inf)
+    if max_c3 is not None:
+        cost = np.where(grid['c3'] <= max_c3, cost, np.inf)
+    i, j = np.unravel_index(np.argmin(cost), cost.shape)
+    if not np.isfinite(cost[i, j]):
+        return None
+    return {'departure': float(grid['departures'][i]), 'tof': float(grid['tofs'][j]),
+            'vinf_departure': grid['vinf_departure'][i, j], 'c3': float(grid['c3'][i, j]),
+            'total_dv': float(grid['total_dv'][i, j]), 'cell': (int(i), int(j))}
+
+
+def default_grid(r_origin: float, r_target: float, mu: float, start: float, size: int = 200):
+    """
+    Departure times spanning one synodic period (at most three years) from `start`, and flight
+    times from 0.3 to 2 Hohmann transfer times, for orbits of radii `r_origin` and `r_target`.
+    """
+    hohmann = np.pi * np.sqrt(((r_origin + r_target) / 2) ** 3 / mu)
+    periods = 2 * np.pi * np.sqrt(np.array([r_origin, r_target]) ** 3 / mu)
+    synodic = 1 / abs(1 / periods[0] - 1 / periods[1]) if r_origin != r_target else periods[0]
+    span = min(synodic, 3 * 365.25 * 86400)
+    return start + np.linspace(0, span, size), np.linspace(0.3 * hohmann, 2 * hohmann, size)
@@ -1,92 +1,151 @@
 # prediction.py
 
 import numpy as np
-import copy
-from .gravity import Body, G, EPSILON
-
-
-def gravitational_force_cpu(target, source):
-    """CPU-based force calculation for the predictor."""
-    r_vector = source.position - target.position
-    distance = np.linalg.norm(r_vector)
-    if distance < EPSILON:
-        return np.zeros(3)
-    unit_vector = r_vector / distance
-    force_magnitude = G * source.mass * target.mass / (distance ** 2)
-    return force_magnitude * unit_vector
-
-
-def velocity_verlet_step_cpu(bodies, dt):
-    """A single step of the Velocity-Verlet integrator running on the CPU."""
-    accelerations = []
-    for body1 in bodies:
-        net_force = np.zeros(3)
-        for body2 in bodies:
-            if body1 is body2: continue
-            net_force += gravitational_force_cpu(body1, body2)
-        accelerations.append(net_force / body1.mass)
-
-    new_positions = []
-    for i, body in enumerate(bodies):
-        new_pos = body.position + body.velocity * dt + 0.5 * accelerations[i] * dt ** 2
-        new_positions.append(new_pos)
-
-    new_accelerations = []
-    temp_bodies = [copy.copy(b) for b in bodies]
-    for i, body in enumerate(temp_bodies):
-        body.position = new_positions[i]
-
-    for body1 in temp_bodies:
-        net_force = np.zeros(3)
-        for body2 in temp_bodies:
-            if body1 is body2: continue
-            net_force += gravitational_force_cpu(body1, body2)
-        new_accelerations.append(net_force / body1.mass)
-
-    for i, body in enumerate(bodies):
-        body.velocity += 0.5 * (accelerations[i] + new_accelerations[i]) * dt
-        body.position = new_positions[i]
-
-
-def run_prediction(bodies: list, probe: Body, duration_days: int, dt: float) -> np.ndarray:
-    """Runs a temporary, in-memory simulation to predict a probe's trajectory."""
-    sim_bodies = copy.deepcopy(bodies)
-    sim_probe = copy.deepcopy(probe)
-
-    all_sim_bodies = sim_bodies + [sim_probe]
+from .backend import get_backend, get_array_module, asnumpy
+from .gravity import Body, GravityField
+from .integrators import make_integrator
+from .solvers import make_solver, make_field_solver
+from .ephemeris import Ephemeris, EphemerisField
+from .events import StepInterval
 
-    num_steps = int(duration_days * 86400 / dt)
-    path = np.zeros((num_steps, 3))
 
-    for i in range(num_steps):
-        velocity_verlet_step_cpu(all_sim_bodies, dt)
-        path[i] = sim_probe.position
+def state_arrays(bodies: list, xp=np):
+    """Packs Body objects into contiguous (N, 3) position/velocity and (N,) mass arrays."""
+    positions = xp.array([b.position for b in bodies], dtype=xp.float64)
+    velocities = xp.array([b.velocity for b in bodies], dtype=xp.float64)
+    masses = xp.array([b.mass for b in bodies], dtype=xp.float64)
+    return positions, velocities, masses
+
+
+def _sum_sq(vectors):
+    return (vectors * vectors).sum(axis=-1)
+
+
+class PathRecorder:
+    """Streamed reducer that keeps the full (K, num_steps, 3) probe paths."""
+    def __init__(self, num_probes: int, num_steps: int, xp=np):
+        self.paths = xp.zeros((num_probes, num_steps, 3))
+        self.last_step = -1
+
+    def update(self, i, probe_positions, body_positions):
+        self.paths[:, i] = probe_positions
+        self.last_step = i
+
+    def result(self) -> np.ndarray:
+        if 0 <= self.last_step < self.paths.shape[1] - 1:
+            self.paths[:, self.last_step + 1:] = self.paths[:, self.last_step:self.last_step + 1]
+        return asnumpy(self.paths)
 
-        if np.linalg.norm(sim_probe.position) > 2e13:
-            path[i:] = sim_probe.position
-            break
-    return path
 
+class FinalPositions:
+    """Streamed reducer keeping only the probes' latest positions, for runs scored by events."""
+    def __init__(self, num_probes: int, xp=np):
+        self.positions = xp.zeros((num_probes, 3))
 
-def evaluate_trajectory(path: np.ndarray, target_body: Body, bodies: list, dt: float) -> float:
-    """Calculates the closest approach of a trajectory to a target body."""
-    sim_bodies = copy.deepcopy(bodies)
-    target_sim = next((b for b in sim_bodies if b.name == target_body.name), None)
-    if not target_sim: return float('inf')
+    def update(self, i, probe_positions, body_positions):
+        self.positions[:] = probe_positions
 
-    target_path = np.zeros_like(path)
-    for i in range(len(path)):
-        target_path[i] = target_sim.position
+    def result(self) -> np.ndarray:
+        return asnumpy(self.positions)
 
-        # Update target's position based on gravity from all other major bodies
-        net_force = np.zeros(3)
-        for other_body in sim_bodies:
-            if other_body is target_sim: continue
-            net_force += gravitational_force_cpu(target_sim, other_body)
 
-        accel = net_force / target_sim.mass
-        target_sim.velocity += accel * dt
-        target_sim.position += target_sim.velocity * dt
+PROGRESS_EVERY = 64  # steps between progress callbacks
 
-    distances = np.linalg.norm(path - target_path, axis=1)
-    return np.min(distances)
\ No newline at end of file
+
+def _event_snapshot(field, x, v, t):
+    n_active = field.n_active
+    body_x, body_v = field.body_states(x, v, t)
+    return x[n_active:].copy(), v[n_active:].copy(), body_x.copy(), body_v.copy()
+
+
+def propagate_ensemble(x, v, field: GravityField, dt: float, num_steps: int, reducer, integrator,
+                       escape_radius: float = 2e13, progress=None, events=()):
+    """
+    Advances a tiered state (massive rows, then probes) in place by `num_steps` steps of `dt`,
+    freezing probes stopped by a terminal event or beyond `escape_radius`.
+    """
+    xp = get_array_module(x)
+    n_active = field.n_active
+    probe_x, probe_v = x[n_active:], v[n_active:]
+    escape_radius_sq = escape_radius ** 2 if escape_radius else xp.inf
+    held = xp.zeros(x.shape[0], dtype=bool)
+    stopped = held[n_active:]  # a view, so that the integrator sees every update
+    integrator.stopped = held
+    frozen = xp.zeros_like(probe_x)
+    if events:
+        start = _event_snapshot(field, x, v, 0.0)
+
+    for i in range(num_steps):
+        integrator.step(x, v, i * dt, dt, field)
+
+        halted = _sum_sq(probe_x) > escape_radius_sq
+        if events:
+            end = _event_snapshot(field, x, v, (i + 1) * dt)
+            step = StepInterval(i * dt, (i + 1) * dt, start, end)
+            for event in events:
+                fired = event.check(step, ~stopped)
+                if event.terminal:
+                    halted |= fired
+            start = end
+        if halted.any():
+            newly_stopped = halted & ~stopped
+            stopped |= newly_stopped
+            frozen[newly_stopped] = probe_x[newly_stopped]
+        if stopped.any():
+            probe_x[stopped] = frozen[stopped]
+            probe_v[stopped] = 0.0
+        reducer.update(i, probe_x, field.body_positions(x, (i + 1) * dt))
+        if stopped.all():
+            break
+        if progress is not None and (i + 1) % PROGRESS_EVERY == 0 and progress(i + 1) is False:
+            break
+    return reducer.result()
+
+
+def run_ensemble_prediction(bodies: list, launch_positions, launch_velocities, duration_days: int, dt: float,
+                            backend: str = None, reducer=None, integrator: str = 'leapfrog',
+                            tolerance: float = None, solver: str = 'direct', ephemeris: Ephemeris = None,
+                            epoch: float = None, progress=None, events=()):
+    """
+    Predicts K probe trajectories at once as massless particles among `bodies`, or among an
+    `ephemeris` from `epoch`; returns (K, num_steps, 3) paths or `reducer.result()`.
+    """
+    xp = get_backend(backend)
+    x = xp.array(launch_positions, dtype=xp.float64).reshape(-1, 3)
+    v = xp.array(launch_velocities, dtype=xp.float64).reshape(-1, 3)
+    num_steps = int(duration_days * 86400 / dt)
+    if reducer is None:
+        reducer = PathRecorder(x.shape[0], num_steps, xp)
+    if ephemeris is not None:
+        field = EphemerisField(ephemeris, epoch, make_field_solver(solver))
+    else:
+        positions, velocities, masses = state_arrays(bodies, xp)
+        x, v = xp.concatenate([positions, x]), xp.concatenate([velocities, v])
+        field = GravityField(masses, solver=make_solver(solver), field_solver=make_field_solver(solver))
+    return propagate_ensemble(x, v, field, dt, num_steps, reducer, make_integrator(integrator, tolerance),
+                              progress=progress, events=events)
+
+
+def run_prediction(bodies: list, probe: Body, duration_days: int, dt: float, backend: str = None,
+                   integrator: str = 'leapfrog', tolerance: float = None, solver: str = 'direct',
+                   ephemeris: Ephemeris = None, epoch: float = None) -> np.ndarray:
+    """Runs a temporary, array-based simulation to predict a probe's trajectory."""
+    return run_ensemble_prediction(bodies, probe.position, probe.velocity, duration_days, dt, backend,
+                                   integrator=integrator, tolerance=tolerance, solver=solver,
+                                   ephemeris=ephemeris, epoch=epoch)[0]
+
+
+def evaluate_trajectory(path: np.ndarray, target_body: Body, bodies: list, dt: float,
+                        ephemeris: Ephemeris = None, epoch: float = None) -> float:
+    """
+    Calculates the closest approach of a trajectory (one row per step of `dt`) to a target
+    body. The target track is read from `ephemeris` starting at `epoch`; without one it comes
+    from the same leapfrog integration of `bodies` that an integrated prediction performs.
+    """
+    if ephemeris is None:
+        ephemeris, epoch = Ephemeris.from_bodies(bodies, dt, len(path)), 0.0
+    if target_body.name not in ephemeris.names: return float('inf')
+    epoch = ephemeris.start if epoch is None else epoch
+    target_path, _ = ephemeris.track(target_body.name, epoch + dt * np.arange(1, len(path) + 1))
+    distances = np.linalg.norm(path - asnumpy(target_path), axis=1)
+    return np.min(distances)
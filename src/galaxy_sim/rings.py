@@ -0,0 +1,117 @@
+# rings.py
+
+import numpy as np
+from .backend import get_array_module, asnumpy
+from .gravity import G, Ring, field_accelerations
+from .kepler import kepler_drift, elliptic_drift
+
+RING_PARTICLES = 20_000
+RING_THICKNESS = 100.0  # m, standard deviation of the particles' height above the ring plane
+RING_PERTURBERS = 4  # massive bodies, other than the parent, whose pull is applied
+RING_KICKS_PER_ORBIT = 16  # perturbation kicks per orbit of the innermost particles
+RING_MAX_KICKS = 64  # per advance(); longer advances are kicked over their first RING_MAX_KICKS kick steps only
+
+
+def plane_basis(normal) -> np.ndarray:
+    """Two orthonormal vectors spanning the plane perpendicular to `normal`."""
+    normal = np.asarray(normal, dtype=np.float64)
+    normal = normal / np.linalg.norm(normal)
+    seed = np.eye(3)[np.argmin(np.abs(normal))]
+    u = np.cross(normal, seed)
+    u /= np.linalg.norm(u)
+    return np.array([u, np.cross(normal, u)])
+
+
+def seed_ring(ring: Ring, mu: float, count: int, thickness: float = RING_THICKNESS, rng=None):
+    """
+    Host (count, 3) positions and velocities, relative to the parent, of particles spread
+    uniformly over the ring's area between its inner and outer radius, each on a circular
+    orbit about a parent with gravitational parameter `mu`.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    inner, outer = ring.inner_radius, ring.outer_radius
+    radius = np.sqrt(rng.uniform(inner * inner, outer * outer, count))
+    phase = rng.uniform(0, 2 * np.pi, count)
+    u, w = plane_basis(ring.normal)
+    normal = np.cross(u, w)
+    radial = np.cos(phase)[:, None] * u + np.sin(phase)[:, None] * w
+    along = -np.sin(phase)[:, None] * u + np.cos(phase)[:, None] * w
+    positions = radius[:, None] * radial + rng.normal(0, thickness, count)[:, None] * normal
+    velocities = np.sqrt(mu / radius)[:, None] * along
+    return positions, velocities
+
+
+class RingSystem:
+    """
+    Massless particles of one ring, relative to their parent, advanced by Kepler drifts about
+    it interleaved with tidal kicks from the `perturbers` strongest other bodies.
+    """
+    def __init__(self, ring: Ring, parent_mass: float, count: int = RING_PARTICLES,
+                 thickness: float = RING_THICKNESS, perturbers: int = RING_PERTURBERS,
+                 kicks_per_orbit: int = RING_KICKS_PER_ORBIT, max_kicks: int = RING_MAX_KICKS,
+                 seed: int = None, xp=np):
+        self.ring = ring
+        self.parent = ring.body_name
+        self.parent_mass = parent_mass
+        self.mu = G * parent_mass
+        self.perturbers = perturbers
+        self.kick_step = 2 * np.pi * np.sqrt(ring.inner_radius ** 3 / self.mu) / kicks_per_orbit
+        self.max_kicks = max_kicks
+        self.perturbed = False  # whether the last advance applied kicks
+        positions, velocities = seed_ring(ring, self.mu, count, thickness, np.random.default_rng(seed))
+        self.positions, self.velocities = xp.asarray(positions), xp.asarray(velocities)
+        self.nearest = np.zeros(0, dtype=int)  # rows of the bodies used as perturbers by the last advance
+
+    @property
+    def count(self) -> int:
+        return self.positions.shape[0]
+
+    def choose_perturbers(self, offsets, masses, parent_row: int) -> np.ndarray:
+        """Rows of the bodies with the largest tidal pull m / d^3 at the parent, strongest first."""
+        xp = get_array_module(offsets)
+        d = xp.sqrt((offsets * offsets).sum(axis=1))
+        d[parent_row] = xp.inf
+        tidal = asnumpy(masses / (d * d * d))
+        k = min(self.perturbers, len(tidal) - 1)
+        if k <= 0:
+            return np.zeros(0, dtype=int)
+        rows = np.argpartition(-tidal, k - 1)[:k]
+        return rows[np.argsort(-tidal[rows])]
+
+    def _kick_accelerations(self, offsets, masses):
+        """Perturbing acceleration of every particle, less the same bodies' pull on the parent."""
+        xp = get_array_module(self.positions)
+        direct = field_accelerations(self.positions, offsets, masses)
+        indirect = field_accelerations(xp.zeros((1, 3)), offsets, masses)
+        return direct - indirect
+
+    def advance(self, duration: float, positions, velocities, masses, parent_row: int):
+        """
+        Moves the particles on by `duration` seconds, given the massive bodies' positions,
+        velocities and masses at the start and the row of the parent among them. At most
+        `max_kicks` kicks are applied, over the start of the interval.
+        """
+        if duration == 0 or self.count == 0: return
+        xp = get_array_module(self.positions)
+        offsets = positions - positions[parent_row]
+        drift = velocities - velocities[parent_row]
+        rows = self.choose_perturbers(offsets, masses, parent_row)
+        steps = max(1, int(np.ceil(abs(duration) / self.kick_step)))
+        kicked = duration
+        if steps > self.max_kicks:
+            # Kicks further apart than kick_step alias with the orbits, so the rest is a plain drift.
+            steps, kicked = self.max_kicks, np.copysign(self.max_kicks * self.kick_step, duration)
+        self.nearest, self.perturbed = rows, len(rows) > 0
+        h = kicked / steps
+        if len(rows):
+            index = xp.asarray(rows)
+            offsets, drift, masses = offsets[index], drift[index], masses[index]
+            mu = G * (self.parent_mass + masses)
+            self.velocities += h / 2 * self._kick_accelerations(offsets, masses)
+        for s in range(steps):
+            self.positions, self.velocities = elliptic_drift(self.positions, self.velocities, self.mu, h)
+            if len(rows):
+                at = kepler_drift(offsets, drift, mu, (s + 1) * h)[0]
+                self.velocities += (h if s < steps - 1 else h / 2) * self._kick_accelerations(at, masses)
+        if kicked != duration:
+            self.positions, self.velocities = elliptic_drift(self.positions, self.velocities, self.mu, duration - kicked)
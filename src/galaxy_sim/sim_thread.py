@@ -0,0 +1,134 @@
+# sim_thread.py
+
+import time
+import queue
+import threading
+import numpy as np
+from concurrent.futures import Future
+from .engine import SimulationEngine
+from .instrument import PROFILER
+
+MAX_BATCH_STEPS = 1024  # steps per fused engine call; a sim that falls further behind drops the excess
+IDLE_WAIT_S = 0.005
+
+
+class Snapshot:
+    """
+    Read-only engine state at one instant. Its arrays belong to the publisher's double buffer,
+    so a snapshot stays valid until the consumer's next SimulationThread.latest() call.
+    """
+    def __init__(self, et: float, steps: int, names: tuple, index: dict, positions, velocities, ring_positions):
+        self.et, self.steps = et, steps
+        self.names, self.index = names, index
+        self.positions, self.velocities = positions.view(), velocities.view()
+        self.ring_positions = ring_positions.view()  # every ring particle relative to its parent
+        self.positions.flags.writeable = self.velocities.flags.writeable = self.ring_positions.flags.writeable = False
+
+    def update_bodies(self, bodies: list):
+        """Copies the snapshot into Body objects, like engine.update_body_objects."""
+        with PROFILER.timer('update_body_objects'):
+            for body in bodies:
+                row = self.index.get(body.name)
+                if row is None: continue
+                body.position = self.positions[row].copy()
+                body.velocity = self.velocities[row].copy()
+
+
+class SimulationThread:
+    """
+    Steps an engine on its own thread at `steps_per_second` steps of `dt`, publishing snapshots
+    through a double buffer. Changes to the engine go through call().
+    """
+    def __init__(self, engine: SimulationEngine, dt: float, steps_per_second: float = 60.0, on_steps=None):
+        self.engine = engine
+        self.dt = dt
+        self.steps_per_second = steps_per_second
+        self.paused = False
+        self.steps = 0
+        self.on_steps = on_steps  # on_steps(engine, steps) after every batch, on the sim thread
+        self._calls = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._front = self._back = None
+        self._taken, self._dirty = True, False
+        self._names, self._index = None, None
+        self._thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+
+    def start(self):
+        self._publish()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def call(self, fn, *args, **kwargs) -> Future:
+        """Runs fn(*args, **kwargs) on the sim thread before its next batch; the Future holds the result."""
+        future = Future()
+        self._calls.put((future, fn, args, kwargs))
+        self._wake.set()
+        return future
+
+    def latest(self) -> Snapshot:
+        """The newest published state; releases the snapshot returned by the previous call."""
+        with self._lock:
+            self._taken = True
+            return self._front
+
+    def _run_calls(self) -> bool:
+        ran = False
+        while True:
+            try:
+                future, fn, args, kwargs = self._calls.get_nowait()
+            except queue.Empty:
+                return ran
+            ran = True
+            if not future.set_running_or_notify_cancel(): continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _publish(self):
+        """Copies the engine state into the back buffer and swaps it to the front."""
+        engine = self.engine
+        names = tuple(engine.body_names())
+        if names != self._names:
+            self._names, self._index = names, {name: i for i, name in enumerate(names)}
+        back = self._back
+        particles = sum(system.count for system in engine.rings)
+        if back is None or back[0].shape != (engine.n_bodies, 3) or back[2].shape != (particles, 3):
+            back = (np.empty((engine.n_bodies, 3)), np.empty((engine.n_bodies, 3)), np.empty((particles, 3)))
+        engine.get_positions(out=back[0]); engine.get_velocities(out=back[1])
+        if particles: engine.get_ring_positions(out=back[2])
+        snapshot = Snapshot(engine.et, self.steps, self._names, self._index, *back)
+        with self._lock:
+            old = self._front
+            self._front, self._taken = snapshot, False
+        self._back = None if old is None else (old.positions.base, old.velocities.base, old.ring_positions.base)
+        self._dirty = False
+
+    def _run(self):
+        owed, last = 0.0, time.perf_counter()
+        while not self._stop.is_set():
+            self._dirty |= self._run_calls()
+            now = time.perf_counter()
+            if not self.paused:
+                owed = min(owed + (now - last) * self.steps_per_second, MAX_BATCH_STEPS)
+            last = now
+            steps = int(owed)
+            if steps:
+                self.engine.advance(self.dt, steps)
+                self.steps += steps
+                owed -= steps
+                self._dirty = True
+                if self.on_steps: self.on_steps(self.engine, steps)
+            if self._dirty and self._taken:
+                self._publish()
+            elif not steps:
+                self._wake.wait(IDLE_WAIT_S)
+                self._wake.clear()
@@ -1,8 +1,14 @@
 # solar_system.py
 
-import spiceypy as spice
+import threading
 import numpy as np
-from .gravity import Body
+from .gravity import Body, Ring
+from .ephemeris import Ephemeris
+from . import state_cache
+
+_furnished = set()
+# CSPICE is not thread-safe: every call made while other threads run goes through this lock.
+SPICE_LOCK = threading.RLock()
 
 BODY_DATA = {
     'SUN': {'mass': 1.989e30, 'type': 'star'}, 'MERCURY': {'mass': 3.3011e23, 'type': 'planet'},
@@ -22,7 +28,64 @@ BODY_DATA = {
 }
 
 
+# Ring annuli in metres from the planet's centre; normals are the planets' J2000 poles.
+RINGS = [Ring('Saturn', 7.4658e7, 1.36775e8, (0.85, 0.78, 0.62),
+              normal=(np.cos(np.radians(83.537)) * np.cos(np.radians(40.589)),
+                      np.cos(np.radians(83.537)) * np.sin(np.radians(40.589)), np.sin(np.radians(83.537))))]
+
+
+def clean_name(spice_name: str) -> str:
+    """Display name used for a BODY_DATA entry, e.g. 'MARS BARYCENTER' -> 'Mars'."""
+    return spice_name.replace(' BARYCENTER', '').capitalize()
+
+
+SPICE_NAMES = {clean_name(name): name for name in BODY_DATA}
+
+
+def furnish_kernels(*paths):
+    """Loads SPICE kernels on first use; spiceypy itself is only imported here."""
+    import spiceypy as spice
+    with SPICE_LOCK:
+        for path in paths:
+            if path not in _furnished:
+                spice.furnsh(path)
+                _furnished.add(path)
+
+
+def clear_kernels():
+    if _furnished:
+        import spiceypy as spice
+        with SPICE_LOCK:
+            spice.kclear()
+            _furnished.clear()
+
+
+def spice_states(name: str, times) -> np.ndarray:
+    """(T, 6) J2000 barycentric states in metres and m/s of a body, by display name."""
+    import spiceypy as spice
+    with SPICE_LOCK:
+        states, _ = spice.spkezr(SPICE_NAMES[name], list(times), "J2000", "NONE", "0")
+    return np.asarray(states) * 1000.0
+
+
+def utc(et: float, precision: int = 0) -> str:
+    """Calendar UTC string of an ephemeris time, e.g. '2025 JUN 01 00:00:00'."""
+    import spiceypy as spice
+    with SPICE_LOCK:
+        return spice.et2utc(et, "C", precision)
+
+
+def load_ephemeris_from_spice(bodies: list, et_start: float, et_end: float, **options) -> Ephemeris:
+    """Samples the loaded kernels once over [et_start, et_end] for every body in BODY_DATA."""
+    bodies = [b for b in bodies if b.name in SPICE_NAMES]
+    ephemeris = Ephemeris.sample([b.name for b in bodies], [b.mass for b in bodies], spice_states,
+                                 et_start, et_end, **options)
+    print(f"✔ Sampled ephemeris for {len(bodies)} bodies over {(et_end - et_start) / 86400:.0f} days.")
+    return ephemeris
+
+
 def load_bodies_from_spice(spk_path, et):
+    import spiceypy as spice
     bodies = []
     ids = spice.spkobj(spk_path)
 
@@ -39,11 +102,31 @@ def load_bodies_from_spice(spk_path, et):
         pos_m = np.array(state[:3]) * 1000.0;
         vel_m_s = np.array(state[3:]) * 1000.0
         body_info = BODY_DATA[name]
-        clean_name = name.replace(' BARYCENTER', '').capitalize()
         parent = body_info.get('parent')
-        b = Body(name=clean_name, position=pos_m, velocity=vel_m_s, mass=body_info['mass'], body_type=body_info['type'],
+        b = Body(name=clean_name(name), position=pos_m, velocity=vel_m_s, mass=body_info['mass'], body_type=body_info['type'],
                  parent=parent)
         bodies.append(b)
 
     print(f"✔ Loaded {len(bodies)} celestial bodies.")
-    return bodies
\ No newline at end of file
+    return bodies
+
+
+def load_initial_state(spk_path: str, tls_path: str, epoch: str, use_cache: bool = True):
+    """
+    Returns (bodies, et) at a UTC/TDB epoch string. Repeat runs with unchanged kernels, epoch
+    and BODY_DATA are served from the state cache without touching SPICE.
+    """
+    key = state_cache.state_key([spk_path, tls_path], epoch, BODY_DATA) if use_cache else None
+    cached = state_cache.load_state(key) if key else None
+    if cached:
+        print(f"✔ Loaded {len(cached[0])} celestial bodies from the state cache.")
+        return cached
+
+    import spiceypy as spice
+    furnish_kernels(tls_path, spk_path)
+    print("✔ SPICE kernels loaded.")
+    et = spice.str2et(f"{epoch} TDB")
+    bodies = load_bodies_from_spice(spk_path, et)
+    if key and bodies:
+        state_cache.save_state(key, bodies, et)
+    return bodies, et
@@ -0,0 +1,31 @@
+# solvers.py
+
+from functools import partial
+from .gravity import update_accelerations_gpu, field_accelerations
+from .barnes_hut import barnes_hut_accelerations
+from .tiled_kernel import tiled_accelerations, tiled_field_accelerations
+
+# Every solver shares the (positions, masses) -> accels signature of update_accelerations_gpu.
+SOLVERS = {
+    'direct': update_accelerations_gpu,
+    'barnes_hut': barnes_hut_accelerations,
+    'tiled': tiled_accelerations,
+}
+
+# Kernels for massless rows, (points, positions, masses) -> accels; solvers without an entry
+# fall back to the dense field_accelerations.
+FIELD_SOLVERS = {
+    'tiled': tiled_field_accelerations,
+}
+
+
+def make_solver(name: str = 'direct', **options):
+    """Returns the named acceleration solver with any tuning options (e.g. theta) bound."""
+    if name not in SOLVERS:
+        raise ValueError(f"Unknown solver '{name}', expected one of {sorted(SOLVERS)}")
+    return partial(SOLVERS[name], **options) if options else SOLVERS[name]
+
+
+def make_field_solver(name: str = 'direct'):
+    """Returns the massless-particle kernel that pairs with the named solver."""
+    return FIELD_SOLVERS.get(name, field_accelerations)
@@ -0,0 +1,86 @@
+# state_cache.py
+
+import os
+import json
+import zipfile
+import hashlib
+import numpy as np
+from .gravity import Body
+
+CACHE_ENV_VAR = "GALAXY_SIM_CACHE_DIR"
+CACHE_VERSION = 1
+HASH_CHUNK_BYTES = 1 << 20
+
+
+def cache_dir() -> str:
+    return os.environ.get(CACHE_ENV_VAR) or os.path.join(os.path.expanduser("~"), ".cache", "galaxy_sim")
+
+
+def atomic_write(path: str, write):
+    """Writes through a temporary file in the same directory, then renames it into place."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            write(f)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp): os.remove(tmp)
+
+
+def file_digest(path: str, directory: str = None) -> str:
+    """
+    SHA-256 of a file's contents. Digests are remembered per (path, size, mtime), so a large
+    kernel is only read in full the first time it is seen or after it changes.
+    """
+    index_path = os.path.join(directory or cache_dir(), "digests.json")
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    if key not in index:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+                digest.update(chunk)
+        index[key] = digest.hexdigest()
+        atomic_write(index_path, lambda f: f.write(json.dumps(index, indent=1).encode()))
+    return index[key]
+
+
+def state_key(kernel_paths: list, epoch: str, body_data: dict, directory: str = None) -> str:
+    """Cache key covering everything the initial state depends on."""
+    payload = {'version': CACHE_VERSION, 'epoch': epoch, 'bodies': body_data,
+               'kernels': [file_digest(p, directory) for p in kernel_paths]}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _state_path(key: str, directory: str = None) -> str:
+    return os.path.join(directory or cache_dir(), f"state-{key[:32]}.npz")
+
+
+def save_state(key: str, bodies: list, et: float, directory: str = None):
+    arrays = {
+        'et': np.float64(et),
+        'names': np.array([b.name for b in bodies]), 'types': np.array([b.body_type for b in bodies]),
+        'parents': np.array([b.parent or '' for b in bodies]),
+        'masses': np.array([b.mass for b in bodies], dtype=np.float64),
+        'positions': np.array([b.position for b in bodies], dtype=np.float64).reshape(-1, 3),
+        'velocities': np.array([b.velocity for b in bodies], dtype=np.float64).reshape(-1, 3),
+    }
+    atomic_write(_state_path(key, directory), lambda f: np.savez(f, **arrays))
+
+
+def load_state(key: str, directory: str = None):
+    """Returns (bodies, et) for a cached state, or None on a miss or an unreadable entry."""
+    try:
+        with np.load(_state_path(key, directory)) as data:
+            bodies = [Body(mass=float(m), position=p, velocity=v, name=str(n), body_type=str(t), parent=str(pa) or None)
+                      for n, t, pa, m, p, v in zip(data['names'], data['types'], data['parents'], data['masses'],
+                                                   data['positions'], data['velocities'])]
+            return bodies, float(data['et'])
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        return None
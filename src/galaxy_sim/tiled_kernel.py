@@ -0,0 +1,125 @@
+# tiled_kernel.py
+
+import numpy as np
+from .backend import get_array_module, asnumpy
+from .gravity import G, EPSILON
+
+try:
+    import numba
+    from numba import njit, prange
+except ImportError:
+    numba = None
+
+TILE_SIZE = 256
+
+
+if numba is not None:
+    # Module-level kernels, so Numba's on-disk cache can key them by file and name.
+    @njit(parallel=True, fastmath=False, cache=True)
+    def _pair_kernel(pos, mass, tile, n_threads):
+        n = pos.shape[0]
+        n_tiles = (n + tile - 1) // tile
+        # One private accumulator per thread, so both halves of a symmetric pair update can be
+        # written without races; memory is O(threads * N), independent of the N^2 pair count.
+        partial = np.zeros((n_threads, n, 3))
+        for task in prange((n_tiles + 1) // 2):
+            acc = partial[numba.get_thread_id()]
+            # Rows near the top of the triangle have the most pairs, so each task takes one
+            # tile from the top and its mirror from the bottom to keep the work even.
+            for half in range(2):
+                bi = task if half == 0 else n_tiles - 1 - task
+                if half == 1 and bi == task:
+                    continue
+                i0, i1 = bi * tile, min(bi * tile + tile, n)
+                # Each j tile is reused by every row of the i tile while it is still in cache.
+                for bj in range(bi, n_tiles):
+                    j0, j1 = bj * tile, min(bj * tile + tile, n)
+                    for i in range(i0, i1):
+                        xi, yi, zi = pos[i, 0], pos[i, 1], pos[i, 2]
+                        ax = ay = az = 0.0
+                        for j in range(max(i + 1, j0), j1):
+                            dx = pos[j, 0] - xi
+                            dy = pos[j, 1] - yi
+                            dz = pos[j, 2] - zi
+                            d = np.sqrt(dx * dx + dy * dy + dz * dz) + EPSILON
+                            inv3 = G / (d * d * d)
+                            wj = mass[j] * inv3
+                            wi = mass[i] * inv3
+                            ax += wj * dx; ay += wj * dy; az += wj * dz
+                            acc[j, 0] -= wi * dx; acc[j, 1] -= wi * dy; acc[j, 2] -= wi * dz
+                        acc[i, 0] += ax; acc[i, 1] += ay; acc[i, 2] += az
+        out = np.zeros((n, 3))
+        for k in range(n_threads):
+            out += partial[k]
+        return out
+
+    @njit(parallel=True, fastmath=False, cache=True)
+    def _field_kernel(points, pos, mass, tile):
+        n_points, n = points.shape[0], pos.shape[0]
+        out = np.zeros((n_points, 3))
+        for bk in prange((n_points + tile - 1) // tile):
+            k0, k1 = bk * tile, min(bk * tile + tile, n_points)
+            for j0 in range(0, n, tile):
+                j1 = min(j0 + tile, n)
+                for k in range(k0, k1):
+                    px, py, pz = points[k, 0], points[k, 1], points[k, 2]
+                    ax = ay = az = 0.0
+                    for j in range(j0, j1):
+                        dx = pos[j, 0] - px
+                        dy = pos[j, 1] - py
+                        dz = pos[j, 2] - pz
+                        d = np.sqrt(dx * dx + dy * dy + dz * dz) + EPSILON
+                        w = G * mass[j] / (d * d * d)
+                        ax += w * dx; ay += w * dy; az += w * dz
+                    out[k, 0] += ax; out[k, 1] += ay; out[k, 2] += az
+        return out
+
+    _compiled = (_pair_kernel, _field_kernel, numba.get_num_threads)
+else:
+    _compiled = False
+
+
+def _compile():
+    """The Numba kernels (compiled on first call), or None if Numba is not installed."""
+    return _compiled or None
+
+
+def _numpy_tiled_field(points, positions, masses, tile):
+    """Row-tiled NumPy fallback: temporaries are (tile, N, 3) rather than (K, N, 3)."""
+    out = np.empty_like(points)
+    for r0 in range(0, len(points), tile):
+        block = points[r0:r0 + tile]
+        r = positions[np.newaxis, :, :] - block[:, np.newaxis, :]
+        d = np.sqrt(np.einsum('kjd,kjd->kj', r, r)) + EPSILON
+        w = (G * masses) / (d * d * d)
+        out[r0:r0 + tile] = (w[:, np.newaxis, :] @ r)[:, 0, :]
+    return out
+
+
+def tiled_accelerations(positions, masses, tile_size: int = TILE_SIZE):
+    """
+    Direct-sum accelerations with bounded memory, matching update_accelerations_gpu to round-off.
+    With Numba this is a multithreaded kernel over i x j tiles that visits each pair once and
+    applies Newton's third law to both bodies; without it, a row-tiled NumPy loop. Runs on the host.
+    """
+    xp = get_array_module(positions)
+    pos = np.ascontiguousarray(asnumpy(positions), dtype=np.float64)
+    mass = np.ascontiguousarray(asnumpy(masses), dtype=np.float64)
+    kernels = _compile()
+    if kernels is None:
+        # The field kernel at the bodies' own positions is the direct sum: the self term has r = 0.
+        return xp.asarray(_numpy_tiled_field(pos, pos, mass, tile_size))
+    pair_kernel, _, num_threads = kernels
+    return xp.asarray(pair_kernel(pos, mass, tile_size, num_threads()))
+
+
+def tiled_field_accelerations(points, positions, masses, tile_size: int = TILE_SIZE):
+    """Bounded-memory, multithreaded counterpart of field_accelerations for massless points."""
+    xp = get_array_module(points)
+    pts = np.ascontiguousarray(asnumpy(points), dtype=np.float64)
+    pos = np.ascontiguousarray(asnumpy(positions), dtype=np.float64)
+    mass = np.ascontiguousarray(asnumpy(masses), dtype=np.float64)
+    kernels = _compile()
+    if kernels is None:
+        return xp.asarray(_numpy_tiled_field(pts, pos, mass, tile_size))
+    return xp.asarray(kernels[1](pts, pos, mass, tile_size))
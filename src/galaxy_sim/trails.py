@@ -0,0 +1,166 @@
+# trails.py
+
+import numpy as np
+from vispy import gloo
+from vispy.visuals import Visual
+from vispy.scene.visuals import create_visual_node
+
+MAX_ALPHA = 0.9  # opacity of the newest trail segment; the oldest fades to 0
+REBASE_FRAMES = 1 << 20  # keeps frame counts exact in the shader's float32
+UNUSED = np.finfo(np.float32).max  # birth frame of empty columns, which are never drawn
+
+
+class TrailBuffer:
+    """
+    Position history of many bodies in one preallocated ring of line segments, laid out
+    (trail_length, 2, capacity): slot, segment end, body column.
+    """
+    def __init__(self, trail_length: int, capacity: int = 64):
+        self.length = trail_length
+        self.head = -1  # slot of the newest sample
+        self.frame = 0  # samples written
+        self.names = []
+        self.columns = {}
+        self._dirty = []
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        """(Re)allocates for `capacity` bodies, keeping the existing columns."""
+        L = self.length
+        old = (self.vertices, self.colors, self.born) if hasattr(self, 'vertices') else None
+        self.capacity = capacity
+        self.vertices = np.zeros((L, 2, capacity, 3), dtype=np.float32)
+        self.colors = np.zeros((L, 2, capacity, 3), dtype=np.float32)
+        self.born = np.full((L, 2, capacity), UNUSED, dtype=np.float32)
+        self.segment = np.broadcast_to(np.arange(L, dtype=np.float32)[:, None, None], self.born.shape).copy()
+        self.end = np.broadcast_to(np.arange(2, dtype=np.float32)[None, :, None], self.born.shape).copy()
+        # Each segment is a (start, end) vertex pair for 'lines' drawing.
+        first = (np.arange(L)[:, None] * 2 * capacity + np.arange(capacity)).ravel()
+        self.indices = np.stack([first, first + capacity], axis=1).astype(np.uint32)
+        if old is not None:
+            n = old[0].shape[2]
+            self.vertices[:, :, :n], self.colors[:, :, :n], self.born[:, :, :n] = old
+        self.resized = True
+
+    def add(self, name: str, color) -> int:
+        """Adds a body whose trail starts with the next write(); returns its column."""
+        if len(self.names) == self.capacity:
+            self._allocate(2 * self.capacity)
+        col = len(self.names)
+        self.names.append(name)
+        self.columns[name] = col
+        self.colors[:, :, col] = color[:3]
+        self.born[:, :, col] = self.frame
+        self.resized = True
+        return col
+
+    def write(self, positions):
+        """Appends one (n_bodies, 3) sample per body, in column order."""
+        n = len(self.names)
+        self.head = (self.head + 1) % self.length
+        self.frame += 1
+        previous = (self.head - 1) % self.length
+        self.vertices[self.head, 0, :n] = positions
+        self.vertices[previous, 1, :n] = positions
+        for slot, end in ((self.head, 0), (previous, 1)):
+            self._dirty.append(((slot * 2 + end) * self.capacity, self.vertices[slot, end, :n]))
+        if self.frame >= REBASE_FRAMES:
+            # Only ages up to the trail length matter, so the counters can be shifted back.
+            self.born = np.maximum(self.born - self.frame, -self.length)
+            self.frame = 0
+            self.resized = True
+
+    def take_dirty(self) -> list:
+        """(vertex offset, block) pairs written since the last call."""
+        dirty, self._dirty = self._dirty, []
+        return dirty
+
+    def samples(self, name: str) -> np.ndarray:
+        """A body's trail, oldest sample first."""
+        col = self.columns[name]
+        count = int(min(self.frame - self.born[0, 0, col], self.length))
+        slots = (self.head - np.arange(count)[::-1]) % self.length
+        return self.vertices[slots, 0, col]
+
+    def alpha(self, name: str) -> np.ndarray:
+        """Opacity ramp along a body's trail (oldest first), as the shader draws it."""
+        count = len(self.samples(name))
+        return MAX_ALPHA * np.arange(count) / max(count - 1, 1)
+
+
+class TrailVisual(Visual):
+    """
+    Draws every trail of a TrailBuffer in one call. Only the vertices written since the last
+    frame are uploaded; visibility and the fading alpha ramp are derived in the vertex
+    shader from each segment's age relative to the ring's head.
+    """
+    VERTEX = """
+        uniform float u_head;
+        uniform float u_frame;
+        uniform float u_length;
+        uniform float u_max_alpha;
+        attribute vec3 a_position;
+        attribute vec3 a_color;
+        attribute float a_segment;
+        attribute float a_end;
+        attribute float a_born;
+        varying vec4 v_color;
+        varying float v_visible;
+
+        void main(void) {
+            float count = min(u_frame - a_born, u_length);
+            float start_age = mod(u_head - a_segment + u_length, u_length);
+            v_visible = (start_age >= 1.0 && start_age <= count - 1.0) ? 1.0 : 0.0;
+            float age = start_age - a_end;
+            v_color = vec4(a_color, u_max_alpha * (count - 1.0 - age) / max(count - 1.0, 1.0));
+            gl_Position = $transform(vec4(a_position, 1.0));
+        }
+    """
+    FRAGMENT = """
+        varying vec4 v_color;
+        varying float v_visible;
+
+        void main() {
+            if (v_visible < 0.5) discard;
+            gl_FragColor = v_color;
+        }
+    """
+
+    def __init__(self, trails: TrailBuffer, width: float = 1.5):
+        Visual.__init__(self, vcode=self.VERTEX, fcode=self.FRAGMENT)
+        self.trails = trails
+        self._buffers = {key: gloo.VertexBuffer() for key in ('a_position', 'a_color', 'a_segment', 'a_end', 'a_born')}
+        self._index_buffer = gloo.IndexBuffer()
+        self._draw_mode = 'lines'
+        self.set_gl_state('translucent', line_width=width)
+
+    def _upload_all(self):
+        t = self.trails
+        arrays = {'a_position': t.vertices, 'a_color': t.colors, 'a_segment': t.segment, 'a_end': t.end,
+                  'a_born': t.born}
+        for key, arr in arrays.items():
+            self._buffers[key].set_data(arr.reshape(-1, arr.shape[-1]) if arr.ndim == 4 else arr.ravel())
+            self.shared_program[key] = self._buffers[key]
+        self._index_buffer.set_data(t.indices)
+        t.take_dirty()
+        t.resized = False
+
+    def _prepare_transforms(self, view):
+        view.view_program.vert['transform'] = view.get_transform()
+
+    def _prepare_draw(self, view):
+        t = self.trails
+        if t.head < 0 or not t.names:
+            return False
+        if t.resized:
+            self._upload_all()
+        for offset, block in t.take_dirty():
+            self._buffers['a_position'].set_subdata(block, offset=offset, copy=True)
+        self.shared_program['u_head'] = float(t.head)
+        self.shared_program['u_frame'] = float(t.frame)
+        self.shared_program['u_length'] = float(t.length)
+        self.shared_program['u_max_alpha'] = MAX_ALPHA
+        return True
+
+
+Trails = create_visual_node(TrailVisual)
@@ -0,0 +1,179 @@
+# trajectory_store.py
+
+import os
+import json
+import numpy as np
+from .backend import asnumpy
+from .state_cache import atomic_write
+
+STORE_VERSION = 1
+CHUNK_ROWS = 4096  # samples per body per chunk
+META_FILE = "meta.json"
+
+
+def _group_files(path: str, every: int) -> dict:
+    return {col: os.path.join(path, f"every{every}.{col}.f8") for col in ('t', 'x', 'v')}
+
+
+class TrajectoryWriter:
+    """
+    Streams states into a trajectory store, one group of chunked columns per decimation level.
+    Body `name` keeps every `every[name]`-th state written (default 1).
+    """
+    def __init__(self, path: str, names: list, every=1, chunk_rows: int = CHUNK_ROWS, velocities: bool = True):
+        self.path = path
+        self.names = list(names)
+        every = every if isinstance(every, dict) else {name: every for name in self.names}
+        self.every = [int(every.get(name, 1)) for name in self.names]
+        self.chunk_rows = chunk_rows
+        self.velocities = velocities
+        self.steps = 0
+        self._groups = []
+        os.makedirs(path, exist_ok=True)
+        for level in sorted(set(self.every)):
+            rows = np.array([i for i, e in enumerate(self.every) if e == level])
+            files = _group_files(path, level)
+            for f in files.values():
+                if os.path.exists(f): os.remove(f)
+            self._groups.append({'every': level, 'rows': rows, 'files': files, 'filled': 0,
+                                 't': np.empty(chunk_rows), 'x': np.empty((len(rows), chunk_rows, 3)),
+                                 'v': np.empty((len(rows), chunk_rows, 3)) if velocities else None})
+        meta = {'version': STORE_VERSION, 'names': self.names, 'every': self.every, 'chunk_rows': chunk_rows,
+                'velocities': velocities}
+        atomic_write(os.path.join(path, META_FILE), lambda f: f.write(json.dumps(meta, indent=1).encode()))
+
+    @property
+    def count(self) -> int:
+        """States written so far (before decimation)."""
+        return self.steps
+
+    def write(self, et: float, positions, velocities=None):
+        """Appends the (N, 3) state of every body at time `et`, in `names` order."""
+        positions = asnumpy(positions)
+        velocities = asnumpy(velocities) if self.velocities else None
+        for g in self._groups:
+            if self.steps % g['every']: continue
+            k = g['filled']
+            g['t'][k] = et
+            g['x'][:, k] = positions[g['rows']]
+            if velocities is not None: g['v'][:, k] = velocities[g['rows']]
+            g['filled'] = k + 1
+            if g['filled'] == self.chunk_rows:
+                self._flush(g)
+        self.steps += 1
+
+    def _flush(self, g):
+        """Appends the group's chunk; a final partial chunk is padded so chunk offsets stay fixed."""
+        if g['filled'] == 0: return
+        with open(g['files']['t'], 'ab') as f:
+            g['t'][:g['filled']].tofile(f)
+        for col in ('x', 'v') if self.velocities else ('x',):
+            with open(g['files'][col], 'ab') as f:
+                g[col].tofile(f)
+        g['filled'] = 0
+
+    def close(self):
+        for g in self._groups:
+            self._flush(g)
+
+
+class TrajectoryStore:
+    """
+    Read side of a trajectory store. Columns are memory-mapped, so opening a multi-gigabyte
+    run costs nothing; time ranges are found by binary search on a body's time column and
+    only the requested samples are read. Stores still being written can be read: only
+    complete chunks are visible until the writer closes.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        self.names = meta['names']
+        self.every = dict(zip(self.names, meta['every']))
+        self.chunk_rows = meta['chunk_rows']
+        self.has_velocities = meta['velocities']
+        self._index = {name: i for i, name in enumerate(self.names)}
+        self._groups = {}
+        for level in sorted(set(meta['every'])):
+            rows = [i for i, e in enumerate(meta['every']) if e == level]
+            self._groups[level] = {'rows': {i: j for j, i in enumerate(rows)}, 'n': len(rows),
+                                   'files': _group_files(path, level)}
+
+    def _group(self, name: str):
+        i = self._index[name]
+        g = self._groups[self.every[name]]
+        return g, g['rows'][i]
+
+    @staticmethod
+    def _map(path, shape=None):
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size == 0:
+            return np.empty((0,) + (shape or ()))
+        count = size // 8 // int(np.prod(shape or (1,)))
+        return np.memmap(path, dtype=np.float64, mode='r', shape=(count,) + (shape or ()))
+
+    def times(self, name: str) -> np.ndarray:
+        """Memory-mapped sample times of one body (the store's time index)."""
+        g, _ = self._group(name)
+        t = self._map(g['files']['t'])
+        # Times of a partial chunk become visible before its columns; hide them until then.
+        chunks = self._map(g['files']['x'], (g['n'], self.chunk_rows, 3)).shape[0]
+        return t[:min(len(t), chunks * self.chunk_rows)]
+
+    def _rows(self, name, t_start, t_end):
+        t = self.times(name)
+        start = 0 if t_start is None else int(np.searchsorted(t, t_start, side='left'))
+        stop = len(t) if t_end is None else int(np.searchsorted(t, t_end, side='right'))
+        return t, start, max(start, stop)
+
+    def _column(self, name, col):
+        g, j = self._group(name)
+        if col == 'v' and not self.has_velocities:
+            raise ValueError(f"Store {self.path} has no velocities")
+        return self._map(g['files'][col], (g['n'], self.chunk_rows, 3)), j
+
+    def iter_chunks(self, name: str, t_start: float = None, t_end: float = None, stride: int = 1,
+                    velocities: bool = False):
+        """
+        Yields (t, positions[, velocities]) blocks of one body over [t_start, t_end], one chunk
+        at a time and keeping every `stride`-th sample. Blocks are views into the mapped
+        files, so memory use stays constant however long the run is.
+        """
+        t, start, stop = self._rows(name, t_start, t_end)
+        x, j = self._column(name, 'x')
+        v = self._column(name, 'v')[0] if velocities else None
+        first = start
+        while first < stop:
+            chunk, offset = divmod(first, self.chunk_rows)
+            last = min(stop, (chunk + 1) * self.chunk_rows)
+            rows = slice(offset, offset + last - first, stride)
+            block = (t[first:last:stride], x[chunk, j, rows])
+            yield block + (v[chunk, j, rows],) if velocities else block
+            # Continue the stride across the chunk boundary.
+            first += -(-(last - first) // stride) * stride
+
+    def read(self, name: str, t_start: float = None, t_end: float = None, stride: int = 1, velocities: bool = False):
+        """(t, positions[, velocities]) arrays of one body over [t_start, t_end]; only that range is read."""
+        blocks = list(self.iter_chunks(name, t_start, t_end, stride, velocities))
+        if not blocks:
+            empty = (np.empty(0), np.empty((0, 3)))
+            return empty + (np.empty((0, 3)),) if velocities else empty
+        return tuple(np.concatenate(cols) for cols in zip(*blocks))
+
+
+class TrajectoryRecorder:
+    """
+    Streamed reducer that writes probe positions to a trajectory store instead of holding
+    full paths in memory. Step i is stored at time epoch + (i + 1) * dt.
+    """
+    def __init__(self, path: str, names: list, dt: float, epoch: float = 0.0, every=1,
+                 chunk_rows: int = CHUNK_ROWS):
+        self.writer = TrajectoryWriter(path, names, every, chunk_rows, velocities=False)
+        self.dt, self.epoch = dt, epoch
+
+    def update(self, i, probe_positions, body_positions):
+        self.writer.write(self.epoch + (i + 1) * self.dt, probe_positions)
+
+    def result(self) -> TrajectoryStore:
+        self.writer.close()
+        return TrajectoryStore(self.writer.path)
@@ -1,12 +1,22 @@
 # viewer.py
 
+import copy
+import time
 from vispy import app, scene
 import numpy as np
-import spiceypy
 from vispy.scene import SceneCanvas, visuals
 from vispy.scene.cameras import TurntableCamera
-from .gravity import Probe, Body
-from .prediction import run_prediction, evaluate_trajectory
+from .gravity import Probe, Body, G
+from .backend import get_backend
+from .planner import PlanningWorker, stream_prediction, search_launch, launch_window, search_tours
+from .porkchop import default_grid
+from .gravity_assist import PLANET_RADII
+from .events import Impact, soi_radius
+from .ephemeris import Ephemeris
+from .solar_system import load_ephemeris_from_spice, utc
+from .trails import TrailBuffer, Trails
+from .body_render import BodyRenderer, RingRenderer, camera_eye
+from .instrument import PROFILER, format_summary
 
 
 class OrbitViewer3D:
@@ -18,6 +28,16 @@ class OrbitViewer3D:
     STAR_COUNT = 1500
     STAR_DISTANCE_M = 5e12
     STAR_SIZE_RANGE = (1.0, 2.5)
+    OPTIMIZER_CANDIDATES = 1000
+    PLANNING_DAYS = 365 * 4
+    EPHEMERIS_MARGIN_DAYS = 365
+    PORKCHOP_SIZE = 200
+    TOUR_LAUNCH_DAYS = 365 * 2
+    TOUR_MAX_DAYS = 365 * 10
+    TOUR_MAX_FLYBYS = 2
+    DIVERGE_FACTOR = 1.5  # optimizer candidates leaving unbound beyond this many target orbit radii are dropped
+    CRUISE_DT = 2 * 86400  # optimizer step on rails, where candidates are propagated with the encke integrator
+    STATS_REFRESH_S = 0.5  # the stats panel text is rebuilt at most this often
 
     BODY_VISUALS = {
         'Sun': {'color': (1.0, 0.9, 0.4), 'radius': 35}, 'Mercury': {'color': (0.6, 0.6, 0.6), 'radius': 8},
@@ -32,8 +52,13 @@ class OrbitViewer3D:
         self.bodies = bodies
         self.planets = sorted([b for b in bodies if b.body_type == 'planet'], key=lambda p: np.linalg.norm(p.position))
         self.initial_et = initial_et
+        self.now = initial_et
         self.trail_length = trail_length
-        self.positions = {body.name: [body.position.copy()] for body in bodies}
+        self.trail_buffer = TrailBuffer(trail_length)
+        self.render_bodies = []  # bodies in trail/renderer column order
+        self.massive_bodies = [b for b in bodies if not b.passive]
+        self.snapshot = None
+        self._render_rows, self._rows_names = None, None
         self.sphere_radii = {}
 
         self.canvas = SceneCanvas(keys='interactive', show=True, bgcolor=self.BG_COLOR, size=self.CANVAS_SIZE)
@@ -53,6 +78,10 @@ class OrbitViewer3D:
                                             pos=(self.CANVAS_SIZE[0] / 2, 30), anchor_x='center', font_size=14)
         self.planet_stats_label = visuals.Text("", color='white', parent=self.ui_view.scene,
                                                pos=(15, self.CANVAS_SIZE[1] - 50), anchor_y='top', font_size=10)
+        self.stats_label = visuals.Text("", color=(0.6, 1.0, 0.6), parent=self.ui_view.scene, pos=(15, 20),
+                                        anchor_x='left', anchor_y='bottom', font_size=9)
+        self.stats_label.visible = False
+        self._stats_last = None  # (time, counters) at the last panel refresh
 
         self.is_paused = False
         self.time_multiplier = 20.0
@@ -65,12 +94,16 @@ class OrbitViewer3D:
         self.launch_altitude_angle = 0.0
         self.launch_altitude = 5e7
         self.launch_speed_dv = 12000.0
-        self.probe_count = 0
         self.prediction_dirty = True
         self.show_prediction = False
         self.target_planet_idx = -1
         self.optimizing = False
         self.best_params = None
+        self.ephemeris = None
+        self.planner = PlanningWorker()
+        self.planning_job = self.planning_kind = None
+        self.launch_window = None
+        self.tours, self.tour_idx = None, 0
 
         self._init_starfield();
         self._init_visuals()
@@ -82,8 +115,9 @@ class OrbitViewer3D:
                                    size=np.random.uniform(1.0, 2.5, self.STAR_COUNT), face_color='white')
 
     def _init_visuals(self):
-        self.trails = {};
-        self.spheres = {}
+        self.trails = Trails(self.trail_buffer, width=1.5, parent=self.view.scene)
+        self.body_renderer = BodyRenderer(self.view.scene)
+        self.ring_renderer = RingRenderer(self.view.scene)
         for body in self.bodies: self._create_visuals_for_body(body)
         self.targeting_line = scene.Line(parent=self.view.scene, color='cyan', width=2)
         self.launch_origin_marker = scene.Markers(parent=self.view.scene, face_color='white', size=8)
@@ -93,13 +127,9 @@ class OrbitViewer3D:
     def _create_visuals_for_body(self, body):
         props = self.BODY_VISUALS.get(body.name, self.BODY_VISUALS.get(body.body_type, self.BODY_VISUALS['Default']))
         self.sphere_radii[body.name] = props['radius']
-
-        # --- THE FINAL FIX: Set shading to None to ensure planets are always visible with their correct color ---
-        self.spheres[body.name] = visuals.Sphere(radius=props['radius'], rows=30, cols=30, method='latitude',
-                                                 parent=self.view.scene, color=props['color'], shading=None)
-
-        self.spheres[body.name].transform = scene.transforms.MatrixTransform()
-        self.trails[body.name] = scene.Line(parent=self.view.scene, width=1.5, method='gl')
+        self.body_renderer.add(body.name, props['color'], props['radius'])
+        self.trail_buffer.add(body.name, props['color'])
+        self.render_bodies.append(body)
 
 
     def on_key_press(self, event):
@@ -109,9 +139,11 @@ class OrbitViewer3D:
             self.follow_target_idx = (self.follow_target_idx - 1 + len(self.planets)) % len(
                 self.planets); self.follow_target = self.planets[
                 self.follow_target_idx]; self.view.camera.distance = 1500; parameter_changed = True
+            self.launch_window = self.tours = None
         elif event.key == 'Right':
             self.follow_target_idx = (self.follow_target_idx + 1) % len(self.planets); self.follow_target = \
             self.planets[self.follow_target_idx]; self.view.camera.distance = 1500; parameter_changed = True
+            self.launch_window = self.tours = None
 
         if self.launch_mode_active:
             if event.key.name.upper() == 'A':
@@ -134,9 +166,15 @@ class OrbitViewer3D:
                 self.target_planet_idx = (self.target_planet_idx + 1) % len(self.planets)
                 if self.planets[self.target_planet_idx] == self.follow_target:
                     self.target_planet_idx = (self.target_planet_idx + 1) % len(self.planets)
-                parameter_changed = True
+                parameter_changed = True; self.launch_window = self.tours = None
             elif event.key.name.upper() == 'O':
                 self.optimizing = True; self.best_params = None
+            elif event.key.name.upper() == 'K':
+                self._find_launch_window()
+            elif event.key.name.upper() == 'G':
+                self._find_tours()
+            elif event.key.name.upper() == 'N' and self.tours:
+                self._apply_tour((self.tour_idx + 1) % len(self.tours))  # starts the optimizer, which draws its path
 
         if event.key == 'Up':
             self.time_multiplier = min(self.time_multiplier * 2, 2 ** 10)
@@ -144,6 +182,8 @@ class OrbitViewer3D:
             self.time_multiplier = max(self.time_multiplier / 2, 1)
         elif event.key == 'Space':
             self.is_paused = not self.is_paused
+        elif event.key.name.upper() == 'I':
+            self.toggle_stats()
         elif event.key.name.upper() == 'R':
             self.follow_target = None; self.follow_target_idx = -1; self.view.camera.distance = self.INIT_CAMERA_DISTANCE; parameter_changed = True
 
@@ -151,97 +191,346 @@ class OrbitViewer3D:
 
     def launch_probe(self):
         if not self.follow_target: return
-        self.probe_count += 1;
+        engine, sim = self.canvas.app.engine, self.canvas.app.sim
+        engine.probe_count += 1
         launch_body = self.follow_target
         launch_dir, launch_pos = self._get_launch_vectors(launch_body)
         probe_vel = launch_body.velocity + launch_dir * self.launch_speed_dv
-        new_probe = Probe(name=f"Probe-{self.probe_count}", position=launch_pos, velocity=probe_vel,
+        new_probe = Probe(name=f"Probe-{engine.probe_count}", position=launch_pos, velocity=probe_vel,
                           parent=launch_body.name)
         self.bodies.append(new_probe);
         self._create_visuals_for_body(new_probe);
-        self.positions[new_probe.name] = [new_probe.position]
-        self.canvas.app.engine.add_body(new_probe, self.bodies)
+        sim.call(engine.add_body, new_probe, list(self.bodies))
         print(f"🚀 LAUNCHED {new_probe.name} from {launch_body.name}!")
         self.follow_target = new_probe
 
+    def _planning_ephemeris(self, job, non_probe_bodies, now, start):
+        """
+        SPICE ephemeris covering a planning window from `start`, sampled on the planner thread
+        (the only one touching self.ephemeris) and resampled only once time runs past it. A
+        superseded job still finishes the sampling, so that its successor can reuse it.
+        """
+        window = self.PLANNING_DAYS * 86400
+        if self.ephemeris is None or (self.ephemeris and not self.ephemeris.covers(start, start + window)):
+            job.begin("Sampling ephemeris")
+            try:
+                self.ephemeris = load_ephemeris_from_spice(non_probe_bodies, now,
+                                                           start + window + self.EPHEMERIS_MARGIN_DAYS * 86400,
+                                                           progress=job.report)
+            except Exception as e:
+                print(f"✘ Ephemeris unavailable, integrating the planets instead: {e}")
+                self.ephemeris = False
+            job.begin()
+        return self.ephemeris or None
+
+    @staticmethod
+    def _search_ephemeris(job, bodies, start, end):
+        """Ephemeris of `bodies` over [start, end] for a search job: SPICE, else integrated daily."""
+        job.begin("Sampling ephemeris")
+        try:
+            ephemeris = load_ephemeris_from_spice(bodies, start, end, progress=job.report)
+        except Exception as e:
+            print(f"✘ Ephemeris unavailable, integrating the planets instead: {e}")
+            ephemeris = Ephemeris.from_bodies(bodies, 86400, int(np.ceil((end - start) / 86400)), t_start=start)
+        job.begin()
+        return ephemeris
+
+    @staticmethod
+    def _on_rails(body, position, velocity, ephemeris, et):
+        """Moves launch states given around the simulated `body` onto the same body on rails."""
+        if ephemeris is None or body.name not in ephemeris.names:
+            return position, velocity
+        rails_x, rails_v = ephemeris.state(et)
+        i = ephemeris.index(body.name)
+        return position - body.position + rails_x[i], velocity - body.velocity + rails_v[i]
+
+    @staticmethod
+    def _body_index(name, bodies, ephemeris):
+        """Row of a massive body in the planner's state: ephemeris order on rails, `bodies` order otherwise."""
+        if ephemeris:
+            return ephemeris.index(name) if name in ephemeris.names else None
+        return next((i for i, b in enumerate(bodies) if b.name == name), None)
+
+    def _planning_inputs(self, epoch=None):
+        """Snapshot of the massive bodies, the current time and the epoch for a background job."""
+        non_probe_bodies = copy.deepcopy([b for b in self.bodies if not isinstance(b, Probe)])
+        return non_probe_bodies, self.now, self.now if epoch is None else epoch
+
+    def _submit_planning_job(self, kind, name, fn, *args, **kwargs):
+        self.planning_job = self.planner.submit(name, fn, *args, **kwargs)
+        self.planning_kind = kind
+
+    def _cancel_planning_job(self):
+        self.planner.cancel()
+        self.planning_job = self.planning_kind = None
+
     def _update_prediction_path(self):
+        """Starts a background prediction of the aimed launch, superseding any running job."""
+        self.prediction_dirty = False
         if not self.launch_mode_active or not self.show_prediction:
+            self._cancel_planning_job()
             self.prediction_path_visual.visible = False;
             return
 
-        self.prediction_path_visual.visible = True
-        self.launch_ui_label.text = "Calculating trajectory..."
-
-        launch_body = self.follow_target
+        launch_body = copy.deepcopy(self.follow_target)
         launch_dir, launch_pos = self._get_launch_vectors(launch_body)
         probe_vel = launch_body.velocity + launch_dir * self.launch_speed_dv
-        ghost_probe = Probe(name="ghost", position=launch_pos, velocity=probe_vel)
-
-        non_probe_bodies = [b for b in self.bodies if not isinstance(b, Probe)]
-        path = run_prediction(non_probe_bodies, ghost_probe, duration_days=365 * 4, dt=self.base_dt)
-        self.prediction_path_visual.set_data(pos=path * self.RENDER_SCALE, color=(0, 1, 0.5, 0.7))
-        self.prediction_dirty = False
-
-    def _optimize_trajectory(self):
+        non_probe_bodies, now, et = self._planning_inputs()
+        dt, backend = self.base_dt, self.canvas.app.engine.backend_name
+
+        def predict(job):
+            ephemeris = self._planning_ephemeris(job, non_probe_bodies, now, et)
+            if job.cancelled: return None
+            position, velocity = self._on_rails(launch_body, launch_pos, probe_vel, ephemeris, et)
+            rows = {b.name: self._body_index(b.name, non_probe_bodies, ephemeris) for b in non_probe_bodies}
+            xp = get_backend(backend)
+            impacts = [Impact(1, rows[name], radius, xp=xp) for name, radius in PLANET_RADII.items()
+                       if rows.get(name) is not None]
+            return stream_prediction(job, non_probe_bodies, position, velocity, self.PLANNING_DAYS, dt,
+                                     ephemeris=ephemeris, epoch=et, events=impacts, backend=backend)
+
+        self._submit_planning_job('prediction', "Calculating trajectory", predict)
+
+    def _optimize_trajectory(self, epoch=None, **search_options):
+        """Starts the background launch search toward the selected target, launching at `epoch` (default now)."""
         if not self.launch_mode_active or self.target_planet_idx < 0:
             self.optimizing = False;
             return
 
         target_planet = self.planets[self.target_planet_idx]
-        self.launch_ui_label.text = f"Optimizing trajectory to {target_planet.name}..."
-
-        best_dist = float('inf')
-        if self.best_params: best_dist = self.best_params['dist']
+        non_probe_bodies, now, et = self._planning_inputs(epoch)
+        sun = next(b for b in non_probe_bodies if b.body_type == 'star')
+        orbit_radius = np.linalg.norm(target_planet.position - sun.position)
+        encounter_radius = soi_radius(orbit_radius, target_planet.mass, sun.mass)
+        launch_body, alt_angle = copy.deepcopy(self.follow_target), self.launch_altitude_angle
+        angle, speed = self.launch_angle, self.launch_speed_dv
+        best_dist = self.best_params['dist'] if self.best_params else float('inf')
+        backend = self.canvas.app.engine.backend_name
+
+        def optimize(job):
+            ephemeris = self._planning_ephemeris(job, non_probe_bodies, now, et)
+            # A future launch epoch needs the planets on rails; the simulated ones are only known now.
+            if job.cancelled or (epoch is not None and not ephemeris): return None
+            escape = {'radius': self.DIVERGE_FACTOR * orbit_radius, 'mu': G * sun.mass,
+                      'center_idx': self._body_index(sun.name, non_probe_bodies, ephemeris)}
+
+            def launch_states(angles, speeds):
+                positions, velocities = [], []
+                for a, s in zip(angles, speeds):
+                    launch_dir, launch_pos = self._get_launch_vectors(launch_body, angle=a, alt_angle=alt_angle)
+                    positions.append(launch_pos)
+                    velocities.append(launch_body.velocity + launch_dir * s)
+                return self._on_rails(launch_body, np.array(positions), np.array(velocities), ephemeris, et)
+
+            if ephemeris:
+                dt, options = self.CRUISE_DT, {'integrator': 'encke', **search_options}
+            else:
+                dt, options = self.base_dt, search_options
+            return search_launch(job, launch_states, self._body_index(target_planet.name, non_probe_bodies, ephemeris),
+                                 non_probe_bodies, self.PLANNING_DAYS, dt, angle, speed, best_dist,
+                                 candidates=self.OPTIMIZER_CANDIDATES, ephemeris=ephemeris, epoch=et,
+                                 encounter_radius=encounter_radius, escape=escape, backend=backend, **options)
+
+        self._submit_planning_job('optimizer', f"Optimizing trajectory to {target_planet.name}", optimize)
+        self.optimizing = True
+
+    def _find_launch_window(self):
+        """Starts a porkchop search for the cheapest Lambert transfer to the target; its best cell seeds the optimizer."""
+        if not self.launch_mode_active or self.target_planet_idx < 0: return
+        origin, target = self.follow_target, self.planets[self.target_planet_idx]
+        sun = next(b for b in self.bodies if b.body_type == 'star')
+        et = self.now
+        departures, tofs = default_grid(np.linalg.norm(origin.position - sun.position),
+                                        np.linalg.norm(target.position - sun.position), G * sun.mass, et,
+                                        self.PORKCHOP_SIZE)
+        pair = copy.deepcopy([sun, origin, target])
+
+        def search(job):
+            ephemeris = self._search_ephemeris(job, pair, et, departures[-1] + tofs[-1])
+            if job.cancelled: return None
+            return launch_window(job, ephemeris, origin.name, target.name, departures, tofs, center=sun.name)
 
-        for _ in range(20):
-            angle = self.launch_angle + np.random.uniform(-20, 20)
-            speed = self.launch_speed_dv + np.random.uniform(-1500, 1500)
-
-            launch_dir, launch_pos = self._get_launch_vectors(self.follow_target, angle=angle)
-            probe_vel = self.follow_target.velocity + launch_dir * speed
-            ghost_probe = Probe(name="ghost", position=launch_pos, velocity=probe_vel)
+        self.optimizing = False
+        self._submit_planning_job('window', f"Searching launch windows to {target.name}", search)
+
+    def _find_tours(self):
+        """Starts a ranked search of gravity-assist sequences to the target through the planets inside its orbit."""
+        if not self.launch_mode_active or self.target_planet_idx < 0: return
+        origin, target = self.follow_target, self.planets[self.target_planet_idx]
+        sun = next(b for b in self.bodies if b.body_type == 'star')
+        reach = np.linalg.norm(target.position - sun.position)
+        flybys = [p for p in self.planets if p.name in PLANET_RADII and p is not target
+                  and np.linalg.norm(p.position - sun.position) < reach]
+        et = self.now
+        planets = copy.deepcopy([sun, origin, target] + flybys)
+
+        def search(job):
+            ephemeris = self._search_ephemeris(job, planets, et, et + (self.TOUR_LAUNCH_DAYS + self.TOUR_MAX_DAYS) * 86400)
+            if job.cancelled: return None
+            return search_tours(job, ephemeris, origin.name, target.name, [p.name for p in flybys], et,
+                                et + self.TOUR_LAUNCH_DAYS * 86400, center=sun.name, max_flybys=self.TOUR_MAX_FLYBYS,
+                                max_days=self.TOUR_MAX_DAYS, arrival='flyby')
 
-            non_probe_bodies = [b for b in self.bodies if not isinstance(b, Probe)]
-            path = run_prediction(non_probe_bodies, ghost_probe, duration_days=365 * 4, dt=self.base_dt)
-            dist = evaluate_trajectory(path, target_planet, non_probe_bodies, self.base_dt)
+        self.optimizing = False
+        self._submit_planning_job('tour', f"Searching gravity assists to {target.name}", search)
+
+    def _poll_planning_job(self):
+        """Shows the running job's latest partial path, and applies its result once it is done."""
+        job = self.planning_job
+        if job is None: return
+        state = job.snapshot()
+        if state['error'] is not None:
+            print(f"✘ {job.name} failed: {state['error']}")
+            self.planning_job = self.planning_kind = None
+            self.optimizing = False
+            return
 
-            if dist < best_dist:
-                best_dist = dist
-                self.best_params = {'angle': angle, 'speed': speed, 'path': path, 'dist': dist}
+        if self.planning_kind == 'window':
+            if state['done']: self._apply_launch_window(state['result'])
+            return
+        if self.planning_kind == 'tour':
+            if state['done']:
+                self.planning_job = self.planning_kind = None
+                self.tours = state['result'] or None
+                if not self.tours:
+                    print("✘ No gravity-assist sequence found within the Δv and time limits.")
+                    return
+                for rank, tour in enumerate(self.tours, 1):
+                    print(f"  {rank:2d}. {'-'.join(tour['sequence'])}: launch "
+                          f"{utc(tour['departure'])[:11]}, "
+                          f"{(tour['times'][-1] - tour['departure']) / 86400:.0f} d, Δv {tour['dv'] / 1000:.2f} km/s")
+                self._apply_tour(0)
+            return
 
-        self.launch_angle = self.best_params['angle']
-        self.launch_speed_dv = self.best_params['speed']
-        self.prediction_path_visual.set_data(pos=self.best_params['path'] * self.RENDER_SCALE, color=(0, 1, 0.5, 0.7))
-        self.prediction_path_visual.visible = True
-        self.optimizing = False;
-        self.prediction_dirty = False
+        latest = state['result'] if state['done'] else state['partial']
+        if self.planning_kind == 'optimizer' and latest is not None:
+            self.best_params = latest
+            latest = latest['path']
+        if latest is not None and len(latest) > 1:
+            self.prediction_path_visual.set_data(pos=latest * self.RENDER_SCALE, color=(0, 1, 0.5, 0.7))
+            self.prediction_path_visual.visible = True
+
+        if state['done']:
+            if self.planning_kind == 'optimizer':
+                if self.best_params:
+                    self.launch_angle = self.best_params['angle']
+                    self.launch_speed_dv = self.best_params['speed']
+                self.optimizing = False
+            self.planning_job = self.planning_kind = None
+
+    def _apply_launch_window(self, window):
+        """Aims along the best Lambert departure, then refines it with the N-body optimizer at that date."""
+        self.planning_job = self.planning_kind = None
+        if window is None:
+            print("✘ No Lambert transfer found in the search grid.")
+            return
+        self.launch_window = window
+        self._aim_along(window['vinf_departure'])
+        print(f"✔ Launch window {utc(window['departure'])[:11]}: "
+              f"{window['tof'] / 86400:.0f} d transfer, C3 {window['c3'] / 1e6:.1f} km²/s², "
+              f"total Δv {window['total_dv'] / 1000:.2f} km/s")
+        self.best_params = None
+        self._optimize_trajectory(epoch=window['departure'], angle_spread=5.0, speed_spread=500.0)
+
+    def _apply_tour(self, idx):
+        """Aims along the departure of the ranked tour `idx`, then refines it with the optimizer at that date."""
+        self.tour_idx = idx
+        tour = self.tours[idx]
+        self._aim_along(tour['vinf_departure'])
+        print(f"✔ Tour #{idx + 1} {'-'.join(tour['sequence'])}: launch on "
+              f"{utc(tour['departure'])[:11]} (press N for the next one).")
+        self.best_params = None
+        self._optimize_trajectory(epoch=tour['departure'], angle_spread=5.0, speed_spread=500.0)
+
+    def _aim_along(self, v_inf):
+        speed = float(np.linalg.norm(v_inf))
+        self.launch_angle = float(np.degrees(np.arctan2(v_inf[1], v_inf[0])))
+        self.launch_altitude_angle = float(np.degrees(-np.arcsin(v_inf[2] / speed)))
+        self.launch_speed_dv = speed
+
+    def _update_planning(self):
+        # A parameter change supersedes whatever is running, including the optimizer, even
+        # with the prediction hidden (it then only cancels the job).
+        if self.prediction_dirty:
+            self.optimizing = False
+            self._update_prediction_path()
+        elif self.optimizing and self.planning_kind != 'optimizer':
+            self._optimize_trajectory()
+        self._poll_planning_job()
+
+    def _sync_simulation(self):
+        """Passes speed and pause to the simulation thread and takes its newest snapshot."""
+        sim = self.canvas.app.sim
+        sim.paused = self.is_paused
+        sim.steps_per_second = self.time_multiplier / self.FRAME_INTERVAL
+        snapshot = sim.latest()
+        # Only bodies the UI and planner read are copied out; everything drawn comes from the arrays.
+        followed = [self.follow_target] if self.follow_target is not None and self.follow_target.passive else []
+        snapshot.update_bodies(self.massive_bodies + followed)
+        self.snapshot, self.now = snapshot, snapshot.et
+
+    def _snapshot_positions(self) -> np.ndarray:
+        """Scene positions of render_bodies from the latest snapshot, in column order."""
+        snapshot = self.snapshot
+        if self._rows_names is not snapshot.names or len(self._render_rows) != len(self.render_bodies):
+            self._render_rows = np.array([snapshot.index.get(b.name, -1) for b in self.render_bodies], dtype=int)
+            self._rows_names = snapshot.names
+        rows = self._render_rows
+        positions = snapshot.positions[rows]
+        for col in np.flatnonzero(rows < 0):  # launched but not yet stepped
+            positions[col] = self.render_bodies[col].position
+        return positions * self.RENDER_SCALE
+
+    def toggle_stats(self):
+        """Shows or hides the stats panel; the profiler only runs while it is shown or a trace is recorded."""
+        show = not self.stats_label.visible
+        self.stats_label.visible = show
+        if show:
+            PROFILER.enable()
+        elif not PROFILER.tracing:
+            PROFILER.disable()
+        self._stats_last = None
+
+    def _update_stats(self):
+        """Refreshes the stats panel with rolling timer percentiles and counter rates."""
+        if not self.stats_label.visible: return
+        now = time.perf_counter()
+        last = self._stats_last
+        if last is not None and now - last[0] < self.STATS_REFRESH_S: return
+        counters = PROFILER.counters()
+        rates = None
+        if last is not None:
+            rates = {name: (value - last[1].get(name, 0)) / (now - last[0]) for name, value in counters.items()}
+        self.stats_label.text = format_summary(PROFILER.summary(), counters, rates)
+        self._stats_last = (now, counters)
 
     def update_frame(self, event):
-        if not hasattr(self.canvas.app, 'engine'): return
-        current_et = self.canvas.app.engine.et
-        date_str = spiceypy.et2utc(current_et, "C", 3)
+        if not hasattr(self.canvas.app, 'sim'): return
+        with PROFILER.timer('update_frame'):
+            self._update_frame()
+        self._update_stats()
+
+    def _update_frame(self):
+        self._sync_simulation()
+        current_et = self.now
+        date_str = utc(current_et, 3)
 
         self.launch_mode_active = self.follow_target and self.follow_target.body_type == 'planet'
 
         if self.is_paused:
             self.time_label.text = f"{date_str} (PAUSED)"
             if self.launch_mode_active:
-                if self.optimizing:
-                    self._optimize_trajectory()
-                elif self.prediction_dirty and self.show_prediction:
-                    self._update_prediction_path()
+                self._update_planning()
                 self._update_launch_ui()
             return
 
         self.time_label.text = f"{date_str} | Speed: {self.time_multiplier:.0f}x"
 
         if self.launch_mode_active:
-            if self.optimizing:
-                self._optimize_trajectory()
-            elif self.prediction_dirty and self.show_prediction:
-                self._update_prediction_path()
+            self._update_planning()
             self._update_launch_ui()
         else:
+            if self.planning_job is not None: self._cancel_planning_job()
             self.launch_ui_label.text = "";
             self.targeting_line.visible = False;
             self.prediction_path_visual.visible = False
@@ -257,21 +546,32 @@ class OrbitViewer3D:
             self.view.camera.center = [0, 0, 0]
             self.planet_stats_label.visible = False
 
-        for body in self.bodies:
-            if body.name not in self.spheres: continue
-
-            self.positions[body.name].append(body.position.copy())
-            if len(self.positions[body.name]) > self.trail_length: self.positions[body.name].pop(0)
-
-            trail_scaled = np.array(self.positions[body.name]) * self.RENDER_SCALE
-            self.spheres[body.name].transform.translate = trail_scaled[-1]
-
-            props = self.BODY_VISUALS.get(body.name,
-                                          self.BODY_VISUALS.get(body.body_type, self.BODY_VISUALS['Default']))
-            base_color = props['color']
-            colors = np.tile(base_color, (len(trail_scaled), 1));
-            colors = np.append(colors, np.linspace(0.0, 0.9, len(trail_scaled))[:, np.newaxis], axis=1)
-            self.trails[body.name].set_data(pos=trail_scaled, color=colors)
+        # One new sample per trail; the ring buffer uploads only these vertices.
+        scaled = self._snapshot_positions()
+        with PROFILER.timer('trails'):
+            self.trail_buffer.write(scaled)
+            self.trails.update()
+        with PROFILER.timer('render_bodies'):
+            self.body_renderer.update(scaled, camera_eye(self.view.camera))
+        with PROFILER.timer('render_rings'):
+            self._update_rings(scaled)
+
+    def _update_rings(self, scaled):
+        """
+        Places the snapshot's ring particles around their parents. Rings are scaled like their
+        parent's exaggerated sphere, so they keep their true size relative to the planet.
+        """
+        rings = self.canvas.app.engine.rings
+        layout = tuple((system.parent, system.count) for system in rings)
+        if layout != self.ring_renderer.layout:
+            self.ring_renderer.set_rings([(system.parent, system.count, system.ring.color) for system in rings])
+        offsets = self.snapshot.ring_positions
+        if len(offsets) != len(self.ring_renderer.positions): return
+        columns = self.body_renderer.columns
+        centers = [scaled[columns[parent]] if parent in columns else np.zeros(3) for parent, _ in layout]
+        scales = [self.sphere_radii[parent] / PLANET_RADII[parent] if parent in PLANET_RADII else self.RENDER_SCALE
+                  for parent, _ in layout]
+        self.ring_renderer.update(offsets, centers, scales)
 
     def _get_launch_vectors(self, launch_body, angle=None, alt_angle=None):
         angle_rad = np.deg2rad(angle if angle is not None else self.launch_angle)
@@ -285,12 +585,19 @@ class OrbitViewer3D:
 
     def _update_launch_ui(self):
         target_name = self.planets[self.target_planet_idx].name if self.target_planet_idx >= 0 else "None"
-        if self.optimizing:
-            self.launch_ui_label.text = f"OPTIMIZING TRAJECTORY to {target_name}... (this may take a moment)"
-        elif self.prediction_dirty and self.show_prediction:
-            self.launch_ui_label.text = "Calculating trajectory..."
+        job = self.planning_job
+        if job is not None and not job.done:
+            eta = job.eta()
+            eta_str = f" | ETA {eta:.1f} s" if eta is not None else ""
+            stage = f" | {job.stage}" if job.stage else ""
+            self.launch_ui_label.text = f"{job.name}{stage}... {job.progress:.0%}{eta_str}"
         else:
             self.launch_ui_label.text = f"AIMING: {self.follow_target.name} | TARGET: {target_name} | LAT: {self.launch_altitude_angle:.0f}° | ANGLE: {self.launch_angle:.0f}° | Δv: {self.launch_speed_dv / 1000:.1f} km/s"
+            if self.launch_window:
+                self.launch_ui_label.text += f" | WINDOW: {utc(self.launch_window['departure'])[:11]}"
+            if self.tours:
+                tour = self.tours[self.tour_idx]
+                self.launch_ui_label.text += f" | TOUR #{self.tour_idx + 1}: {'-'.join(tour['sequence'])}"
 
         launch_dir, launch_pos = self._get_launch_vectors(self.follow_target)
         line_start = launch_pos * self.RENDER_SCALE
@@ -303,4 +610,5 @@ class OrbitViewer3D:
 
     def run(self):
         if hasattr(self.canvas.app, 'engine'): self.canvas.app.engine = self.canvas.app.engine
-        app.run()
\ No newline at end of file
+        app.run()
+        self.planner.shutdown()
\ No newline at end of file
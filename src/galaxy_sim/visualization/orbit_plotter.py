@@ -17,6 +17,18 @@ class OrbitPlotter3D:
         x, y, z = positions[:, 0], positions[:, 1], positions[:, 2]
         self.ax.plot(x, y, z, label=label, color=color)
 
+    def plot_stream(self, chunks, label="Orbit", color="blue"):
+        """Plots an orbit from (t, positions) blocks, e.g. TrajectoryStore.iter_chunks, one block at a time."""
+        last = None
+        for block in chunks:
+            positions = np.asarray(block[1])
+            if last is not None:
+                positions = np.vstack([last, positions])
+            if len(positions) > 1:
+                self.ax.plot(positions[:, 0], positions[:, 1], positions[:, 2], color=color, label=label)
+                label = None
+            last = positions[-1:]
+
     def plot_body(self, position, label="Body", color="orange", size=300):
         self.ax.scatter(*position, color=color, s=size, label=label)
 
@@ -0,0 +1,18 @@
+import numpy as np
+import pytest
+from galaxy_sim.gravity import Body, G
+
+SUN_MASS = 1.989e30
+AU = 1.496e11
+
+
+@pytest.fixture
+def sun_and_planet():
+    """Factory of fresh [Sun, planet] lists, the planet on a circular orbit `angle` degrees from +x."""
+    def make(name="Earth", mass=5.97e24, radius=AU, angle=0.0):
+        phase = np.radians(angle)
+        radial, along = np.array([np.cos(phase), np.sin(phase), 0]), np.array([-np.sin(phase), np.cos(phase), 0])
+        return [Body(mass=SUN_MASS, position=[0, 0, 0], name="Sun", body_type="star"),
+                Body(mass=mass, position=radius * radial, velocity=np.sqrt(G * SUN_MASS / radius) * along, name=name,
+                     body_type="planet", parent="Sun")]
+    return make
@@ -0,0 +1,44 @@
+import numpy as np
+from galaxy_sim.barnes_hut import barnes_hut_accelerations, accuracy_report
+from galaxy_sim.engine import SimulationEngine
+from galaxy_sim.gravity import Body, update_accelerations_gpu
+
+
+def make_cluster(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(size=(n, 3)) * 1e11, rng.uniform(1e20, 1e25, n)
+
+
+def test_zero_opening_angle_matches_direct_sum():
+    positions, masses = make_cluster(500)
+    direct = update_accelerations_gpu(positions, masses)
+    tree = barnes_hut_accelerations(positions, masses, theta=0.0)
+    error = np.linalg.norm(tree - direct, axis=1) / np.linalg.norm(direct, axis=1)
+    assert error.max() < 1e-12
+
+
+def test_opening_angle_trades_accuracy():
+    positions, masses = make_cluster(2000)
+    direct = update_accelerations_gpu(positions, masses)
+    errors = []
+    for theta in (0.3, 0.7):
+        tree = barnes_hut_accelerations(positions, masses, theta=theta)
+        errors.append(np.median(np.linalg.norm(tree - direct, axis=1) / np.linalg.norm(direct, axis=1)))
+    assert errors[0] < errors[1] < 0.05
+
+
+def test_coincident_bodies_are_summed():
+    positions = np.zeros((40, 3)); positions[20:] = 1.0e9
+    masses = np.full(40, 1e20)
+    assert np.allclose(barnes_hut_accelerations(positions, masses), update_accelerations_gpu(positions, masses))
+
+
+def test_engine_with_tree_solver():
+    positions, masses = make_cluster(300)
+    bodies = [Body(mass=m, position=p, name=f"B{i}") for i, (p, m) in enumerate(zip(positions, masses))]
+    engine = SimulationEngine(bodies, 0.0, backend="numpy", solver="barnes_hut", solver_options={'theta': 0.5})
+    engine.step(3600)
+    assert np.all(np.isfinite(engine.get_positions()))
+
+    report = accuracy_report(positions, masses, thetas=(0.5,), sample_size=50)
+    assert report[0]['theta'] == 0.5 and report[0]['median_rel_error'] < 0.05
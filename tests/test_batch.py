@@ -0,0 +1,32 @@
+import numpy as np
+from galaxy_sim.engine import SimulationEngine, measure_throughput
+from galaxy_sim.batch import SnapshotFile, run_batch, format_report
+
+
+def test_batch_writes_decimated_snapshots(tmp_path, sun_and_planet):
+    engine, path = SimulationEngine(sun_and_planet(), 0.0, backend="numpy"), str(tmp_path / "run.npz")
+    writer = SnapshotFile(path, engine.body_names())
+    report = run_batch(engine, 10 * 86400, 3600, every=24, writer=writer)
+    writer.close()
+    assert report['steps'] == 240 and report['stopped'] == 'duration'
+    assert report['sim_days'] == 10 and report['snapshots'] == 11
+    assert report['body_steps_per_sec'] == report['steps_per_sec'] * 2
+    assert "10.0 days simulated" in format_report(report)
+    with np.load(path) as data:
+        assert list(data['names']) == ["Sun", "Earth"]
+        assert np.allclose(np.diff(data['et']), 86400)
+        assert data['positions'].shape == (11, 2, 3)
+        assert np.array_equal(data['positions'][-1], engine.get_positions())
+    assert set(measure_throughput(engine, 3600, steps=1)) <= set(report)
+
+
+def test_batch_stops_at_step_and_time_limits(sun_and_planet):
+    engine = SimulationEngine(sun_and_planet(), 0.0, backend="numpy")
+    writer = SnapshotFile("unused.npz", engine.body_names())
+    report = run_batch(engine, 10 * 86400, 3600, every=24, writer=writer, max_steps=50)
+    assert (report['steps'], report['stopped']) == (50, 'max_steps')
+    # Snapshots at steps 0, 24, 48, plus the final state at step 50.
+    assert writer.count == 4 and engine.et == 50 * 3600
+
+    report = run_batch(SimulationEngine(sun_and_planet(), 0.0, backend="numpy"), 10 * 86400, 3600, time_limit=0.0)
+    assert (report['steps'], report['stopped']) == (0, 'time_limit')
@@ -0,0 +1,36 @@
+import copy
+import json
+from galaxy_sim.benchmark import run_benchmarks, compare_reports, unique_integrators, main
+
+
+def test_report_is_json_and_flags_regressions(tmp_path):
+    report = run_benchmarks(sizes=(16,), backends=["numpy"], integrators=["leapfrog"], budget=2e4)
+    kernels = {case['kernel'] for case in report['cases']}
+    assert kernels == {'accelerations', 'engine.step', 'run_prediction', 'evaluate_trajectory'}
+    step = next(case for case in report['cases'] if case['kernel'] == 'engine.step')
+    assert step['steps'] == 78 and step['pair_interactions_per_sec'] > 0 and step['energy_drift'] < 1e-3
+    report = json.loads(json.dumps(report))
+    assert compare_reports(report, report) == []
+
+    slower = copy.deepcopy(report)
+    slower['cases'][0]['steps_per_sec'] *= 0.5
+    step = next(case for case in slower['cases'] if case['kernel'] == 'engine.step')
+    step['energy_drift'] *= 2
+    found = {(r['case'], r['metric']) for r in compare_reports(report, slower, threshold=0.2)}
+    assert found == {(slower['cases'][0]['case'], 'steps_per_sec'), (step['case'], 'energy_drift')}
+    step['steps'] += 1  # drifts over different step counts are not comparable
+    assert len(compare_reports(report, slower, threshold=0.2)) == 1
+
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(slower))
+    args = ["--sizes", "16", "--integrators", "leapfrog", "--solvers", "tiled", "--backends", "numpy",
+            "--output", str(tmp_path / "current.json")]
+    assert main(args + ["--compare", str(baseline), "--threshold", "100"]) == 0
+    assert json.loads((tmp_path / "current.json").read_text())['cases'][0]['case'] == \
+        "accelerations/numpy/tiled/N=16"
+
+
+def test_probe_only_schemes_are_benchmarked_on_rails():
+    assert "encke" not in unique_integrators() and unique_integrators(probes_only=True) == ["encke"]
+    report = run_benchmarks(sizes=(16,), backends=["numpy"], integrators=["encke"], solvers=["direct"], budget=2e4)
+    assert [case['kernel'] for case in report['cases']] == ['accelerations', 'run_prediction', 'evaluate_trajectory']
@@ -0,0 +1,32 @@
+import numpy as np
+from galaxy_sim.body_render import BodyRenderer, ring_points, select_lod
+
+
+def test_lod_spends_sphere_budgets_on_largest_apparent_bodies():
+    positions = np.array([[100.0, 0, 0], [10.0, 0, 0], [1e6, 0, 0], [50.0, 0, 0], [20.0, 0, 0]])
+    radii = np.array([35.0, 1.0, 5.0, 5.0, 1.0])
+    lod = select_lod(positions, radii, np.zeros(3), levels=((1, 30), (2, 12)), min_angle=0.01)
+    # Apparent sizes: 0.35, 0.1, 5e-6 (too small), 0.1, 0.05.
+    assert lod[0] == 0
+    assert sorted(np.flatnonzero(lod == 1)) == [1, 3]
+    assert lod[2] == -1 and lod[4] == -1
+
+
+def test_renderer_draws_markers_for_all_but_lod_bodies():
+    renderer = BodyRenderer(None, levels=((2, 12),))
+    for k in range(100):
+        renderer.add(f"Probe-{k}", (1.0, 0.2, 0.2), 1.0)
+    positions = np.column_stack([np.arange(100.0) * 10 + 5, np.zeros(100), np.zeros(100)])
+    renderer.update(positions, np.zeros(3))
+
+    shown = [col for sphere, col in renderer.pool[0] if sphere.visible]
+    assert sorted(shown) == [0, 1]
+    assert np.allclose(renderer.pool[0][0][0].transform.translate[:3], positions[0])
+    assert len(renderer.colors) == 100 and renderer.radii[-1] == 1.0
+
+
+def test_ring_points_place_each_ring_around_its_parent():
+    offsets = np.array([[1.0, 0, 0], [0, 2.0, 0], [0, 0, 3.0]])
+    points = ring_points(offsets, [2, 1], [np.array([10.0, 0, 0]), np.array([0, 0, -5.0])], [2.0, 0.5])
+    assert points.dtype == np.float32
+    assert np.allclose(points, [[12, 0, 0], [10, 4, 0], [0, 0, -3.5]])
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from galaxy_sim.gravity import Probe, G, total_energy, angular_momentum
+from galaxy_sim import gravity
+from galaxy_sim.engine import SimulationEngine
+from galaxy_sim.benchmark import benchmark_scene
+
+def reference_energy(x, v, m):
+    kinetic = 0.5 * np.sum(m * np.sum(v * v, axis=1))
+    i, j = np.triu_indices(len(m), k=1)
+    return kinetic - np.sum(G * m[i] * m[j] / np.linalg.norm(x[i] - x[j], axis=1))
+
+
+def test_chunked_energy_matches_pairwise_sum(monkeypatch):
+    engine = SimulationEngine(benchmark_scene(40), 0.0, backend="numpy")
+    x, v, m = engine.positions, engine.velocities, engine.masses
+    expected = reference_energy(x, v, m)
+    assert np.isclose(total_energy(x, v, m), expected, rtol=1e-12)
+    monkeypatch.setattr(gravity, "ENERGY_CHUNK_PAIRS", 100)  # several rows per chunk, uneven last chunk
+    assert np.isclose(gravity.total_energy(x, v, m), expected, rtol=1e-12)
+    L = angular_momentum(x, v, m)
+    assert np.allclose(L, np.sum(m[:, None] * np.cross(x, v), axis=0))
+
+
+@pytest.mark.parametrize("integrator, energy_tol", [("leapfrog", 1e-6), ("yoshida4", 1e-10),
+                                                    ("wisdom_holman", 1e-10), ("adaptive", 1e-9)])
+def test_integrators_conserve_energy_and_angular_momentum(integrator, energy_tol):
+    engine = SimulationEngine(benchmark_scene(8, seed=3), 0.0, backend="numpy", integrator=integrator)
+    e0 = total_energy(engine.positions, engine.velocities, engine.masses)
+    l0 = angular_momentum(engine.positions, engine.velocities, engine.masses)
+    for _ in range(365):
+        engine.step(86400)
+    e1 = total_energy(engine.positions, engine.velocities, engine.masses)
+    l1 = angular_momentum(engine.positions, engine.velocities, engine.masses)
+    assert abs(e1 / e0 - 1) < energy_tol
+    assert np.linalg.norm(l1 - l0) / np.linalg.norm(l0) < 1e-11
+
+
+def test_probes_do_not_count_towards_energy(sun_and_planet):
+    bodies = sun_and_planet()
+    engine = SimulationEngine(bodies, 0.0, backend="numpy")
+    before = total_energy(engine.positions, engine.velocities, engine.masses)
+    engine.add_body(Probe(name="Probe-1", position=[3e11, 0, 0], velocity=[0, 1e4, 0]), bodies)
+    assert total_energy(engine.positions, engine.velocities, engine.masses) == before
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from galaxy_sim.gravity import Probe, G, update_accelerations_gpu
+from galaxy_sim.engine import SimulationEngine, measure_throughput
+
+
+def test_accelerations_stay_on_numpy():
+    positions = np.array([[0.0, 0.0, 0.0], [1.496e11, 0.0, 0.0]])
+    masses = np.array([1.989e30, 5.972e24])
+    accels = update_accelerations_gpu(positions, masses)
+
+    assert isinstance(accels, np.ndarray)
+    expected = G * 1.989e30 / 1.496e11 ** 2
+    assert np.isclose(-accels[1, 0], expected, rtol=1e-9)
+
+
+def test_numpy_engine_orbit(sun_and_planet):
+    engine = SimulationEngine(sun_and_planet(), 0.0, backend="numpy")
+    assert engine.backend_name == "numpy"
+
+    for _ in range(24 * 365):
+        engine.step(3600)
+
+    final_distance = np.linalg.norm(engine.get_positions()[1] - engine.get_positions()[0])
+    assert abs(final_distance - 1.496e11) / 1.496e11 < 0.05
+
+
+def test_throughput_report(sun_and_planet):
+    engine = SimulationEngine(sun_and_planet(), 0.0, backend="numpy")
+    report = measure_throughput(engine, dt=3600, steps=10)
+
+    assert report['backend'] == "numpy"
+    assert report['bodies'] == 2 and report['steps'] == 10
+    assert np.isclose(report['body_steps_per_sec'], report['steps_per_sec'] * 2)
+
+
+def test_passive_probes_feel_but_do_not_produce_gravity(sun_and_planet):
+    bodies = sun_and_planet()
+    reference = SimulationEngine(sun_and_planet(), 0.0, backend="numpy")
+    engine = SimulationEngine(bodies, 0.0, backend="numpy")
+    capacity = engine.PASSIVE_INITIAL_CAPACITY
+    for k in range(capacity + 5):
+        probe = Probe(name=f"Probe-{k}", position=[1.0e11 + 1e9 * k, 0, 0], velocity=[0, 35_000, 0])
+        bodies.append(probe)
+        engine.add_body(probe, bodies)
+
+    assert engine.n_passive == capacity + 5
+    assert engine.positions.shape[0] == 2
+    for _ in range(100):
+        engine.step(3600)
+        reference.step(3600)
+    assert np.array_equal(engine.positions, reference.positions)
+
+    engine.update_body_objects(bodies)
+    assert np.linalg.norm(bodies[-1].position) > 1.0e11
+    assert np.array_equal(bodies[-1].position, engine.passive_positions[-1])
+
+
+def test_remove_passive_body_keeps_slots_consistent(sun_and_planet):
+    bodies = sun_and_planet()
+    engine = SimulationEngine(bodies, 0.0, backend="numpy")
+    for k in range(3):
+        probe = Probe(name=f"Probe-{k}", position=[1.0e11 * (k + 1), 0, 0], velocity=[0, 30_000, 0])
+        bodies.append(probe)
+        engine.add_body(probe, bodies)
+
+    engine.remove_body("Probe-0")
+    assert engine.body_names() == ["Sun", "Earth", "Probe-2", "Probe-1"]
+    assert np.allclose(engine.get_positions()[2], [3.0e11, 0, 0])
+    with pytest.raises(KeyError):
+        engine.remove_body("Probe-0")
+    with pytest.raises(ValueError):
+        engine.remove_body("Earth")
+    engine.remove_body("Earth", bodies)
+    assert engine.body_names() == ["Sun", "Probe-2", "Probe-1"]
+
+
+def test_adaptive_engine_substeps_cover_dt(sun_and_planet):
+    engine = SimulationEngine(sun_and_planet(), 0.0, backend="numpy", integrator="adaptive", tolerance=1e-10)
+    for _ in range(73):
+        engine.step(5 * 86400)
+        assert np.isclose(sum(engine.last_dts), 5 * 86400)
+
+    final_distance = np.linalg.norm(engine.get_positions()[1] - engine.get_positions()[0])
+    assert abs(final_distance - 1.496e11) / 1.496e11 < 0.01
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from galaxy_sim.gravity import Body, G
+from galaxy_sim.ephemeris import Ephemeris
+from galaxy_sim.events import Approach
+from galaxy_sim.engine import SimulationEngine
+from galaxy_sim.prediction import run_ensemble_prediction, evaluate_trajectory
+
+SUN_MASS = 1.989e30
+ORBITS = {"Planet": (1.496e11, 365.25 * 86400), "Moon": (4.0e8, 2.0 * 86400)}
+
+
+def circular_states(name, times):
+    radius, period = ORBITS[name]
+    phase = 2 * np.pi * np.asarray(times) / period
+    speed = 2 * np.pi * radius / period
+    return np.stack([radius * np.cos(phase), radius * np.sin(phase), 0 * phase,
+                     -speed * np.sin(phase), speed * np.cos(phase), 0 * phase], axis=1)
+
+
+def make_system():
+    sun = Body(mass=SUN_MASS, position=[0, 0, 0], name="Sun", body_type="star")
+    r = 1.496e11
+    speed = np.sqrt(G * SUN_MASS / r)
+    earth = Body(mass=5.972e24, position=[r, 0, 0], velocity=[0, speed, 0], name="Earth", body_type="planet")
+    jupiter = Body(mass=1.898e27, position=[0, 5.2 * r, 0], velocity=[-np.sqrt(G * SUN_MASS / (5.2 * r)), 0, 0],
+                   name="Jupiter", body_type="planet")
+    return [sun, earth, jupiter]
+
+
+def test_sampled_interpolant_meets_tolerance_with_per_body_steps():
+    reported = []
+    ephemeris = Ephemeris.sample(["Planet", "Moon"], [1.0, 1.0], circular_states, 0.0, 30 * 86400, tolerance=100.0,
+                                 progress=reported.append)
+    assert reported == [0.5, 1.0]
+    times = np.random.default_rng(0).uniform(0, 30 * 86400, 500)
+    for name in ORBITS:
+        pos, vel = ephemeris.track(name, times)
+        truth = circular_states(name, times)
+        assert np.linalg.norm(pos - truth[:, :3], axis=1).max() < 100.0
+        assert np.linalg.norm(vel - truth[:, 3:], axis=1).max() < 1e-3 * np.linalg.norm(truth[0, 3:])
+    # The fast moon needs a finer grid than the planet.
+    assert ephemeris._step[1] < ephemeris._step[0]
+    with pytest.raises(ValueError):
+        ephemeris.state(31 * 86400)
+
+
+def test_rails_prediction_matches_integrated_prediction():
+    bodies, dt = make_system(), 86400
+    launch_positions = np.array([[1.5e11, 0, 0], [0, 2.0e11, 0]])
+    launch_velocities = np.array([[0, 34_000, 0], [-28_000, 0, 2000]])
+    integrated = run_ensemble_prediction(bodies, launch_positions, launch_velocities, duration_days=300, dt=dt)
+    # Sampled at the prediction's own step, the rails hold exactly the states the integration visits.
+    ephemeris = Ephemeris.from_bodies(bodies, dt, 300, t_start=1e8)
+    on_rails = run_ensemble_prediction(None, launch_positions, launch_velocities, duration_days=300, dt=dt,
+                                       ephemeris=ephemeris, epoch=1e8)
+    assert np.allclose(on_rails, integrated, rtol=1e-9, atol=1.0)
+
+    approach = Approach(2, ephemeris.index("Jupiter"))
+    run_ensemble_prediction(None, launch_positions, launch_velocities, duration_days=300, dt=dt,
+                            events=[approach], ephemeris=ephemeris, epoch=1e8)
+    dists, _ = approach.result()
+    for k in range(2):
+        expected = evaluate_trajectory(integrated[k], bodies[2], bodies, dt)
+        assert expected * (1 - 1e-2) <= dists[k] <= expected * (1 + 1e-9)
+        assert np.isclose(evaluate_trajectory(on_rails[k], bodies[2], bodies, dt, ephemeris, 1e8), expected, rtol=1e-9)
+
+
+def test_evaluate_trajectory_target_track_is_exact():
+    bodies, dt = make_system(), 3600 * 6
+    engine = SimulationEngine(bodies, 0.0, backend="numpy")
+    earth_track = []
+    for _ in range(400):
+        engine.step(dt)
+        earth_track.append(engine.get_positions()[1])
+    # The target track follows the same leapfrog integration, not a separate approximation.
+    assert evaluate_trajectory(np.array(earth_track), bodies[1], bodies, dt) < 1e-3
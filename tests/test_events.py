@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from galaxy_sim.gravity import Body, G
+from galaxy_sim.events import Event, Approach, SphereOfInfluence, Impact, Escape
+from galaxy_sim.kepler import kepler_drift
+from galaxy_sim.prediction import run_ensemble_prediction
+
+SUN_MASS = 1.989e30
+MU = G * SUN_MASS
+AU = 1.496e11
+SUN = [Body(mass=SUN_MASS, position=[0, 0, 0], name="Sun", body_type="star")]
+
+
+def ellipse(r_apo=2 * AU, r_peri=0.5 * AU):
+    """State at aphelion of a Sun orbit, its perihelion time and its period."""
+    a = (r_apo + r_peri) / 2
+    period = 2 * np.pi * np.sqrt(a ** 3 / MU)
+    return np.array([r_apo, 0, 0.0]), np.array([0, np.sqrt(MU * (2 / r_apo - 1 / a)), 0.0]), period / 2, period
+
+
+def test_closest_approach_is_found_between_steps():
+    x0, v0, t_peri, period = ellipse()
+    approach = Approach(1, 0)
+    path = run_ensemble_prediction(SUN, x0, v0, 1.2 * period / 86400, 2 * 86400, events=[approach],
+                                   integrator='yoshida4')[0]
+    sampled = np.linalg.norm(path, axis=1).min()
+    dist, when = approach.result()
+    assert dist[0] == pytest.approx(0.5 * AU, rel=1e-4)
+    assert when[0] == pytest.approx(t_peri, abs=600)
+    assert abs(dist[0] - 0.5 * AU) < 0.1 * abs(sampled - 0.5 * AU)
+    assert [kind for _, _, kind in approach.log] == ['approach']
+
+
+def test_sphere_crossings_and_impact_stop():
+    x0, v0, t_peri, period = ellipse()
+    soi = SphereOfInfluence(1, 0, AU)
+    run_ensemble_prediction(SUN, x0, v0, period / 86400, 86400, events=[soi], integrator='yoshida4')
+    (_, t_in, entry), (_, t_out, exit_) = soi.log
+    assert (entry, exit_) == ('entry', 'exit')
+    assert (t_in + t_out) / 2 == pytest.approx(t_peri, abs=120)
+    r, _ = kepler_drift(x0[np.newaxis], v0[np.newaxis], MU, t_in)
+    assert np.linalg.norm(r) == pytest.approx(AU, rel=1e-6)
+
+    impact = Impact(1, 0, 0.6 * AU)
+    path = run_ensemble_prediction(SUN, x0, v0, period / 86400, 86400, events=[impact], integrator='yoshida4')[0]
+    r, _ = kepler_drift(x0[np.newaxis], v0[np.newaxis], MU, impact.times[0])
+    assert np.linalg.norm(r) == pytest.approx(0.6 * AU, rel=1e-6)
+    # The probe is stopped at the end of the impact step.
+    stop = int(impact.times[0] // 86400)
+    assert np.all(path[stop:] == path[stop])
+
+
+def test_escape_only_stops_unbound_probes():
+    x0 = np.array([AU, 0, 0.0])
+    v_escape = np.sqrt(2 * MU / AU)
+    escape = Escape(2, 3 * AU, center_idx=0, mu=MU)
+    # One hyperbolic probe and one bound probe with an aphelion beyond the radius.
+    velocities = [[0, 1.2 * v_escape, 0], [0, 0.95 * v_escape, 0]]
+    run_ensemble_prediction(SUN, [x0, x0], velocities, 3000, 86400, events=[escape])
+    assert np.isfinite(escape.times[0]) and np.isnan(escape.times[1])
+    r, _ = kepler_drift(x0[np.newaxis], np.array([velocities[0]]), MU, escape.times[0])
+    assert np.linalg.norm(r) == pytest.approx(3 * AU, rel=1e-4)
+
+
+def test_events_must_implement_check():
+    class Unchecked(Event):
+        kind = 'unchecked'
+
+    with pytest.raises(TypeError):
+        Unchecked(1)
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from galaxy_sim.gravity import G
+from galaxy_sim.ephemeris import Ephemeris
+from galaxy_sim.gravity_assist import flyby_dv, tabulate, LegCache, search_sequences, LEG_BLOCK_BINS
+from galaxy_sim.lambert import lambert
+
+SUN_MASS = 1.989e30
+MU = G * SUN_MASS
+AU = 1.496e11
+ORBITS = {"Venus": (0.723 * AU, 1.0, 4.87e24), "Earth": (AU, 0.3, 5.97e24), "Mars": (1.524 * AU, 2.0, 6.4e23),
+          "Jupiter": (5.203 * AU, 4.0, 1.898e27)}
+
+
+def circular_states(name, times):
+    times = np.asarray(times, dtype=np.float64)
+    if name == "Sun":
+        return np.zeros((len(times), 6))
+    a, phase, _ = ORBITS[name]
+    n = np.sqrt(MU / a ** 3)
+    p = phase + n * times
+    return np.stack([a * np.cos(p), a * np.sin(p), 0 * p, -a * n * np.sin(p), a * n * np.cos(p), 0 * p], axis=1)
+
+
+def make_ephemeris(years=8):
+    names = ["Sun"] + list(ORBITS)
+    return Ephemeris.sample(names, [SUN_MASS] + [o[2] for o in ORBITS.values()], circular_states,
+                            0.0, years * 365.25 * 86400, max_step=8 * 86400)
+
+
+def test_flyby_dv():
+    mu, rp_min = G * 5.97e24, 7e6
+    v_in = np.array([5000.0, 0, 0])
+    # A pure magnitude change far from the planet, a free turn within reach, and an impossible reversal.
+    assert flyby_dv(v_in, np.array([5100.0, 0, 0]), mu, rp_min) == pytest.approx(100.0, rel=1e-3)
+    turned = 5000.0 * np.array([np.cos(0.5), np.sin(0.5), 0])
+    assert flyby_dv(v_in, turned, mu, rp_min) == pytest.approx(0.0, abs=1e-6)
+    assert flyby_dv(v_in, -v_in, mu, rp_min) == np.inf
+
+
+def test_legs_are_memoized_per_date_block():
+    ephemeris = make_ephemeris()
+    table = tabulate(ephemeris, ["Earth", "Mars"], 0.0, 4 * 365.25 * 86400)
+    legs = LegCache(table)
+    tofs, v_out, v_in = legs(0, 1, 3)
+    legs(0, 1, LEG_BLOCK_BINS - 1)
+    assert (legs.hits, legs.misses) == (1, 1)
+    legs(0, 1, LEG_BLOCK_BINS)
+    assert legs.misses == 2
+
+    v1, v2 = lambert(table['x'][0, 3], table['x'][1, 3 + tofs], tofs * table['step'], table['mu'])
+    assert np.allclose(v_out, v1 - table['v'][0, 3])
+    assert np.allclose(v_in, v2 - table['v'][1, 3 + tofs])
+
+
+def test_sequence_search_ranks_tours_and_matches_in_the_pool():
+    ephemeris = make_ephemeris()
+    options = dict(max_flybys=2, max_days=5 * 365, arrival='flyby', top=5)
+    ranked = search_sequences(ephemeris, "Earth", "Jupiter", ["Venus", "Earth", "Mars"], 0.0, 365.25 * 86400,
+                              workers=1, **options)
+    direct = search_sequences(ephemeris, "Earth", "Jupiter", [], 0.0, 365.25 * 86400, workers=1, **options)
+    assert [r['dv'] for r in ranked] == sorted(r['dv'] for r in ranked)
+    assert ranked[0]['dv'] <= direct[0]['dv']
+    assert any(len(r['sequence']) > 2 for r in ranked)
+    for r in ranked:
+        assert r['sequence'][0] == "Earth" and r['sequence'][-1] == "Jupiter"
+        assert np.all(np.diff(r['times']) > 0) and r['times'][-1] - r['departure'] <= 5 * 365 * 86400
+        assert r['dv'] == pytest.approx(np.linalg.norm(r['vinf_departure']) + sum(r['flyby_dv']))
+
+    pooled = search_sequences(ephemeris, "Earth", "Jupiter", ["Venus", "Earth", "Mars"], 0.0, 365.25 * 86400,
+                              workers=2, **options)
+    assert [(r['sequence'], r['dv']) for r in pooled] == [(r['sequence'], r['dv']) for r in ranked]
@@ -0,0 +1,56 @@
+import json
+import threading
+import pytest
+from galaxy_sim.engine import SimulationEngine
+from galaxy_sim.instrument import PROFILER, NULL_TIMER, Profiler, format_summary
+
+@pytest.fixture
+def profiler():
+    PROFILER.reset()
+    yield PROFILER
+    PROFILER.disable()
+    PROFILER.reset()
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler()
+    assert profiler.timer("step") is NULL_TIMER
+    with profiler.timer("step"):
+        profiler.count("steps")
+    assert profiler.summary() == {} and profiler.counters() == {}
+
+
+def test_rolling_percentiles_and_chrome_trace(tmp_path):
+    profiler = Profiler(window=4)
+    profiler.enable(tracing=True)
+    for ms in (1, 2, 3, 4, 100):
+        profiler._record("frame", 0, ms * 1_000_000)
+    assert list(profiler.samples("frame")) == [2, 3, 4, 100]
+    assert profiler.summary()["frame"]["count"] == 5 and profiler.summary()["frame"]["p50_ms"] == 3.5
+
+    worker = threading.Thread(target=lambda: profiler.count("force_evals", 3), name="simulation")
+    worker.start(); worker.join()
+    with profiler.timer("update_frame"):
+        pass
+    assert profiler.write_trace(tmp_path / "trace.json") == 7
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert {e["args"]["name"] for e in events if e["ph"] == "M"} >= {"simulation"}
+    assert [e["args"] for e in events if e["ph"] == "C"] == [{"force_evals": 3}]
+    assert all(e["dur"] >= 0 for e in events if e["ph"] == "X")
+    assert "frame" in format_summary(profiler.summary(), profiler.counters(), {"force_evals": 30.0})
+
+
+def test_engine_hot_paths_are_instrumented(profiler, sun_and_planet):
+    bodies = sun_and_planet()
+    engine = SimulationEngine(bodies, 0.0, backend="numpy")
+    engine.step(3600)
+    assert profiler.counters() == {}
+    profiler.enable()
+    engine.step(3600)
+    engine.advance(3600, 10)
+    engine.update_body_objects(bodies)
+    counters, summary = profiler.counters(), profiler.summary()
+    assert counters["steps"] == 11 and counters["force_evals"] == 11
+    assert counters["transfer_bytes"] == 2 * engine.n_bodies * 3 * 8
+    assert summary["step"]["count"] == 2 and summary["transfer"]["count"] == 2
+    assert summary["update_body_objects"]["count"] == 1
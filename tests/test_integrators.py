@@ -0,0 +1,178 @@
+import numpy as np
+import pytest
+from galaxy_sim.gravity import Body, Probe, G
+from galaxy_sim.engine import SimulationEngine
+from galaxy_sim.ephemeris import Ephemeris, EphemerisField
+from galaxy_sim.integrators import INTEGRATORS, make_integrator
+from galaxy_sim.kepler import kepler_drift, elliptic_drift
+from galaxy_sim.prediction import run_ensemble_prediction
+
+SUN_MASS = 1.989e30
+
+
+def make_outer_system():
+    bodies = [Body(mass=SUN_MASS, position=[0, 0, 0], name="Sun", body_type="star")]
+    for name, au, mass, phase in [("Earth", 1.0, 5.97e24, 0.3), ("Jupiter", 5.2, 1.898e27, 1.0),
+                                  ("Saturn", 9.58, 5.68e26, 2.0), ("Neptune", 30.1, 1.02e26, 4.0)]:
+        r = au * 1.496e11
+        speed = np.sqrt(G * SUN_MASS / r)
+        bodies.append(Body(mass=mass, position=[r * np.cos(phase), r * np.sin(phase), 0.01 * r],
+                           velocity=[-1.02 * speed * np.sin(phase), speed * np.cos(phase), 0], name=name,
+                           body_type="planet"))
+    return bodies
+
+
+def energy(engine):
+    x, v, m = engine.positions, engine.velocities, engine.masses
+    kinetic = 0.5 * np.sum(m * np.sum(v * v, axis=1))
+    i, j = np.triu_indices(len(m), k=1)
+    potential = -np.sum(G * m[i] * m[j] / np.linalg.norm(x[i] - x[j], axis=1))
+    return kinetic + potential
+
+
+def max_energy_error(integrator, dt_days, years=20):
+    engine = SimulationEngine(make_outer_system(), 0.0, backend="numpy", integrator=integrator)
+    e0 = energy(engine)
+    steps = int(years * 365 / dt_days)
+    worst = 0.0
+    for k in range(steps):
+        engine.step(dt_days * 86400)
+        if k % 10 == 0:
+            worst = max(worst, abs(energy(engine) / e0 - 1))
+    return worst
+
+
+def test_registry_names():
+    assert {'leapfrog', 'verlet', 'yoshida4', 'wisdom_holman', 'adaptive', 'block', 'block_subsystem',
+            'encke'} <= set(INTEGRATORS)
+    with pytest.raises(ValueError):
+        make_integrator('euler')
+
+
+def test_leapfrog_uses_one_force_evaluation_per_step():
+    engine = SimulationEngine(make_outer_system(), 0.0, backend="numpy", integrator="leapfrog")
+    for _ in range(50):
+        engine.step(86400)
+    assert engine.integrator.force_evaluations == 51
+
+
+def test_higher_order_schemes_beat_leapfrog_at_large_steps():
+    leapfrog_1d = max_energy_error('leapfrog', 1)
+    assert max_energy_error('yoshida4', 10) < max_energy_error('leapfrog', 10) / 10
+    assert max_energy_error('wisdom_holman', 10) <= leapfrog_1d
+
+
+def test_wisdom_holman_carries_massless_probes():
+    bodies = make_outer_system()
+    probe = Probe(name="Probe-1", position=[2.0e11, 0, 0], velocity=[0, np.sqrt(G * SUN_MASS / 2.0e11), 0])
+    reference = SimulationEngine(bodies + [probe], 0.0, backend="numpy", integrator="adaptive", tolerance=1e-12)
+    engine = SimulationEngine(bodies + [probe], 0.0, backend="numpy", integrator="wisdom_holman")
+    for _ in range(36):
+        reference.step(10 * 86400)
+        engine.step(10 * 86400)
+
+    error = np.linalg.norm(engine.passive_positions[0] - reference.passive_positions[0])
+    assert error / 2.0e11 < 1e-5
+
+
+def test_kepler_drift_matches_two_body_period():
+    mu = G * SUN_MASS
+    r0 = np.array([[1.496e11, 0, 0], [0, 2.0e11, 0]])
+    v0 = np.array([[0, np.sqrt(mu / 1.496e11), 0], [-np.sqrt(mu / 2.0e11), 0, 0]])
+    periods = 2 * np.pi * np.sqrt(np.linalg.norm(r0, axis=1) ** 3 / mu)
+
+    for k in range(2):
+        r, v = kepler_drift(r0[k:k + 1], v0[k:k + 1], mu, periods[k])
+        assert np.allclose(r, r0[k:k + 1], rtol=0, atol=1.0)
+        assert np.allclose(v, v0[k:k + 1], rtol=0, atol=1e-6)
+
+
+def test_elliptic_drift_matches_kepler_drift():
+    mu = G * 5.683e26
+    rng = np.random.default_rng(0)
+    radius, phase = rng.uniform(7e7, 1.4e8, 500), rng.uniform(0, 2 * np.pi, 500)
+    speed = np.sqrt(mu / radius) * (1 + rng.normal(0, 0.02, 500))
+    r0 = np.column_stack([radius * np.cos(phase), radius * np.sin(phase), rng.normal(0, 1e5, 500)])
+    v0 = np.column_stack([-speed * np.sin(phase), speed * np.cos(phase), rng.normal(0, 100, 500)])
+    v0[0] *= 1.5  # unbound: handed to kepler_drift
+    for dt in (600.0, 30 * 86400.0, -7 * 86400.0):
+        r, v = elliptic_drift(r0, v0, mu, dt)
+        r_ref, v_ref = kepler_drift(r0, v0, mu, dt)
+        assert np.allclose(r, r_ref, rtol=1e-10, atol=1.0)
+        assert np.allclose(v, v_ref, rtol=1e-10, atol=1e-6)
+
+
+def make_jovian_system():
+    jupiter_r, jupiter_mass = 7.785e11, 1.898e27
+    bodies = [Body(mass=SUN_MASS, position=[0, 0, 0], name="Sun", body_type="star"),
+              Body(mass=jupiter_mass, position=[jupiter_r, 0, 0], velocity=[0, np.sqrt(G * SUN_MASS / jupiter_r), 0],
+                   name="Jupiter", body_type="planet")]
+    for name, r, mass in [("Io", 4.217e8, 8.93e22), ("Callisto", 1.883e9, 1.076e23)]:
+        bodies.append(Body(mass=mass, position=[jupiter_r + r, 0, 0], name=name, body_type="moon", parent="Jupiter",
+                           velocity=[0, bodies[1].velocity[1] + np.sqrt(G * jupiter_mass / r), 0]))
+    return bodies + make_outer_system()[3:]  # Saturn and Neptune
+
+
+def test_block_timesteps_resolve_moons_without_shortening_planet_steps():
+    dt, steps, fine = 6 * 3600, 60, 32
+    reference = SimulationEngine(make_jovian_system(), 0.0, backend="numpy", integrator="leapfrog")
+    reference.advance(dt / fine, steps * fine)
+    coarse = SimulationEngine(make_jovian_system(), 0.0, backend="numpy", integrator="leapfrog")
+    coarse.advance(dt, steps)
+    block = SimulationEngine(make_jovian_system(), 0.0, backend="numpy", integrator="block")
+    block.advance(dt, steps)
+
+    levels = dict(zip(block.body_names(), block.integrator.levels))
+    assert levels["Io"] == levels["Jupiter"] == 5 and levels["Saturn"] == levels["Neptune"] == 0
+    io = lambda engine: engine.get_positions()[2] - engine.get_positions()[1]
+    assert np.linalg.norm(io(block) - io(reference)) < 1e-3 * np.linalg.norm(io(coarse) - io(reference))
+    # Only the rows on finer levels are evaluated between the planets' steps.
+    fine_rows = sum(1 << int(level) for level in block.integrator.levels)
+    assert block.integrator.row_evaluations == steps * fine_rows
+
+
+def test_subsystem_block_timesteps_share_the_parent_level():
+    per_body = SimulationEngine(make_jovian_system(), 0.0, backend="numpy", integrator="block")
+    grouped = SimulationEngine(make_jovian_system(), 0.0, backend="numpy", integrator="block_subsystem")
+    assert list(grouped.subsystem_rows()) == [0, 1, 1, 1, 4, 5]
+    per_body.step(6 * 3600); grouped.step(6 * 3600)
+    assert per_body.integrator.levels[3] < per_body.integrator.levels[2]
+    assert list(grouped.integrator.levels) == [0, 5, 5, 5, 0, 0]
+
+
+def test_encke_takes_long_cruise_steps_and_switches_inside_spheres_of_influence():
+    days = 730
+    ephemeris = Ephemeris.from_bodies(make_outer_system(), 86400, days + 10)
+    earth = ephemeris.state(0.0)[0][1]
+    r = 1.1 * 1.496e11
+    launch_positions = np.array([[r * np.cos(1.5), r * np.sin(1.5), 0], earth + [3e8, 0, 0]])
+    launch_velocities = np.array([[-37_000 * np.sin(1.5), 37_000 * np.cos(1.5), 500],
+                                  [-29_800 * np.sin(0.3) + 3000, 29_800 * np.cos(0.3), 0]])
+    run = lambda integrator, dt, **options: run_ensemble_prediction(
+        None, launch_positions, launch_velocities, days, dt, integrator=integrator, ephemeris=ephemeris, epoch=0.0,
+        **options)
+    reference = run("adaptive", 86400, tolerance=1e-12)[:, 4::5]
+    encke = run("encke", 5 * 86400)
+    leapfrog = run("leapfrog", 6 * 3600)[:, 19::20]
+    error = lambda p: np.linalg.norm(p - reference, axis=2).max(axis=1)
+    assert (error(encke) < error(leapfrog) / 10).all()
+    assert error(encke)[0] < 1e-7 * r
+
+    integrator = make_integrator("encke")
+    field = EphemerisField(ephemeris, 0.0)
+    x, v = launch_positions.copy(), launch_velocities.copy()
+    integrator.step(x, v, 0.0, 86400, field)
+    assert list(integrator._inside) == [False, True]
+    assert integrator.force_evaluations > 0 and integrator.rectifications == 1
+    # Rows are held only when the caller says so, not because they are momentarily at rest.
+    x, v = launch_positions.copy(), np.zeros((2, 3))
+    integrator.reset()
+    integrator.stopped = np.array([True, False])
+    integrator.step(x, v, 0.0, 86400, field)
+    assert np.array_equal(x[0], launch_positions[0]) and np.linalg.norm(v[1]) > 0
+
+
+def test_encke_needs_bodies_on_rails():
+    engine = SimulationEngine(make_outer_system(), 0.0, backend="numpy", integrator="encke")
+    with pytest.raises(TypeError):
+        engine.step(86400)
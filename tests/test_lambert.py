@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from galaxy_sim import porkchop as porkchop_module
+from galaxy_sim.gravity import G
+from galaxy_sim.ephemeris import Ephemeris
+from galaxy_sim.kepler import kepler_drift
+from galaxy_sim.lambert import lambert
+from galaxy_sim.porkchop import porkchop, best_cell, default_grid
+
+SUN_MASS = 1.989e30
+MU = G * SUN_MASS
+ORBITS = {"Earth": (1.496e11, 0.3), "Mars": (2.279e11, 2.0)}
+
+
+def circular_states(name, times):
+    times = np.asarray(times, dtype=np.float64)
+    if name == "Sun":
+        return np.zeros((len(times), 6))
+    a, phase = ORBITS[name]
+    n = np.sqrt(MU / a ** 3)
+    p = phase + n * times
+    return np.stack([a * np.cos(p), a * np.sin(p), 0 * p, -a * n * np.sin(p), a * n * np.cos(p), 0 * p], axis=1)
+
+
+def make_ephemeris():
+    return Ephemeris.sample(["Sun", "Earth", "Mars"], [SUN_MASS, 5.97e24, 6.4e23], circular_states,
+                            0.0, 6 * 365.25 * 86400, max_step=4 * 86400)
+
+
+def test_lambert_solutions_reach_the_target():
+    rng = np.random.default_rng(0)
+    r1 = rng.normal(0, 1.5e11, (200, 3)) * [1, 1, 0.05]
+    r2 = rng.normal(0, 3.0e11, (200, 3)) * [1, 1, 0.05]
+    tof = rng.uniform(5, 1000, 200) * 86400
+    v1, v2 = lambert(r1, r2, tof, MU)
+    assert np.isfinite(v1).all()
+    for k in range(200):
+        r, v = kepler_drift(r1[k:k + 1], v1[k:k + 1], MU, tof[k])
+        assert np.linalg.norm(r - r2[k]) / np.linalg.norm(r2[k]) < 1e-9
+        assert np.linalg.norm(v - v2[k]) / np.linalg.norm(v2[k]) < 1e-8
+    # Every transfer runs prograde about +z, or retrograde when asked.
+    assert np.all(np.cross(r1, v1)[:, 2] > 0)
+    v1_retro, _ = lambert(r1, r2, tof, MU, normal=[0, 0, -1])
+    assert np.all(np.cross(r1, v1_retro)[:, 2] < 0)
+
+
+def test_porkchop_finds_the_hohmann_transfer(tmp_path):
+    ephemeris = make_ephemeris()
+    departures, tofs = default_grid(ORBITS["Earth"][0], ORBITS["Mars"][0], MU, 0.0, size=120)
+    grid = porkchop(ephemeris, "Earth", "Mars", departures, tofs, directory=str(tmp_path))
+    assert grid['total_dv'].shape == (120, 120)
+
+    a0, a1 = ORBITS["Earth"][0], ORBITS["Mars"][0]
+    hohmann_dv = (np.sqrt(MU / a0) * (np.sqrt(2 * a1 / (a0 + a1)) - 1)
+                  + np.sqrt(MU / a1) * (1 - np.sqrt(2 * a0 / (a0 + a1))))
+    hohmann_tof = np.pi * np.sqrt(((a0 + a1) / 2) ** 3 / MU)
+    best = best_cell(grid)
+    assert best['total_dv'] == pytest.approx(hohmann_dv, rel=5e-3)
+    assert best['tof'] == pytest.approx(hohmann_tof, rel=0.02)
+    assert np.linalg.norm(best['vinf_departure']) ** 2 == pytest.approx(best['c3'])
+    assert best_cell(grid, max_c3=1.0) is None
+
+
+def test_porkchop_is_cached_on_disk(tmp_path, monkeypatch):
+    ephemeris = make_ephemeris()
+    departures, tofs = default_grid(ORBITS["Earth"][0], ORBITS["Mars"][0], MU, 0.0, size=20)
+    first = porkchop(ephemeris, "Earth", "Mars", departures, tofs, directory=str(tmp_path))
+
+    def no_solve(*args, **kwargs):
+        raise AssertionError("cached grids should not be re-solved")
+    monkeypatch.setattr(porkchop_module, "lambert", no_solve)
+    second = porkchop(ephemeris, "Earth", "Mars", departures, tofs, directory=str(tmp_path))
+    assert np.array_equal(first['total_dv'], second['total_dv'], equal_nan=True)
+    with pytest.raises(AssertionError):
+        porkchop(ephemeris, "Earth", "Mars", departures + 86400, tofs, directory=str(tmp_path))
@@ -0,0 +1,27 @@
+import pytest
+from galaxy_sim.engine import SimulationEngine
+from galaxy_sim.main import parse_args, run_headless
+from galaxy_sim.integrators import engine_integrators
+
+
+def test_decimate_is_validated(tmp_path, sun_and_planet, capsys):
+    args = parse_args(["--headless", "--decimate", "Earth=4", "--decimate", "Sun=2"])
+    assert args.decimate == [("Earth", 4), ("Sun", 2)]
+    for bad in ("Earth", "Earth=0", "Earth=x", "=3"):
+        with pytest.raises(SystemExit):
+            parse_args(["--decimate", bad])
+
+    engine = SimulationEngine(sun_and_planet(), 0.0, backend="numpy")
+    args = parse_args(["--headless", "--days", "1", "--output", str(tmp_path / "store"), "--decimate", "Eart=4"])
+    assert run_headless(engine, args) is None
+    assert "Eart" in capsys.readouterr().out and engine.et == 0.0
+
+
+def test_every_integrator_choice_steps_the_engine(sun_and_planet):
+    for name in engine_integrators():
+        args = parse_args(["--integrator", name])
+        engine = SimulationEngine(sun_and_planet(), 0.0, backend="numpy", integrator=args.integrator)
+        engine.step(3600)
+        assert engine.et == 3600
+    with pytest.raises(SystemExit):
+        parse_args(["--integrator", "encke"])
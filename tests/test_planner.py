@@ -0,0 +1,73 @@
+import time
+import numpy as np
+from galaxy_sim.gravity import Probe, G
+from galaxy_sim.planner import Job, PlanningWorker, stream_prediction, search_launch
+from galaxy_sim.prediction import run_prediction, evaluate_trajectory
+
+
+def make_bodies(sun_and_planet):
+    return sun_and_planet("Mars", 6.4e23, 1.52 * 1.496e11, angle=90)
+
+
+def wait(job, timeout=30.0):
+    deadline = time.perf_counter() + timeout
+    while not job.done and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    assert job.done
+
+
+def test_streamed_prediction_matches_blocking_prediction(sun_and_planet):
+    bodies, worker = make_bodies(sun_and_planet), PlanningWorker()
+    position, velocity = np.array([1.496e11, 0, 0]), np.array([0, 32_000.0, 0])
+    job = worker.submit("predict", stream_prediction, bodies, position, velocity, 400, 86400)
+    wait(job)
+    state = job.snapshot()
+    expected = run_prediction(bodies, Probe(name="ghost", position=position, velocity=velocity), 400, 86400)
+    assert state['error'] is None and state['progress'] > 0
+    assert np.array_equal(state['result'], expected)
+    # Partial paths are prefixes of the final one.
+    assert np.array_equal(state['partial'], expected[:len(state['partial'])])
+    worker.shutdown()
+
+
+def test_new_job_supersedes_running_job(sun_and_planet):
+    bodies, worker = make_bodies(sun_and_planet), PlanningWorker()
+    position, velocity = np.array([1.496e11, 0, 0]), np.array([0, 32_000.0, 0])
+    first = worker.submit("slow", stream_prediction, bodies, position, velocity, 365 * 200, 3600)
+    second = worker.submit("fast", stream_prediction, bodies, position, velocity, 10, 86400)
+    wait(second)
+    wait(first)
+    assert first.cancelled and first.result is None and first.progress < 1
+    assert second.result.shape == (10, 3)
+    worker.shutdown()
+
+
+def test_launch_search_improves_and_reports_best_so_far(sun_and_planet):
+    bodies = make_bodies(sun_and_planet)
+    start = np.array([1.496e11, 0, 0])
+    earth_velocity = np.array([0, np.sqrt(G * bodies[0].mass / 1.496e11), 0])
+
+    def launch_states(angles, speeds):
+        rad = np.deg2rad(angles)[:, np.newaxis]
+        directions = np.hstack([np.cos(rad), np.sin(rad), np.zeros_like(rad)])
+        return np.tile(start, (len(angles), 1)), earth_velocity + directions * speeds[:, np.newaxis]
+
+    job = Job("search")
+    best = search_launch(job, launch_states, 1, bodies, 300, 86400, angle=90.0, speed=3000.0,
+                         candidates=64, rounds=3, seed=0)
+    assert best is not None and job.progress == 1.0
+    assert job.snapshot()['partial'] is best
+    assert best['path'].shape == (300, 3)
+    assert np.isclose(best['dist'], evaluate_trajectory(best['path'], bodies[1], bodies, 86400), rtol=1e-9)
+
+
+def test_eta_extrapolates_progress():
+    job = Job("eta")
+    assert job.eta() is None
+    job.started -= 2.0
+    assert job.report(0.5)
+    assert 1.5 < job.eta() < 2.5
+    job.begin("Sampling")
+    assert job.snapshot()['stage'] == "Sampling" and job.eta() is None
+    job.cancel()
+    assert not job.report(0.6)
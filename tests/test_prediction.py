@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from galaxy_sim.gravity import Body, Probe
+from galaxy_sim.events import Approach
+from galaxy_sim.prediction import run_prediction, run_ensemble_prediction
+
+
+def make_sun():
+    return Body(mass=1.989e30, position=[0, 0, 0], velocity=[0, 0, 0], name="Sun", body_type="star")
+
+
+def test_prediction_path_shape_and_orbit():
+    probe = Probe(name="ghost", position=[1.496e11, 0, 0], velocity=[0, 29_780, 0])
+    dt = 3600 * 6
+    path = run_prediction([make_sun()], probe, duration_days=365, dt=dt)
+
+    assert path.shape == (int(365 * 86400 / dt), 3)
+    radii = np.linalg.norm(path, axis=1)
+    assert np.all(np.abs(radii - 1.496e11) / 1.496e11 < 0.05)
+    # The caller's probe must not be modified by the prediction.
+    assert np.allclose(probe.position, [1.496e11, 0, 0])
+
+
+def test_prediction_escape_freezes_path():
+    probe = Probe(name="ghost", position=[1.0e13, 0, 0], velocity=[5e6, 0, 0])
+    path = run_prediction([make_sun()], probe, duration_days=100, dt=86400)
+
+    escaped = np.linalg.norm(path, axis=1) > 2e13
+    assert escaped[-1]
+    first = np.argmax(escaped)
+    assert np.all(path[first:] == path[first])
+
+
+def test_prediction_backend_defaults_to_environment(monkeypatch):
+    probe = Probe(name="ghost", position=[1.496e11, 0, 0], velocity=[0, 29_780, 0])
+    monkeypatch.setenv("GALAXY_SIM_BACKEND", "fortran")
+    with pytest.raises(ValueError):
+        run_prediction([make_sun()], probe, duration_days=1, dt=3600)
+    assert run_prediction([make_sun()], probe, duration_days=1, dt=3600, backend="numpy").shape == (24, 3)
+
+def test_ensemble_matches_single_predictions():
+    sun = make_sun()
+    earth = Body(mass=5.972e24, position=[1.496e11, 0, 0], velocity=[0, 29_780, 0], name="Earth",
+                 body_type="planet")
+    launch_positions = np.array([[1.5e11, 0, 0], [1.6e11, 0, 0], [0, 2.0e11, 0]])
+    launch_velocities = np.array([[0, 32_000, 0], [0, 35_000, 1000], [-26_000, 0, 0]])
+
+    paths = run_ensemble_prediction([sun, earth], launch_positions, launch_velocities, duration_days=200, dt=86400)
+    assert paths.shape == (3, 200, 3)
+    for k in range(3):
+        probe = Probe(name="ghost", position=launch_positions[k], velocity=launch_velocities[k])
+        single = run_prediction([sun, earth], probe, duration_days=200, dt=86400)
+        assert np.allclose(paths[k], single, rtol=0, atol=1.0)
+
+    approach = Approach(3, 1)
+    run_ensemble_prediction([sun, earth], launch_positions, launch_velocities, duration_days=200, dt=86400,
+                            events=[approach])
+    min_dist, _ = approach.result()
+    earth_only = run_ensemble_prediction([sun, earth], [earth.position], [earth.velocity], 200, 86400)[0]
+    sampled = np.linalg.norm(paths - earth_only[np.newaxis], axis=2).min(axis=1)
+    sampled = np.minimum(sampled, np.linalg.norm(launch_positions - earth.position, axis=1))
+    assert np.all(min_dist <= sampled * (1 + 1e-9)) and np.allclose(min_dist, sampled, rtol=1e-2)
+
+
+def test_adaptive_prediction_resolves_flyby():
+    sun = make_sun()
+    jupiter = Body(mass=1.898e27, position=[7.78e11, 0, 0], velocity=[0, 13_070, 0], name="Jupiter",
+                   body_type="planet")
+    probe = Probe(name="ghost", position=[7.58e11, -3e10, 0], velocity=[0, 15_070, 0])
+
+    reference = run_prediction([sun, jupiter], probe, duration_days=200, dt=600)
+    adaptive = run_prediction([sun, jupiter], probe, duration_days=200, dt=21600, integrator="adaptive")
+    fixed = run_prediction([sun, jupiter], probe, duration_days=200, dt=21600)
+
+    adaptive_error = np.linalg.norm(adaptive[-1] - reference[-1])
+    assert adaptive_error < 1e3
+    assert adaptive_error < np.linalg.norm(fixed[-1] - reference[-1]) / 100
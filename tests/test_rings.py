@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from galaxy_sim.gravity import Body, Probe, Ring, G
+from galaxy_sim.engine import SimulationEngine
+from galaxy_sim.kepler import kepler_drift
+from galaxy_sim.rings import RingSystem
+from galaxy_sim.sim_thread import SimulationThread
+
+SUN_MASS, SATURN_MASS = 1.989e30, 5.683e26
+SATURN_R, TITAN_R = 1.4335e12, 1.2219e9
+RING = Ring("Saturn", 7.4e7, 1.37e8, (0.8, 0.7, 0.5), normal=(0.1, 0, 1))
+
+
+def make_saturn_system():
+    speed, titan_speed = np.sqrt(G * SUN_MASS / SATURN_R), np.sqrt(G * SATURN_MASS / TITAN_R)
+    return [Body(mass=SUN_MASS, position=[0, 0, 0], name="Sun", body_type="star"),
+            Body(mass=SATURN_MASS, position=[SATURN_R, 0, 0], velocity=[0, speed, 0], name="Saturn",
+                 body_type="planet"),
+            Body(mass=1.345e23, position=[SATURN_R, TITAN_R, 0], velocity=[-titan_speed, speed, 0], name="Titan",
+                 body_type="moon", parent="Saturn"),
+            Body(mass=1.898e27, position=[0, 7.78e11, 0], velocity=[-np.sqrt(G * SUN_MASS / 7.78e11), 0, 0],
+                 name="Jupiter", body_type="planet")]
+
+
+def test_ring_is_seeded_on_circular_orbits_in_its_plane():
+    system = RingSystem(RING, SATURN_MASS, count=5000, seed=0)
+    radii = np.linalg.norm(system.positions, axis=1)
+    normal = RING.normal / np.linalg.norm(RING.normal)
+    assert radii.min() >= RING.inner_radius * 0.999 and radii.max() <= RING.outer_radius * 1.001
+    assert np.abs(system.positions @ normal).max() < 1e3
+    assert np.allclose(np.linalg.norm(system.velocities, axis=1), np.sqrt(G * SATURN_MASS / radii), rtol=1e-6)
+    assert np.abs(system.velocities @ normal).max() < 1e-9
+    # Uniform over the annulus' area: half the particles lie outside the radius splitting it in two.
+    median = np.sqrt((RING.inner_radius ** 2 + RING.outer_radius ** 2) / 2)
+    assert abs(np.mean(radii > median) - 0.5) < 0.03
+
+
+def test_ring_follows_integrated_particles_under_the_strongest_perturbers():
+    engine = SimulationEngine(make_saturn_system(), 0.0, backend="numpy")
+    system = engine.add_ring(RING, count=50, seed=1)
+    start_x, start_v = system.positions.copy(), system.velocities.copy()
+    saturn = engine.positions[1].copy(), engine.velocities[1].copy()
+    probes = [Probe(name=f"Particle-{k}", position=start_x[k] + saturn[0], velocity=start_v[k] + saturn[1])
+              for k in range(50)]
+    reference = SimulationEngine(make_saturn_system() + probes, 0.0, backend="numpy", integrator="adaptive",
+                                 tolerance=1e-11)
+    days = 5
+    for _ in range(days * 4):
+        engine.step(6 * 3600)
+    reference.advance(86400, days)
+
+    truth = reference.passive_positions - reference.positions[1]
+    unperturbed = kepler_drift(start_x, start_v, G * SATURN_MASS, days * 86400)[0]
+    assert list(system.nearest[:2]) == [2, 0] and system.perturbed  # Titan, then the Sun
+    error = np.linalg.norm(system.positions - truth, axis=1).max()
+    assert error < np.linalg.norm(unperturbed - truth, axis=1).max() / 20
+
+
+def test_long_advances_kick_their_first_max_kicks_steps_then_drift():
+    engine = SimulationEngine(make_saturn_system(), 0.0, backend="numpy")
+    system = engine.add_ring(RING, count=100, seed=2)
+    window = system.max_kicks * system.kick_step
+    start = (engine.positions.copy(), engine.velocities.copy(), engine.masses.copy())
+    kicked = RingSystem(RING, SATURN_MASS, count=100, seed=2)
+    kicked.advance(window, *start, 1)
+    engine.advance(6 * 3600, 40)
+    assert system.perturbed
+    expected = kepler_drift(kicked.positions, kicked.velocities, G * SATURN_MASS, 40 * 6 * 3600 - window)[0]
+    assert np.allclose(system.positions, expected, rtol=0, atol=1.0)
+    with pytest.raises(ValueError):
+        engine.add_ring(Ring("Uranus", 4e7, 5e7, (1, 1, 1)))
+
+
+def test_snapshots_carry_ring_particles():
+    engine = SimulationEngine(make_saturn_system(), 0.0, backend="numpy")
+    engine.add_ring(RING, count=300, seed=3)
+    sim = SimulationThread(engine, 3600).start()
+    snapshot = sim.latest()
+    sim.stop()
+    assert snapshot.ring_positions.shape == (300, 3) and not snapshot.ring_positions.flags.writeable
+    assert np.array_equal(snapshot.ring_positions, engine.get_ring_positions())
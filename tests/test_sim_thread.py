@@ -0,0 +1,46 @@
+import time
+import numpy as np
+import pytest
+from galaxy_sim.gravity import Probe
+from galaxy_sim.engine import SimulationEngine
+from galaxy_sim.sim_thread import SimulationThread
+
+@pytest.mark.parametrize("integrator", ["leapfrog", "yoshida4", "adaptive"])
+def test_fused_advance_matches_single_steps(sun_and_planet, integrator):
+    fused = SimulationEngine(sun_and_planet(), 0.0, backend="numpy", integrator=integrator)
+    single = SimulationEngine(sun_and_planet(), 0.0, backend="numpy", integrator=integrator)
+    fused.advance(3600, 500)
+    for _ in range(500):
+        single.step(3600)
+    assert fused.et == single.et
+    assert np.allclose(fused.get_positions(), single.get_positions(), rtol=1e-12, atol=1e-3)
+
+
+def test_thread_publishes_stable_snapshots_and_applies_calls(sun_and_planet):
+    engine = SimulationEngine(sun_and_planet(), 0.0, backend="numpy")
+    sim = SimulationThread(engine, 3600, steps_per_second=20_000).start()
+    try:
+        first = sim.latest()
+        assert first.et == 0.0 and not first.positions.flags.writeable
+        held = first.positions.copy()
+        time.sleep(0.2)
+        # Until the next latest() call the snapshot's buffer is never refilled.
+        assert np.array_equal(first.positions, held)
+
+        probe = Probe(name="Probe-1", position=[1.6e11, 0, 0], velocity=[0, 28_000, 0])
+        sim.call(engine.add_body, probe, []).result(timeout=5)
+        deadline = time.perf_counter() + 5
+        while "Probe-1" not in sim.latest().names and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        latest = sim.latest()
+        assert "Probe-1" in latest.names and latest.et > 0 and latest.steps * 3600 == latest.et
+
+        sim.paused = True
+        time.sleep(0.1)
+        et = sim.latest().et
+        time.sleep(0.1)
+        assert sim.latest().et == et
+    finally:
+        sim.stop()
+    latest.update_bodies([probe])
+    assert np.array_equal(probe.position, latest.positions[latest.index["Probe-1"]])
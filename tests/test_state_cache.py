@@ -0,0 +1,54 @@
+import numpy as np
+from galaxy_sim import state_cache, solar_system
+from galaxy_sim.gravity import Body
+from galaxy_sim.solar_system import BODY_DATA, load_initial_state
+
+
+def make_bodies():
+    return [Body(mass=1.989e30, position=[0, 0, 0], name="Sun", body_type="star"),
+            Body(mass=7.342e22, position=[3.8e8, 1.0, 2.0], velocity=[0, 1022.0, 3.0], name="Moon",
+                 body_type="moon", parent="Earth")]
+
+
+def test_state_round_trip(tmp_path):
+    state_cache.save_state("abc", make_bodies(), 8.0e8, directory=str(tmp_path))
+    bodies, et = state_cache.load_state("abc", directory=str(tmp_path))
+    assert et == 8.0e8
+    assert [b.name for b in bodies] == ["Sun", "Moon"]
+    assert bodies[0].parent is None and bodies[1].parent == "Earth" and bodies[1].body_type == "moon"
+    assert np.array_equal(bodies[1].position, [3.8e8, 1.0, 2.0])
+    assert np.array_equal(bodies[1].velocity, [0, 1022.0, 3.0])
+    assert state_cache.load_state("missing", directory=str(tmp_path)) is None
+
+
+def test_key_tracks_kernel_contents_epoch_and_body_data(tmp_path):
+    kernel = tmp_path / "kernel.bsp"
+    kernel.write_bytes(b"version one")
+    key = state_cache.state_key([str(kernel)], "2025-06-01", BODY_DATA, directory=str(tmp_path))
+    assert key == state_cache.state_key([str(kernel)], "2025-06-01", BODY_DATA, directory=str(tmp_path))
+    assert key != state_cache.state_key([str(kernel)], "2025-06-02", BODY_DATA, directory=str(tmp_path))
+    assert key != state_cache.state_key([str(kernel)], "2025-06-01", {'SUN': BODY_DATA['SUN']},
+                                        directory=str(tmp_path))
+    kernel.write_bytes(b"version two, longer")
+    assert key != state_cache.state_key([str(kernel)], "2025-06-01", BODY_DATA, directory=str(tmp_path))
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    state_cache.save_state("abc", make_bodies(), 0.0, directory=str(tmp_path))
+    with open(state_cache._state_path("abc", str(tmp_path)), 'wb') as f:
+        f.write(b"truncated")
+    assert state_cache.load_state("abc", directory=str(tmp_path)) is None
+
+
+def test_warm_start_skips_spice(tmp_path, monkeypatch):
+    monkeypatch.setenv(state_cache.CACHE_ENV_VAR, str(tmp_path))
+    spk, tls = tmp_path / "k.bsp", tmp_path / "k.tls"
+    spk.write_bytes(b"spk"); tls.write_bytes(b"tls")
+    key = state_cache.state_key([str(spk), str(tls)], "2025-06-01", BODY_DATA)
+    state_cache.save_state(key, make_bodies(), 1.0e8)
+
+    def no_spice(*paths):
+        raise AssertionError("SPICE should not be touched on a warm start")
+    monkeypatch.setattr(solar_system, "furnish_kernels", no_spice)
+    bodies, et = load_initial_state(str(spk), str(tls), "2025-06-01")
+    assert et == 1.0e8 and len(bodies) == 2
@@ -0,0 +1,49 @@
+import numpy as np
+from galaxy_sim import tiled_kernel
+from galaxy_sim.gravity import Body, Probe, G, update_accelerations_gpu, field_accelerations
+from galaxy_sim.engine import SimulationEngine
+from galaxy_sim.tiled_kernel import tiled_accelerations, tiled_field_accelerations
+
+
+def relative_error(a, b):
+    return np.max(np.linalg.norm(a - b, axis=1) / np.linalg.norm(b, axis=1))
+
+
+def random_cluster(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(0, 1e11, (n, 3)), rng.uniform(1e20, 1e30, n)
+
+
+def test_tiled_matches_dense_kernel_to_round_off():
+    positions, masses = random_cluster(700)
+    reference = update_accelerations_gpu(positions, masses)
+    # Tile sizes that do and do not divide N, and a single tile covering everything.
+    for tile in (1, 64, 100, 1024):
+        assert relative_error(tiled_accelerations(positions, masses, tile_size=tile), reference) < 1e-12
+
+
+def test_tiled_field_matches_dense_field():
+    positions, masses = random_cluster(300)
+    points, _ = random_cluster(50, seed=1)
+    reference = field_accelerations(points, positions, masses)
+    assert relative_error(tiled_field_accelerations(points, positions, masses, tile_size=16), reference) < 1e-12
+
+
+def test_numpy_fallback_without_numba(monkeypatch):
+    monkeypatch.setattr(tiled_kernel, '_compiled', False)
+    positions, masses = random_cluster(200)
+    result = tiled_accelerations(positions, masses, tile_size=32)
+    assert relative_error(result, update_accelerations_gpu(positions, masses)) < 1e-12
+
+
+def test_engine_with_tiled_solver_tracks_direct():
+    sun = Body(mass=1.989e30, position=[0, 0, 0], name="Sun", body_type="star")
+    r = 1.496e11
+    speed = np.sqrt(G * 1.989e30 / r)
+    earth = Body(mass=5.97e24, position=[r, 0, 0], velocity=[0, speed, 0], name="Earth", body_type="planet")
+    probe = Probe(name="Probe-1", position=[0, 2 * r, 0], velocity=[-speed / np.sqrt(2), 0, 0])
+    engines = [SimulationEngine([sun, earth, probe], 0.0, backend="numpy", solver=name) for name in ("direct", "tiled")]
+    for engine in engines:
+        for _ in range(100):
+            engine.step(86400)
+    assert np.allclose(engines[0].get_positions(), engines[1].get_positions(), rtol=1e-10, atol=1.0)
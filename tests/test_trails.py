@@ -0,0 +1,36 @@
+import numpy as np
+from galaxy_sim.trails import TrailBuffer, MAX_ALPHA
+
+
+def test_ring_keeps_latest_samples_and_uploads_only_new_vertices():
+    trails = TrailBuffer(trail_length=4, capacity=2)
+    trails.add("Earth", (0.4, 0.6, 1.0))
+    trails.take_dirty()
+    for i in range(6):
+        trails.write(np.array([[i, 0.0, 0.0]]))
+    assert np.array_equal(trails.samples("Earth")[:, 0], [2, 3, 4, 5])
+    assert np.allclose(trails.alpha("Earth"), np.linspace(0.0, MAX_ALPHA, 4))
+
+    trails.take_dirty()
+    trails.write(np.array([[6.0, 0.0, 0.0]]))
+    dirty = trails.take_dirty()
+    # The new sample starts one segment and ends the previous one: two single-vertex blocks.
+    assert [len(block) for _, block in dirty] == [1, 1]
+    flat = trails.vertices.reshape(-1, 3)
+    for offset, block in dirty:
+        assert np.array_equal(flat[offset:offset + len(block)], block)
+
+
+def test_added_bodies_grow_the_buffer_and_start_their_own_trails():
+    trails = TrailBuffer(trail_length=8, capacity=1)
+    trails.add("Sun", (1.0, 0.9, 0.4))
+    for i in range(3):
+        trails.write(np.array([[0.0, i, 0.0]]))
+    trails.add("Probe-1", (1.0, 0.2, 0.2))
+    assert trails.capacity == 2 and trails.resized
+    for i in range(3, 5):
+        trails.write(np.array([[0.0, i, 0.0], [1.0, i, 0.0]]))
+
+    assert np.array_equal(trails.samples("Sun")[:, 1], [0, 1, 2, 3, 4])
+    assert np.array_equal(trails.samples("Probe-1")[:, 1], [3, 4])
+    assert trails.indices.shape == (8 * 2, 2)
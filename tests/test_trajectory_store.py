@@ -0,0 +1,54 @@
+import numpy as np
+from galaxy_sim.engine import SimulationEngine
+from galaxy_sim.batch import run_batch
+from galaxy_sim.prediction import run_ensemble_prediction
+from galaxy_sim.trajectory_store import TrajectoryWriter, TrajectoryStore, TrajectoryRecorder
+
+
+def synthetic_states(steps, n=3):
+    t = np.arange(steps) * 60.0
+    x = np.arange(steps * n * 3, dtype=np.float64).reshape(steps, n, 3)
+    return t, x, -x
+
+
+def test_store_decimates_per_body_and_slices_by_time(tmp_path):
+    t, x, v = synthetic_states(50)
+    path = str(tmp_path / "run")
+    writer = TrajectoryWriter(path, ["Sun", "Earth", "Moon"], every={"Sun": 5, "Earth": 2}, chunk_rows=8)
+    for k in range(50):
+        writer.write(t[k], x[k], v[k])
+    # Only complete chunks are visible while the writer is open.
+    assert len(TrajectoryStore(path).times("Moon")) == 48
+    writer.close()
+
+    store = TrajectoryStore(path)
+    assert isinstance(store.times("Moon"), np.memmap)
+    for name, i, every in (("Sun", 0, 5), ("Earth", 1, 2), ("Moon", 2, 1)):
+        times, positions, velocities = store.read(name, velocities=True)
+        assert np.array_equal(times, t[::every])
+        assert np.array_equal(positions, x[::every, i]) and np.array_equal(velocities, v[::every, i])
+
+    times, positions = store.read("Moon", t_start=600.0, t_end=1500.0, stride=3)
+    assert np.array_equal(times, t[10:26:3]) and np.array_equal(positions, x[10:26:3, 2])
+    blocks = list(store.iter_chunks("Moon"))
+    assert max(len(b[0]) for b in blocks) <= 8 and sum(len(b[0]) for b in blocks) == 50
+    assert len(store.read("Earth", t_start=1e9)[0]) == 0
+
+
+def test_batch_and_prediction_stream_into_stores(tmp_path, sun_and_planet):
+    r = 1.496e11
+    bodies = sun_and_planet()
+    engine = SimulationEngine(bodies, 0.0, backend="numpy")
+    writer = TrajectoryWriter(str(tmp_path / "batch"), engine.body_names(), every={"Sun": 10}, chunk_rows=16)
+    run_batch(engine, 100 * 3600, 3600, writer=writer)
+    writer.close()
+    store = TrajectoryStore(str(tmp_path / "batch"))
+    assert len(store.times("Earth")) == 101 and len(store.times("Sun")) == 11
+    assert np.array_equal(store.read("Earth")[1][-1], engine.get_positions()[1])
+
+    launch_x, launch_v = [[r, 0, 0], [r, 1e9, 0]], [[0, 32e3, 0], [0, 31e3, 0]]
+    paths = run_ensemble_prediction(bodies, launch_x, launch_v, 30, 86400)
+    recorder = TrajectoryRecorder(str(tmp_path / "ghosts"), ["a", "b"], 86400, epoch=1000.0, chunk_rows=7)
+    store = run_ensemble_prediction(bodies, launch_x, launch_v, 30, 86400, reducer=recorder)
+    times, positions = store.read("b")
+    assert np.array_equal(positions, paths[1]) and times[0] == 1000.0 + 86400